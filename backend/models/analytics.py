@@ -0,0 +1,17 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class SlideEvent(BaseModel):
+    """A slide view or dwell event reported by the preview player"""
+    type: str = Field(..., pattern="^(slide_view|dwell)$")
+    presentation_id: str = Field(..., max_length=64)
+    slide_id: str = Field(..., max_length=64)
+    slide_index: Optional[int] = Field(None, ge=0)
+    session_id: str = Field(..., max_length=64, description="Random ID of one viewing session")
+    dwell_ms: Optional[int] = Field(None, ge=0, le=3_600_000, description="Time spent on the slide (dwell events)")
+    timestamp: Optional[datetime] = Field(None, description="When the event happened on the client; defaults to arrival time")
+
+class IngestEventsRequest(BaseModel):
+    """A batch of slide events"""
+    events: List[SlideEvent] = Field(..., min_length=1, max_length=500)
@@ -17,6 +17,7 @@ class Presentation(BaseModel):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     is_public: bool = False
     view_count: int = 0
+    version: int = 0  # Incremented on every slide change
 
 class PresentationCreate(BaseModel):
     title: str
@@ -41,4 +42,5 @@ class PresentationResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     is_public: bool
-    view_count: int
\ No newline at end of file
+    view_count: int
+    version: int = 0
\ No newline at end of file
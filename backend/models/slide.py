@@ -68,6 +68,9 @@ class Slide(BaseModel):
     elements: List[SlideElement] = Field(default_factory=list, description="Elements on the slide")
     background: SlideBackground = Field(default_factory=SlideBackground, description="Slide background")
     notes: str = Field(default="", max_length=5000, description="Speaker notes")
+    visual_suggestion: str = Field(default="", max_length=1000, description="Suggested visual for the slide (from AI generation)")
+    thumbnail_url: str = Field(default="", description="Server-rendered thumbnail (blob URL), refreshed in the background")
+    thumbnail_hash: str = Field(default="", description="Content hash the thumbnail was rendered from")
     duration: Optional[int] = Field(None, description="Display duration in seconds (for auto-play)")
     transition: Optional[Dict[str, Any]] = Field(None, description="Slide transition settings")
     created_at: datetime = Field(default_factory=datetime.now, description="Creation timestamp")
@@ -1,9 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
+from datetime import datetime
+import asyncio
+import base64
+import binascii
+import os
 from services.presentation_generator import PresentationGenerator
 from services.gemini_service import GeminiService
+from services.blob_store import get_blob_store
+from services.image_cache import ImageCache, image_cache_key
+from services.image_derivatives import get_image_pipeline
 from utils.auth_utils import get_current_user
+from utils.streaming import sse_event, SSE_HEADERS
+from routes.auth import get_db
+from services.deck_digest import deck_digest
+from services.thumbnails import thumbnails
+from models.slide import SlideElement, ElementPosition
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,6 +28,17 @@ router = APIRouter(prefix="/ai", tags=["AI Generation"])
 # Initialize services
 presentation_generator = PresentationGenerator()
 gemini_service = GeminiService()
+image_cache = ImageCache()
+
+# Reference image limits: raw upload size and longest side sent to the model
+REFERENCE_IMAGE_MAX_BYTES = int(os.environ.get("REFERENCE_IMAGE_MAX_BYTES", str(8 * 1024 * 1024)))
+REFERENCE_IMAGE_MAX_DIMENSION = int(os.environ.get("REFERENCE_IMAGE_MAX_DIMENSION", "1024"))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Whole multipart body allowed for a reference upload (image plus form fields),
+# enforced by BodySizeLimitMiddleware before the form is parsed
+REFERENCE_UPLOAD_PATH = "/api/ai/generate-image/upload"
+REFERENCE_UPLOAD_MAX_BODY = REFERENCE_IMAGE_MAX_BYTES + UPLOAD_CHUNK_SIZE
 
 # Request/Response Models
 class GeneratePresentationRequest(BaseModel):
@@ -38,7 +64,54 @@ class ImproveContentRequest(BaseModel):
 class GenerateImageRequest(BaseModel):
     prompt: str = Field(..., min_length=10, max_length=1000, description="Image generation prompt")
     style: str = Field(default="professional", description="Image style")
-    reference_image: Optional[str] = Field(None, description="Base64-encoded reference image")
+    reference_image: Optional[str] = Field(
+        None,
+        max_length=REFERENCE_IMAGE_MAX_BYTES * 4 // 3 + 4,
+        description="Base64-encoded reference image (prefer /generate-image/upload for large images)"
+    )
+    regenerate: bool = Field(default=False, description="Bypass the image cache and generate a new image")
+
+class GenerateDeckImagesRequest(BaseModel):
+    style: str = Field(default="professional", description="Image style")
+    concurrency: Optional[int] = Field(None, ge=1, le=8, description="Maximum images generated at once")
+    skip_existing: bool = Field(default=True, description="Skip slides that already have an image")
+    regenerate: bool = Field(default=False, description="Bypass the image cache")
+
+# Default number of concurrent image generations for a whole deck
+DECK_IMAGE_CONCURRENCY = int(os.environ.get("DECK_IMAGE_CONCURRENCY", "4"))
+
+async def _generate_and_store_image(prompt: str, reference_image: Optional[str] = None) -> Dict[str, Any]:
+    """Generate one image and save it to the blob store"""
+    text_response, images = await gemini_service.generate_image(
+        prompt=prompt,
+        reference_image=reference_image
+    )
+    
+    if not images:
+        raise HTTPException(
+            status_code=500,
+            detail="No images were generated"
+        )
+    
+    # Store first image and return its URL instead of inline base64
+    image_data = images[0]
+    stored = await get_blob_store().put_base64(
+        image_data.get('data'),
+        image_data.get('mime_type')
+    )
+    return {"blob": stored, "text_response": text_response}
+
+def _slide_image_prompt(slide_title: str, slide_content: str, style: str, visual_suggestion: str = "") -> str:
+    """Prompt for an image that illustrates one slide"""
+    suggestion_part = f"\nSuggested Visual: {visual_suggestion}" if visual_suggestion else ""
+    return f"""Create a professional, high-quality image for a presentation slide.
+
+Slide Title: {slide_title}
+Slide Content: {slide_content}{suggestion_part}
+
+Style: {style}, modern, clean
+The image should visually support and enhance the slide content.
+Make it suitable for a business presentation."""
 
 # Endpoints
 @router.post("/generate-presentation")
@@ -182,6 +255,46 @@ async def improve_content(
             detail=f"Failed to improve content: {str(e)}"
         )
 
+async def _downscale_reference(data: bytes) -> str:
+    """Shrink reference image bytes to the model's working size; returns base64"""
+    try:
+        prepared = await get_image_pipeline().prepare_reference(data, REFERENCE_IMAGE_MAX_DIMENSION)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return base64.b64encode(prepared).decode()
+
+async def _generate_image_response(
+    prompt: str,
+    style: str,
+    reference_image: Optional[str],
+    regenerate: bool
+) -> Dict[str, Any]:
+    """Generate (or fetch from cache) an image and build the endpoint response"""
+    # Enhance prompt with style
+    enhanced_prompt = f"{prompt}\n\nStyle: {style}, high-quality, professional"
+    
+    # Generate image, unless an identical request is cached
+    cache_key = image_cache_key(prompt, style, reference_image)
+    result, cached = await image_cache.get_or_generate(
+        cache_key,
+        lambda: _generate_and_store_image(enhanced_prompt, reference_image),
+        regenerate=regenerate
+    )
+    stored = result['blob']
+    
+    return {
+        "success": True,
+        "data": {
+            "image_url": stored['url'],
+            "blob_key": stored['key'],
+            "mime_type": stored['mime_type'],
+            "srcset": stored.get('srcset', {}),
+            "text_response": result['text_response'],
+            "cached": cached
+        },
+        "message": "Image generated successfully"
+    }
+
 @router.post("/generate-image")
 async def generate_image(
     request: GenerateImageRequest,
@@ -190,38 +303,71 @@ async def generate_image(
     """
     Generate an image using Gemini Nano Banana
     
-    Returns base64-encoded image data
+    The image is saved to the blob store; returns its URL
     """
     try:
         logger.info(f"User {current_user['email']} generating image with prompt: {request.prompt[:50]}...")
         
-        # Enhance prompt with style
-        enhanced_prompt = f"{request.prompt}\n\nStyle: {request.style}, high-quality, professional"
+        reference_image = None
+        if request.reference_image:
+            encoded = request.reference_image.split(',', 1)[-1]  # Tolerate data URIs
+            try:
+                raw = base64.b64decode(encoded, validate=True)
+            except (binascii.Error, ValueError):
+                raise HTTPException(status_code=400, detail="Reference image is not valid base64")
+            reference_image = await _downscale_reference(raw)
         
-        # Generate image
-        text_response, images = await gemini_service.generate_image(
-            prompt=enhanced_prompt,
-            reference_image=request.reference_image
+        return await _generate_image_response(
+            request.prompt, request.style, reference_image, request.regenerate
         )
         
-        if not images:
-            raise HTTPException(
-                status_code=500,
-                detail="No images were generated"
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error generating image: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate image: {str(e)}"
+        )
+
+@router.post("/generate-image/upload")
+async def generate_image_with_upload(
+    prompt: str = Form(..., min_length=10, max_length=1000),
+    style: str = Form("professional"),
+    regenerate: bool = Form(False),
+    reference_image: UploadFile = File(..., description="Reference image file"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Generate an image from a prompt and an uploaded reference image
+    
+    The reference image is sent as multipart form data. Bodies over
+    REFERENCE_UPLOAD_MAX_BODY are refused with 413 by BodySizeLimitMiddleware
+    before the form is parsed; the image itself is then read in chunks up
+    to REFERENCE_IMAGE_MAX_BYTES and downscaled so its longest side is at
+    most REFERENCE_IMAGE_MAX_DIMENSION before being sent to the model.
+    """
+    try:
+        if reference_image.content_type and not reference_image.content_type.startswith('image/'):
+            raise HTTPException(status_code=400, detail="Reference file must be an image")
         
-        # Return first image
-        image_data = images[0]
+        logger.info(f"User {current_user['email']} generating image with uploaded reference: {prompt[:50]}...")
         
-        return {
-            "success": True,
-            "data": {
-                "image_base64": image_data.get('data'),
-                "mime_type": image_data.get('mime_type', 'image/png'),
-                "text_response": text_response
-            },
-            "message": "Image generated successfully"
-        }
+        # Read the upload in chunks, refusing anything over the cap
+        data = bytearray()
+        while True:
+            chunk = await reference_image.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            data.extend(chunk)
+            if len(data) > REFERENCE_IMAGE_MAX_BYTES:
+                raise HTTPException(status_code=413, detail="Reference image is too large")
+        await reference_image.close()
+        
+        reference_b64 = await _downscale_reference(bytes(data))
+        del data
+        
+        return await _generate_image_response(prompt, style, reference_b64, regenerate)
         
     except HTTPException:
         raise
@@ -254,37 +400,28 @@ async def generate_slide_image(
             )
         
         # Create contextual prompt
-        contextual_prompt = f"""Create a professional, high-quality image for a presentation slide.
-
-Slide Title: {slide_title}
-Slide Content: {slide_content}
-
-Style: {style}, modern, clean
-The image should visually support and enhance the slide content.
-Make it suitable for a business presentation."""
+        contextual_prompt = _slide_image_prompt(slide_title, slide_content, style)
         
         logger.info(f"User {current_user['email']} generating contextual image for slide: {slide_title}")
         
-        # Generate image
-        text_response, images = await gemini_service.generate_image(
-            prompt=contextual_prompt
+        # Generate image, unless an identical request is cached
+        cache_key = image_cache_key(contextual_prompt, style)
+        result, cached = await image_cache.get_or_generate(
+            cache_key,
+            lambda: _generate_and_store_image(contextual_prompt),
+            regenerate=bool(request.get('regenerate', False))
         )
-        
-        if not images:
-            raise HTTPException(
-                status_code=500,
-                detail="No images were generated"
-            )
-        
-        # Return first image
-        image_data = images[0]
+        stored = result['blob']
         
         return {
             "success": True,
             "data": {
-                "image_base64": image_data.get('data'),
-                "mime_type": image_data.get('mime_type', 'image/png'),
-                "text_response": text_response
+                "image_url": stored['url'],
+                "blob_key": stored['key'],
+                "mime_type": stored['mime_type'],
+                "srcset": stored.get('srcset', {}),
+                "text_response": result['text_response'],
+                "cached": cached
             },
             "message": "Contextual image generated successfully"
         }
@@ -298,6 +435,141 @@ Make it suitable for a business presentation."""
             detail=f"Failed to generate contextual image: {str(e)}"
         )
 
+@router.post("/generate-deck-images/{presentation_id}")
+async def generate_deck_images(
+    presentation_id: str,
+    request: GenerateDeckImagesRequest,
+    http_request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Illustrate every slide of a presentation, generating images concurrently
+    
+    Each slide's title, text and visual suggestion become an image prompt.
+    Up to `concurrency` images are generated at once, and each finished image
+    is added to its slide as an image element. Progress is streamed as
+    server-sent events, one per slide in completion order:
+    - {"type": "slide", "status": "done", "slide_id", "slide_number", "element_id", "image_url", "cached"}
+    - {"type": "slide", "status": "error", "slide_id", "slide_number", "detail"}
+    - {"type": "complete", "generated": n, "failed": n, "skipped": n}
+    
+    Disconnecting cancels the images that have not finished yet.
+    """
+    presentation = await db.presentations.find_one(
+        {"id": presentation_id, "user_id": current_user['id']},
+        {"_id": 0, "id": 1}
+    )
+    
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    
+    slides = await db.slides.find(
+        {"presentation_id": presentation_id},
+        {
+            "_id": 0, "id": 1, "slide_number": 1, "title": 1, "visual_suggestion": 1,
+            "elements.type": 1, "elements.content.text": 1
+        }
+    ).sort("slide_number", 1).to_list(length=None)
+    
+    pending = []
+    skipped = 0
+    for slide in slides:
+        if request.skip_existing and any(e.get('type') == 'image' for e in slide.get('elements', [])):
+            skipped += 1
+        else:
+            pending.append(slide)
+    
+    semaphore = asyncio.Semaphore(request.concurrency or DECK_IMAGE_CONCURRENCY)
+    
+    async def illustrate(slide: Dict[str, Any]) -> Dict[str, Any]:
+        title = slide.get('title', '')
+        content = "\n".join(
+            e.get('content', {}).get('text', '')
+            for e in slide.get('elements', [])
+            if e.get('type') == 'text' and e.get('content', {}).get('text') != title
+        )
+        prompt = _slide_image_prompt(title, content[:1500], request.style, slide.get('visual_suggestion', ''))
+        
+        try:
+            async with semaphore:
+                result, cached = await image_cache.get_or_generate(
+                    image_cache_key(prompt, request.style),
+                    lambda: _generate_and_store_image(prompt),
+                    regenerate=request.regenerate
+                )
+            stored = result['blob']
+            
+            # Add the image to the right half of the slide
+            element = SlideElement(
+                type='image',
+                position=ElementPosition(x=55, y=25, width=40, height=50, z_index=2),
+                content={
+                    'url': stored['url'],
+                    'image_url': stored['url'],
+                    'srcset': stored.get('srcset', {}),
+                    'alt_text': title
+                },
+                style={'object_fit': 'cover'}
+            )
+            await db.slides.update_one(
+                {"id": slide['id']},
+                {
+                    "$push": {"elements": element.model_dump()},
+                    "$set": {"updated_at": datetime.now()}
+                }
+            )
+            await db.presentations.update_one(
+                {"id": presentation_id},
+                {"$set": {"updated_at": datetime.now()}, "$inc": {"version": 1}}
+            )
+            deck_digest.invalidate(presentation_id)
+            thumbnails.schedule(db, presentation_id, slide['id'])
+            
+            return {
+                "type": "slide",
+                "status": "done",
+                "slide_id": slide['id'],
+                "slide_number": slide.get('slide_number'),
+                "element_id": element.id,
+                "image_url": stored['url'],
+                "cached": cached
+            }
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            logger.error(f"Error illustrating slide {slide['id']}: {detail}")
+            return {
+                "type": "slide",
+                "status": "error",
+                "slide_id": slide['id'],
+                "slide_number": slide.get('slide_number'),
+                "detail": detail
+            }
+    
+    logger.info(f"User {current_user['email']} illustrating {len(pending)} slides of presentation {presentation_id}")
+    
+    async def event_stream():
+        tasks = [asyncio.create_task(illustrate(slide)) for slide in pending]
+        generated = failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                if result['status'] == 'done':
+                    generated += 1
+                else:
+                    failed += 1
+                yield sse_event(result)
+                if await http_request.is_disconnected():
+                    logger.info(f"Deck image generation for {presentation_id} cancelled by client")
+                    return
+            
+            yield sse_event({"type": "complete", "generated": generated, "failed": failed, "skipped": skipped})
+        finally:
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
 @router.get("/health")
 async def ai_health_check():
     """Check if AI services are configured correctly"""
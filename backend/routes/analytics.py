@@ -0,0 +1,96 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from typing import Dict, Any
+import logging
+
+from models.analytics import IngestEventsRequest
+from services.analytics import slide_analytics
+from utils.auth_utils import get_current_user
+from routes.auth import get_db
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+@router.post("/events", status_code=202)
+async def ingest_events(http_request: Request) -> Dict[str, Any]:
+    """
+    Accept a batch of slide view and dwell events from the preview player
+    
+    Public, like shared previews. Events are only buffered here and written
+    in bulk in the background, so the request does no database work.
+    
+    The body is an IngestEventsRequest as JSON, sent as application/json or
+    text/plain: browsers send page-unload beacons to another origin only
+    with a CORS-safelisted type such as text/plain.
+    
+    Args:
+        http_request: Request whose body holds up to 500 events
+        
+    Returns:
+        Number of events accepted (fewer than sent when the buffer is full)
+    """
+    try:
+        request = IngestEventsRequest.model_validate_json(await http_request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+    accepted = slide_analytics.add([event.model_dump() for event in request.events])
+    return {"accepted": accepted}
+
+@router.get("/presentations/{presentation_id}/slides")
+async def get_slide_stats(
+    presentation_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Per-slide engagement for a presentation, in slide order
+    
+    Stats are refreshed by the aggregation job, so the latest few minutes
+    of events may not be included yet.
+    
+    Args:
+        presentation_id: ID of the presentation
+        current_user: Authenticated user (must own the presentation)
+        
+    Returns:
+        Views, sessions and dwell time per slide
+    """
+    try:
+        presentation = await db.presentations.find_one(
+            {"id": presentation_id},
+            {"_id": 0, "user_id": 1, "slides": 1}
+        )
+        if not presentation:
+            raise HTTPException(status_code=404, detail="Presentation not found")
+        
+        if presentation['user_id'] != current_user['id']:
+            raise HTTPException(status_code=403, detail="Not authorized to view these analytics")
+        
+        stats = await db.slide_stats.find(
+            {"presentation_id": presentation_id},
+            {"_id": 0}
+        ).to_list(length=None)
+        
+        order = {slide_id: index for index, slide_id in enumerate(presentation.get('slides', []))}
+        stats.sort(key=lambda s: order.get(s['slide_id'], len(order)))
+        
+        return {
+            "success": True,
+            "data": stats
+        }
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting slide stats: {e}")
+        raise HTTPException(status_code=500, detail=f"Error getting slide stats: {str(e)}")
+
+@router.get("/metrics")
+async def get_analytics_metrics(current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Ingestion counters (buffered, accepted, written, dropped, pending_aggregation)
+    """
+    return slide_analytics.metrics()
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, HTTPException, Header, Query
+from fastapi.responses import StreamingResponse, Response
+from typing import Optional
+import logging
+
+from services.blob_store import get_blob_store
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/blobs", tags=["Blobs"])
+
+# Blob keys are content hashes, so a response for a key never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{key}")
+async def get_blob(
+    key: str,
+    w: Optional[int] = Query(None, ge=1, description="Serve the smallest derivative at least this wide"),
+    if_none_match: Optional[str] = Header(None)
+):
+    """
+    Stream a stored blob (image) by its SHA-256 key
+    
+    With `w`, images are served from the closest resized derivative instead
+    of the original. Responses are cacheable forever; revalidation with
+    If-None-Match returns 304 without reading the blob.
+    """
+    blob_store = get_blob_store()
+    
+    if w is not None:
+        key = await blob_store.resolve_width(key, w)
+    
+    metadata = await blob_store.metadata(key)
+    if metadata is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+    
+    headers = {
+        "ETag": f'"{key}"',
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL
+    }
+    
+    if if_none_match and key in if_none_match:
+        return Response(status_code=304, headers=headers)
+    
+    if metadata.get("size") is not None:
+        headers["Content-Length"] = str(metadata["size"])
+    
+    return StreamingResponse(
+        blob_store.stream(key),
+        media_type=metadata.get("mime_type", "application/octet-stream"),
+        headers=headers
+    )
@@ -1,6 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from typing import List
+from pymongo import ReturnDocument
+from contextlib import aclosing
+from typing import List, Optional, Dict, Any, Set, Tuple
+from datetime import datetime
+import asyncio
 import logging
 
 from models.chat import (
@@ -11,7 +16,11 @@ from models.chat import (
     ChatContext
 )
 from services.gemini_service import GeminiService
+from services.chat_memory import ChatContextWindow, ChatSummaryMemory
+from services.deck_digest import DeckDigestCache, deck_digest
+from services.thumbnails import thumbnails
 from utils.auth_utils import get_current_user
+from utils.streaming import sse_event, SSE_HEADERS
 from routes.auth import get_db
 
 logger = logging.getLogger(__name__)
@@ -20,6 +29,76 @@ router = APIRouter(prefix="/ai", tags=["AI Chat"])
 
 # Initialize services
 gemini_service = GeminiService()
+chat_window = ChatContextWindow(size=10)
+chat_summary = ChatSummaryMemory(gemini_service, every=6)
+
+# Longest slice of a raw (not yet summarized) message included in prompts
+RECENT_MESSAGE_CHARS = 500
+
+# Slides retrieved into the prompt by lexical search over the deck
+RELATED_SLIDES = 3
+
+# Chat history pagination
+HISTORY_PAGE_DEFAULT = 50
+HISTORY_PAGE_MAX = 200
+# History cursors are "<created_at ISO timestamp>_<message id>"
+HISTORY_CURSOR_SEPARATOR = "_"
+
+def _build_chat_prompt(
+    presentation: dict,
+    request: SendChatRequest,
+    chat_history: List[dict],
+    summary: dict,
+    deck_outline: str,
+    related_slides: List[dict]
+):
+    """Build the (system prompt, user prompt) pair for a chat turn"""
+    system_prompt = f"""You are an AI presentation assistant helping with a presentation titled "{presentation.get('title', 'Untitled')}".
+
+Your role is to:
+1. Suggest better wording and structure for slide content
+2. Recommend visual elements and design improvements
+3. Provide content ideas and expand on topics
+4. Offer design tips and best practices
+5. Answer questions about presentation creation
+
+Keep responses concise, actionable, and friendly.
+"""
+    
+    # Whole-deck outline from the cached digest
+    if deck_outline:
+        system_prompt += f"\n\nPresentation outline:\n{deck_outline}"
+    
+    # Add current slide context if available
+    if request.context and request.context.slide_title:
+        system_prompt += f"\n\nCurrent slide context:"
+        system_prompt += f"\n- Slide #{request.context.slide_number}: {request.context.slide_title}"
+        if request.context.slide_content:
+            system_prompt += f"\n- Content: {request.context.slide_content[:200]}..."
+    
+    # Slides the message seems to be about, found by lexical search
+    if related_slides:
+        system_prompt += "\n\nSlides related to the user's message:"
+        for slide in related_slides:
+            system_prompt += f"\n- Slide #{slide['slide_number']} (id {slide['id']}): {slide['title']}"
+            if slide['excerpt']:
+                system_prompt += f"\n  {slide['excerpt']}"
+    
+    # Build conversation context from the rolling summary plus the messages
+    # it does not cover yet (the current message is sent separately below)
+    conversation_context = ""
+    if summary.get('summary'):
+        conversation_context += f"\n\nConversation so far (summary):\n{summary['summary']}\n"
+    
+    recent = chat_summary.uncovered(summary, chat_history[:-1])[-chat_summary.every:]
+    if recent:
+        conversation_context += "\n\nRecent conversation:\n"
+        for msg in recent:
+            role = "User" if msg['role'] == 'user' else "Assistant"
+            conversation_context += f"{role}: {msg['content'][:RECENT_MESSAGE_CHARS]}\n"
+    
+    full_prompt = f"{conversation_context}\n\nUser: {request.message}\n\nProvide helpful, specific advice:"
+    return system_prompt, full_prompt
 
 @router.post("/chat")
 async def send_chat_message(
@@ -47,6 +126,9 @@ async def send_chat_message(
         if not presentation:
             raise HTTPException(status_code=404, detail="Presentation not found")
         
+        # Make sure the context window is loaded before the new message is saved
+        await chat_window.recent(db, request.presentation_id)
+        
         # Save user message
         user_message = ChatMessage(
             presentation_id=request.presentation_id,
@@ -57,44 +139,22 @@ async def send_chat_message(
         )
         
         await db.chat_messages.insert_one(user_message.model_dump())
+        chat_window.append(request.presentation_id, user_message.model_dump())
         
-        # Get recent chat history for context (last 10 messages)
-        chat_history = await db.chat_messages.find({
-            "presentation_id": request.presentation_id
-        }).sort("created_at", -1).limit(10).to_list(10)
-        
-        chat_history.reverse()  # Chronological order
-        
-        # Build context-aware system prompt
-        system_prompt = f"""You are an AI presentation assistant helping with a presentation titled "{presentation.get('title', 'Untitled')}".
-
-Your role is to:
-1. Suggest better wording and structure for slide content
-2. Recommend visual elements and design improvements
-3. Provide content ideas and expand on topics
-4. Offer design tips and best practices
-5. Answer questions about presentation creation
-
-Keep responses concise, actionable, and friendly.
-"""
-        
-        # Add current slide context if available
-        if request.context and request.context.slide_title:
-            system_prompt += f"\n\nCurrent slide context:"
-            system_prompt += f"\n- Slide #{request.context.slide_number}: {request.context.slide_title}"
-            if request.context.slide_content:
-                system_prompt += f"\n- Content: {request.context.slide_content[:200]}..."
-        
-        # Build conversation context from history
-        conversation_context = ""
-        if len(chat_history) > 1:
-            conversation_context = "\n\nRecent conversation:\n"
-            for msg in chat_history[-6:]:  # Last 3 exchanges
-                role = "User" if msg['role'] == 'user' else "Assistant"
-                conversation_context += f"{role}: {msg['content'][:100]}...\n"
+        # Recent chat history for context (last 10 messages), served from memory
+        chat_history = await chat_window.recent(db, request.presentation_id)
+        summary = await chat_summary.get(db, request.presentation_id)
+        digest = await deck_digest.get(db, presentation)
+        related_slides = deck_digest.search(
+            digest,
+            request.message,
+            k=RELATED_SLIDES,
+            exclude=request.context.slide_id if request.context else None
+        )
         
-        # Generate AI response
-        full_prompt = f"{conversation_context}\n\nUser: {request.message}\n\nProvide helpful, specific advice:"
+        system_prompt, full_prompt = _build_chat_prompt(
+            presentation, request, chat_history, summary, DeckDigestCache.render(digest), related_slides
+        )
         
         ai_response = await gemini_service.generate_text(
             prompt=full_prompt,
@@ -112,6 +172,10 @@ Keep responses concise, actionable, and friendly.
         )
         
         await db.chat_messages.insert_one(assistant_message.model_dump())
+        chat_window.append(request.presentation_id, assistant_message.model_dump())
+        
+        # Fold older turns into the rolling summary in the background
+        chat_summary.maybe_update(db, request.presentation_id, await chat_window.recent(db, request.presentation_id))
         
         return {
             "success": True,
@@ -131,33 +195,188 @@ Keep responses concise, actionable, and friendly.
             detail=f"Failed to process chat message: {str(e)}"
         )
 
-@router.get("/chat-history/{presentation_id}", response_model=List[ChatMessageResponse])
+@router.post("/chat/stream")
+async def stream_chat_message(
+    request: SendChatRequest,
+    http_request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Send a chat message and stream the AI response as server-sent events
+    
+    Events (JSON in the `data:` field):
+    - {"type": "user_message", "message": {...}, "streaming": bool} once the
+      user message is saved; `streaming` is False when the server has no
+      token stream configured (see GeminiService.stream_text), in which case
+      the whole response arrives as a single delta
+    - {"type": "delta", "content": "..."} for every chunk of generated text
+    - {"type": "done", "message": {...}} with the persisted assistant message
+    - {"type": "error", "detail": "..."} if generation fails mid-stream
+    
+    If the client disconnects, the upstream generation is cancelled and no
+    assistant message is saved.
+    """
+    user_id = current_user['id']
+    
+    # Verify user owns this presentation
+    presentation = await db.presentations.find_one({
+        "id": request.presentation_id,
+        "user_id": user_id
+    })
+    
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    
+    # Make sure the context window is loaded before the new message is saved
+    await chat_window.recent(db, request.presentation_id)
+    
+    # Save user message
+    user_message = ChatMessage(
+        presentation_id=request.presentation_id,
+        user_id=user_id,
+        role="user",
+        content=request.message,
+        context=request.context
+    )
+    
+    await db.chat_messages.insert_one(user_message.model_dump())
+    chat_window.append(request.presentation_id, user_message.model_dump())
+    
+    # Recent chat history for context (last 10 messages), served from memory
+    chat_history = await chat_window.recent(db, request.presentation_id)
+    summary = await chat_summary.get(db, request.presentation_id)
+    digest = await deck_digest.get(db, presentation)
+    related_slides = deck_digest.search(
+        digest,
+        request.message,
+        k=RELATED_SLIDES,
+        exclude=request.context.slide_id if request.context else None
+    )
+    
+    system_prompt, full_prompt = _build_chat_prompt(
+        presentation, request, chat_history, summary, DeckDigestCache.render(digest), related_slides
+    )
+    
+    async def event_stream():
+        yield sse_event({
+            "type": "user_message",
+            "message": ChatMessageResponse(**user_message.model_dump()).model_dump(mode="json"),
+            "streaming": gemini_service.streams_tokens
+        })
+        
+        chunks = []
+        try:
+            async with aclosing(gemini_service.stream_text(
+                prompt=full_prompt,
+                system_message=system_prompt
+            )) as stream:
+                async for delta in stream:
+                    if await http_request.is_disconnected():
+                        logger.info(f"Chat stream for {request.presentation_id} cancelled by client")
+                        return
+                    chunks.append(delta)
+                    yield sse_event({"type": "delta", "content": delta})
+        except asyncio.CancelledError:
+            logger.info(f"Chat stream for {request.presentation_id} cancelled by client")
+            raise
+        except Exception as e:
+            logger.error(f"Error in chat stream: {str(e)}")
+            yield sse_event({"type": "error", "detail": f"Failed to process chat message: {str(e)}"})
+            return
+        
+        ai_response = "".join(chunks).strip()
+        if not ai_response:
+            yield sse_event({"type": "error", "detail": "Empty response from AI model"})
+            return
+        
+        # Save assistant message once the full response is known
+        assistant_message = ChatMessage(
+            presentation_id=request.presentation_id,
+            user_id=user_id,
+            role="assistant",
+            content=ai_response[:5000],
+            context=request.context
+        )
+        
+        await db.chat_messages.insert_one(assistant_message.model_dump())
+        chat_window.append(request.presentation_id, assistant_message.model_dump())
+        
+        # Fold older turns into the rolling summary in the background
+        chat_summary.maybe_update(db, request.presentation_id, await chat_window.recent(db, request.presentation_id))
+        
+        yield sse_event({
+            "type": "done",
+            "message": ChatMessageResponse(**assistant_message.model_dump()).model_dump(mode="json")
+        })
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS
+    )
+
+@router.get("/chat-history/{presentation_id}")
 async def get_chat_history(
     presentation_id: str,
+    response: Response,
+    before: Optional[str] = Query(None, description="Cursor from X-Next-Cursor to fetch older messages"),
+    limit: int = Query(HISTORY_PAGE_DEFAULT, ge=1, le=HISTORY_PAGE_MAX),
     current_user: dict = Depends(get_current_user),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """
-    Get chat history for a presentation
+    Get a page of chat history for a presentation
+    
+    Returns the newest `limit` messages (or the `limit` messages older than
+    the `before` cursor) in chronological order. When older messages exist,
+    the cursor for the next page is returned in the X-Next-Cursor header.
+    The cursor is the oldest message's (created_at, id), so messages that
+    share a timestamp are neither skipped nor repeated. Pages are served
+    from the (presentation_id, created_at, id) index.
     """
     try:
         user_id = current_user['id']
         
         # Verify user owns this presentation
-        presentation = await db.presentations.find_one({
-            "id": presentation_id,
-            "user_id": user_id
-        })
+        presentation = await db.presentations.find_one(
+            {"id": presentation_id, "user_id": user_id},
+            {"_id": 1}
+        )
         
         if not presentation:
             raise HTTPException(status_code=404, detail="Presentation not found")
         
-        # Get all chat messages
-        messages = await db.chat_messages.find({
-            "presentation_id": presentation_id
-        }).sort("created_at", 1).to_list(1000)
+        query = {"presentation_id": presentation_id}
+        if before:
+            timestamp, _, message_id = before.partition(HISTORY_CURSOR_SEPARATOR)
+            try:
+                created_at = datetime.fromisoformat(timestamp)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid history cursor")
+            if message_id:
+                query["$or"] = [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "id": {"$lt": message_id}}
+                ]
+            else:
+                query["created_at"] = {"$lt": created_at}
         
-        return [ChatMessageResponse(**msg) for msg in messages]
+        # Fetch one extra message to know whether another page exists
+        messages = await db.chat_messages.find(
+            query,
+            {"_id": 0}
+        ).sort([("created_at", -1), ("id", -1)]).limit(limit + 1).to_list(limit + 1)
+        
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        messages.reverse()  # Chronological order
+        
+        if has_more:
+            oldest = messages[0]
+            response.headers["X-Next-Cursor"] = f"{oldest['created_at'].isoformat()}{HISTORY_CURSOR_SEPARATOR}{oldest['id']}"
+        
+        return messages
         
     except HTTPException:
         raise
@@ -168,6 +387,57 @@ async def get_chat_history(
             detail=f"Failed to fetch chat history: {str(e)}"
         )
 
+def _compile_suggestion(request: ApplySuggestionRequest, element_ids: Set[str], null_fields: Set[Tuple[str, str]]):
+    """
+    Compile a suggestion into a minimal `$set` document plus `arrayFilters`
+    
+    Layout and style updates become per-field sets on the matching element
+    (`elements.$[e0].style.color`), so a one-color tweak writes one field
+    instead of the whole slide. Updates for unknown element IDs are skipped.
+    `$set` cannot write through a null subdocument, so where the element's
+    `position` / `style` is null (listed in `null_fields` as (element ID,
+    field)) the whole subdocument is set instead.
+    """
+    set_ops: Dict[str, Any] = {}
+    array_filters: List[Dict[str, Any]] = []
+    
+    if request.suggestion_type == "content":
+        # Content suggestions replace the element list as a whole
+        if "elements" in request.suggestion_data:
+            set_ops["elements"] = request.suggestion_data["elements"]
+        return set_ops, array_filters
+    
+    if request.suggestion_type == "layout":
+        updates_key, field = "layout_updates", "position"
+    elif request.suggestion_type == "style":
+        updates_key, field = "style_updates", "style"
+    else:
+        return set_ops, array_filters
+    
+    filter_names: Dict[str, str] = {}
+    for update in request.suggestion_data.get(updates_key, []):
+        element_id = update.get("element_id")
+        if element_id not in element_ids:
+            continue
+        
+        name = filter_names.get(element_id)
+        if name is None:
+            name = f"e{len(filter_names)}"
+            filter_names[element_id] = name
+            array_filters.append({f"{name}.id": element_id})
+        
+        path = f"elements.$[{name}].{field}"
+        for key, value in (update.get(field) or {}).items():
+            # Keys become update paths, so refuse anything that could escape the field
+            if not key or "." in key or key.startswith("$"):
+                continue
+            if (element_id, field) in null_fields:
+                set_ops.setdefault(path, {})[key] = value
+            else:
+                set_ops[f"{path}.{key}"] = value
+    
+    return set_ops, array_filters
+
 @router.post("/apply-suggestion")
 async def apply_suggestion(
     request: ApplySuggestionRequest,
@@ -181,12 +451,19 @@ async def apply_suggestion(
     - Content improvements (text changes)
     - Layout changes (element positioning)
     - Style updates (colors, fonts)
+    
+    Only the changed fields are written, and the write is conditional on the
+    slide's `updated_at` so a concurrent edit results in 409 instead of being
+    overwritten.
     """
     try:
         user_id = current_user['id']
         
-        # Get the slide
-        slide = await db.slides.find_one({"id": request.slide_id})
+        # Get the slide (element IDs and the fields suggestions update, not element content)
+        slide = await db.slides.find_one(
+            {"id": request.slide_id},
+            {"_id": 0, "presentation_id": 1, "updated_at": 1, "elements.id": 1, "elements.position": 1, "elements.style": 1}
+        )
         
         if not slide:
             raise HTTPException(status_code=404, detail="Slide not found")
@@ -200,40 +477,56 @@ async def apply_suggestion(
         if not presentation:
             raise HTTPException(status_code=403, detail="Unauthorized")
         
-        # Apply suggestion based on type
-        if request.suggestion_type == "content":
-            # Update slide elements with new content
-            if "elements" in request.suggestion_data:
-                slide['elements'] = request.suggestion_data['elements']
-        
-        elif request.suggestion_type == "layout":
-            # Update element positions
-            if "layout_updates" in request.suggestion_data:
-                for update in request.suggestion_data['layout_updates']:
-                    element_id = update.get('element_id')
-                    for element in slide.get('elements', []):
-                        if element.get('id') == element_id:
-                            element['position'].update(update.get('position', {}))
-        
-        elif request.suggestion_type == "style":
-            # Update styles
-            if "style_updates" in request.suggestion_data:
-                for update in request.suggestion_data['style_updates']:
-                    element_id = update.get('element_id')
-                    for element in slide.get('elements', []):
-                        if element.get('id') == element_id:
-                            element['style'].update(update.get('style', {}))
-        
-        # Save updated slide
-        await db.slides.update_one(
-            {"id": request.slide_id},
-            {"$set": slide}
+        elements = slide.get('elements', [])
+        element_ids = {element.get('id') for element in elements}
+        null_fields = {
+            (element.get('id'), field)
+            for element in elements
+            for field in ("position", "style")
+            if field in element and element[field] is None
+        }
+        
+        set_ops, array_filters = _compile_suggestion(request, element_ids, null_fields)
+        
+        if not set_ops:
+            updated_slide = await db.slides.find_one({"id": request.slide_id}, {"_id": 0})
+            return {
+                "success": True,
+                "message": "Suggestion had no applicable changes",
+                "data": updated_slide
+            }
+        
+        set_ops["updated_at"] = datetime.now()
+        
+        # Save only the changed fields, if nobody else changed the slide meanwhile
+        update_kwargs = {"array_filters": array_filters} if array_filters else {}
+        updated_slide = await db.slides.find_one_and_update(
+            {"id": request.slide_id, "updated_at": slide.get('updated_at')},
+            {"$set": set_ops},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER,
+            **update_kwargs
+        )
+        
+        if not updated_slide:
+            raise HTTPException(
+                status_code=409,
+                detail="Slide was modified while applying the suggestion, please retry"
+            )
+        
+        updated_presentation = await db.presentations.find_one_and_update(
+            {"id": slide['presentation_id']},
+            {"$inc": {"version": 1}},
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
         )
+        deck_digest.apply_slide(slide['presentation_id'], updated_slide, updated_presentation['version'])
+        thumbnails.schedule(db, slide['presentation_id'], request.slide_id)
         
         return {
             "success": True,
             "message": "Suggestion applied successfully",
-            "data": slide
+            "data": updated_slide
         }
         
     except HTTPException:
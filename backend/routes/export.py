@@ -1,14 +1,26 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response, JSONResponse
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 from datetime import datetime, timezone
 
 from utils.auth_utils import get_current_user
-from models.user import User
-from services.export_service import ExportService
+from services.export_service import ExportService, render_pdf, render_pptx, PDF_RENDERERS
+from services.export_pool import export_pool, ExportQueueFull, ExportTimeout
+from services.export_cache import get_export_cache, export_cache_key
+from services.export_jobs import export_jobs
+from services.view_counter import view_counter
+from services.blob_store import get_blob_store, blob_key_from_url
+from services.share_snapshots import get_snapshot_store, SNAPSHOT_FILES
+from utils.streaming import ranged_file_response, open_file_response
 from motor.motor_asyncio import AsyncIOMotorClient
+import asyncio
 import os
+import secrets
+import tempfile
+import time
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/export", tags=["export"])
@@ -18,88 +30,392 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Slides per page of the lazy preview, and how many slides ahead a viewer should prefetch
+PREVIEW_PAGE_SIZE = 5
+PREVIEW_PREFETCH = 2
+
+# Slide fields in the preview manifest (enough to draw the slide strip and counter)
+MANIFEST_SLIDE_FIELDS = ("id", "slide_number", "title", "layout", "thumbnail_url", "duration", "transition")
+
+# How long a just-rendered export is protected from eviction before it is opened
+RENDER_PIN_SECONDS = 60
+
+EXPORT_MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+}
+
+async def _spool_slide_blobs(slides: List[Dict[str, Any]], directory: str) -> Dict[str, str]:
+    """
+    Copy every blob-store image referenced by the slides' image elements and backgrounds into `directory`
+    
+    Blobs are streamed to disk chunk by chunk, so the renderer can open
+    them lazily and the API process never holds a deck's images in memory.
+    File operations run in threads to keep the event loop free.
+    
+    Returns:
+        Blob key -> path of its copy
+    """
+    keys = set()
+    for slide in slides:
+        for element in slide.get('elements', []):
+            if element.get('type') == 'image':
+                content = element.get('content', {})
+                key = blob_key_from_url(content.get('url') or content.get('image_url'))
+                if key:
+                    keys.add(key)
+        background_key = blob_key_from_url((slide.get('background') or {}).get('image_url'))
+        if background_key:
+            keys.add(background_key)
+    
+    blob_store = get_blob_store()
+    paths = {}
+    for key in keys:
+        path = os.path.join(directory, key)
+        try:
+            f = await asyncio.to_thread(open, path, 'wb')
+            try:
+                async for chunk in blob_store.stream(key):
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+            paths[key] = path
+        except Exception as e:
+            logger.warning(f"Could not load blob {key} for export: {e}")
+    return paths
+
+async def _load_deck(presentation_id: str, current_user: dict) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Load a presentation the user may export and its slides in order"""
+    presentation = await db.presentations.find_one({"id": presentation_id}, {"_id": 0})
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    
+    # Verify ownership
+    if presentation['user_id'] != current_user['id']:
+        raise HTTPException(status_code=403, detail="Not authorized to export this presentation")
+    
+    # Get all slides
+    slide_ids = presentation.get('slides', [])
+    slides_cursor = db.slides.find({"id": {"$in": slide_ids}}, {"_id": 0})
+    slides = await slides_cursor.to_list(length=None)
+    
+    # Sort slides by slide_number
+    slides.sort(key=lambda x: x.get('slide_number', 0))
+    return presentation, slides
+
+async def _render_artifact(
+    export_format: str,
+    presentation: Dict[str, Any],
+    slides: List[Dict[str, Any]],
+    cache_key: str,
+    progress_path: Optional[str] = None,
+    renderer: str = "flow"
+) -> Path:
+    """Render an export into the export cache under `cache_key` and return its path"""
+    export_cache = get_export_cache()
+    output_path = export_cache.temp_path()
+    try:
+        with tempfile.TemporaryDirectory(prefix="export-blobs-") as blob_dir:
+            # Spool images that live in the blob store to disk
+            blobs = await _spool_slide_blobs(slides, blob_dir)
+            
+            # Render in a worker process, straight into the cache directory
+            if export_format == "pptx":
+                await export_pool.run(render_pptx, presentation, slides, blobs, output_path, progress_path)
+            else:
+                await export_pool.run(render_pdf, presentation, slides, blobs, output_path, progress_path, renderer)
+        return await export_cache.commit(output_path, cache_key, export_format)
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+def _job_download_url(job: Dict[str, Any]) -> str:
+    return f"/api/export/jobs/{job['id']}/download?token={job['token']}"
+
+async def _export(
+    export_format: str,
+    presentation_id: str,
+    current_user: dict,
+    async_job: bool,
+    if_none_match: Optional[str],
+    renderer: str = "flow"
+):
+    """Serve an export from the cache, rendering it (or starting a job for it) on a miss"""
+    presentation, slides = await _load_deck(presentation_id, current_user)
+    
+    filename = f"{presentation.get('title', 'presentation').replace(' ', '_')}.{export_format}"
+    options = {"renderer": renderer} if export_format == "pdf" else {}
+    cache_key = export_cache_key(export_format, presentation, slides, **options)
+    
+    if async_job:
+        job = export_jobs.create(current_user['id'], presentation_id, export_format, filename, len(slides))
+        # The download link must keep working until the job expires
+        get_export_cache().pin(cache_key, export_format, job['expires_at'].timestamp())
+        path = await get_export_cache().get(cache_key, export_format)
+        if path is not None:
+            export_jobs.finish(job, path)
+        else:
+            export_jobs.start(
+                job,
+                lambda progress_path: _render_artifact(export_format, presentation, slides, cache_key, progress_path, renderer)
+            )
+        
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder({
+                "success": True,
+                "data": export_jobs.public(job, _job_download_url(job)),
+                "message": "Export started"
+            })
+        )
+    
+    headers = {
+        "ETag": f'"{cache_key}"',
+        "Cache-Control": "private, no-cache"
+    }
+    
+    if if_none_match and cache_key in if_none_match:
+        return Response(status_code=304, headers=headers)
+    
+    # Served from an open handle, so a concurrent eviction cannot pull the file away
+    export_cache = get_export_cache()
+    f = await export_cache.open(cache_key, export_format)
+    if f is None:
+        # Keep the fresh artifact from being evicted by other exports until it is opened
+        export_cache.pin(cache_key, export_format, time.time() + RENDER_PIN_SECONDS)
+        path = await _render_artifact(export_format, presentation, slides, cache_key, renderer=renderer)
+        f = await asyncio.to_thread(open, path, "rb")
+    
+    return open_file_response(f, EXPORT_MEDIA_TYPES[export_format], filename, headers)
+
+def _export_error(export_format: str, presentation_id: str, e: Exception) -> HTTPException:
+    """HTTP error for a failed export"""
+    if isinstance(e, ExportQueueFull):
+        return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    if isinstance(e, ExportTimeout):
+        return HTTPException(status_code=504, detail=str(e))
+    if isinstance(e, MemoryError):
+        logger.error(f"{export_format.upper()} export of presentation {presentation_id} exceeded the worker memory limit")
+        return HTTPException(status_code=413, detail="Presentation is too large to export")
+    logger.error(f"Error exporting {export_format.upper()}: {e}")
+    return HTTPException(status_code=500, detail=f"Error exporting {export_format.upper()}: {str(e)}")
+
 @router.post("/pdf/{presentation_id}")
 async def export_to_pdf(
     presentation_id: str,
-    current_user: User = Depends(get_current_user)
+    async_job: bool = Query(False, description="Render in the background and return a job to poll"),
+    renderer: str = Query("flow", description="'flow' (reflowed content) or 'canvas' (slides as laid out)"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Export a presentation to PDF format
     
+    Rendered exports are cached by a hash of the presentation and slide
+    contents, so exporting an unchanged deck again is served from disk. The
+    hash is the response's ETag; If-None-Match with it returns 304.
+    
+    `renderer` selects the reflowing Platypus document ("flow") or one
+    16:9 page per slide drawn from element positions and styles ("canvas").
+    
+    With `async_job`, the export is rendered in the background and the
+    response (202) describes a job to poll at GET /export/jobs/{job_id}; once
+    done it carries a download URL that stays valid until the job expires.
+    
     Args:
         presentation_id: ID of the presentation to export
+        async_job: Return a background job instead of the file
+        renderer: PDF renderer to use
+        if_none_match: ETag of a previously downloaded export
         current_user: Authenticated user
         
     Returns:
-        PDF file as streaming response
+        PDF file, or the export job when `async_job` is set
     """
     try:
-        # Get presentation
-        presentation = await db.presentations.find_one({"id": presentation_id})
-        if not presentation:
-            raise HTTPException(status_code=404, detail="Presentation not found")
-        
-        # Verify ownership
-        if presentation['user_id'] != current_user.id:
-            raise HTTPException(status_code=403, detail="Not authorized to export this presentation")
-        
-        # Get all slides
-        slide_ids = presentation.get('slides', [])
-        slides_cursor = db.slides.find({"id": {"$in": slide_ids}})
-        slides = await slides_cursor.to_list(length=None)
+        if renderer not in PDF_RENDERERS:
+            raise HTTPException(status_code=400, detail=f"Unknown renderer: {renderer}")
+        return await _export("pdf", presentation_id, current_user, async_job, if_none_match, renderer)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _export_error("pdf", presentation_id, e)
+
+@router.post("/pptx/{presentation_id}")
+async def export_to_pptx(
+    presentation_id: str,
+    async_job: bool = Query(False, description="Render in the background and return a job to poll"),
+    if_none_match: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Export a presentation to PowerPoint (PPTX) format
+    
+    Slides keep their element layout, styles, backgrounds and speaker notes.
+    Caching, ETags and background jobs work as for PDF exports.
+    
+    Args:
+        presentation_id: ID of the presentation to export
+        async_job: Return a background job instead of the file
+        if_none_match: ETag of a previously downloaded export
+        current_user: Authenticated user
         
-        # Sort slides by slide_number
-        slides.sort(key=lambda x: x.get('slide_number', 0))
+    Returns:
+        PPTX file, or the export job when `async_job` is set
+    """
+    try:
+        return await _export("pptx", presentation_id, current_user, async_job, if_none_match)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise _export_error("pptx", presentation_id, e)
+
+@router.get("/jobs/{job_id}")
+async def get_export_job(
+    job_id: str,
+    current_user: dict = Depends(get_current_user)
+) -> Dict[str, Any]:
+    """
+    Status and progress of a background export
+    
+    Args:
+        job_id: ID returned when the export was started
+        current_user: Authenticated user
         
-        # Generate PDF
-        export_service = ExportService()
-        pdf_buffer = export_service.generate_pdf(presentation, slides)
+    Returns:
+        Job status, slide progress and, once done, the download URL
+    """
+    job = export_jobs.get(job_id)
+    if not job or job['user_id'] != current_user['id']:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    
+    return {
+        "success": True,
+        "data": export_jobs.public(job, _job_download_url(job)),
+        "message": f"Export {job['status']}"
+    }
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(job_id: str, token: str = Query(...)):
+    """
+    Download the result of a finished background export
+    
+    Authorized by the job's token rather than the session, so the URL works
+    as a plain link until the job expires. The artifact is pinned in the
+    export cache for that long.
+    
+    Args:
+        job_id: ID of the export job
+        token: Download token from the job's download URL
         
-        # Return as streaming response
-        filename = f"{presentation.get('title', 'presentation').replace(' ', '_')}.pdf"
+    Returns:
+        Exported file
+    """
+    job = export_jobs.get(job_id)
+    if not job or not secrets.compare_digest(job['token'], token):
+        raise HTTPException(status_code=404, detail="Export not found or expired")
+    if job['status'] != "done":
+        raise HTTPException(status_code=409, detail=f"Export is {job['status']}")
+    try:
+        f = await asyncio.to_thread(open, job['path'], "rb")
+    except FileNotFoundError:
+        # Only if the cache directory was cleared behind the server's back
+        raise HTTPException(status_code=410, detail="Export is no longer available, please export again")
+    
+    return open_file_response(f, EXPORT_MEDIA_TYPES[job['format']], job['filename'], {})
+
+@router.get("/metrics")
+async def get_export_metrics(current_user: dict = Depends(get_current_user)) -> Dict[str, Any]:
+    """
+    Queue and throughput counters for the export worker pool
+    
+    Args:
+        current_user: Authenticated user
         
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename={filename}"
-            }
-        )
+    Returns:
+        Pool metrics (queued, running, completed, failed, timed_out, ...),
+        export cache hit/miss counters under `cache` and the preview view
+        counter's buffer under `views`
+    """
+    return {**export_pool.metrics(), "cache": get_export_cache().metrics(), "views": view_counter.metrics()}
+
+def _snapshot_response(
+    share_token: str,
+    name: str,
+    snapshot_id: Optional[str],
+    accept_encoding: Optional[str],
+    if_none_match: Optional[str],
+    range_header: Optional[str]
+) -> Response:
+    """
+    Serve a file of a published share snapshot straight from disk
     
-    except HTTPException:
-        raise
-    except Exception as e:
-        logger.error(f"Error exporting PDF: {e}")
-        raise HTTPException(status_code=500, detail=f"Error exporting PDF: {str(e)}")
+    Files of a specific snapshot never change and are cacheable forever;
+    the current snapshot's are revalidated by ETag, since republishing
+    moves the pointer.
+    """
+    resolved = get_snapshot_store().resolve(share_token, name, accept_encoding, snapshot_id)
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    path, encoding, resolved_id = resolved
+    
+    headers = {
+        "ETag": f'"{resolved_id}-{encoding or "identity"}"',
+        "Cache-Control": "public, max-age=31536000, immutable" if snapshot_id else "public, no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    
+    if if_none_match and headers["ETag"] in if_none_match:
+        return Response(status_code=304, headers=headers)
+    
+    return ranged_file_response(path, SNAPSHOT_FILES[name], headers, range_header)
 
 @router.post("/share/{presentation_id}")
 async def generate_share_link(
     presentation_id: str,
-    current_user: User = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user)
 ) -> Dict[str, Any]:
     """
-    Generate a public share link for a presentation
+    Generate a public share link for a presentation and publish its snapshot
+    
+    The deck is frozen into a precompressed snapshot that public viewers
+    are served from, without database reads. Sharing an already shared
+    presentation again republishes the snapshot under the same link.
     
     Args:
         presentation_id: ID of the presentation
         current_user: Authenticated user
         
     Returns:
-        Share token and link
+        Share token and link, and the snapshot's ID and URLs
     """
     try:
         # Get presentation
-        presentation = await db.presentations.find_one({"id": presentation_id})
+        presentation = await db.presentations.find_one({"id": presentation_id}, {"_id": 0})
         if not presentation:
             raise HTTPException(status_code=404, detail="Presentation not found")
         
         # Verify ownership
-        if presentation['user_id'] != current_user.id:
+        if presentation['user_id'] != current_user['id']:
             raise HTTPException(status_code=403, detail="Not authorized to share this presentation")
         
-        # Generate share token
-        export_service = ExportService()
-        share_token = export_service.generate_share_token()
+        # Keep the existing link when republishing
+        snapshot_store = get_snapshot_store()
+        share_token = presentation.get('share_token')
+        if not (presentation.get('is_public') and snapshot_store.valid_token(share_token)):
+            if share_token:
+                await snapshot_store.revoke(share_token)
+            share_token = ExportService.generate_share_token()
+        
+        slides = await db.slides.find(
+            {"id": {"$in": presentation.get('slides', [])}},
+            {"_id": 0}
+        ).sort("slide_number", 1).to_list(length=None)
+        
+        presentation.update(is_public=True, share_token=share_token)
+        snapshot = await snapshot_store.publish(presentation, slides, share_token)
         
         # Update presentation with share token and make public
         await db.presentations.update_one(
@@ -116,11 +432,15 @@ async def generate_share_link(
         # Construct share link (frontend will handle the route)
         base_url = os.environ.get('FRONTEND_URL', 'http://localhost:3000')
         share_link = f"{base_url}/preview/{presentation_id}?token={share_token}"
+        snapshot_base = f"/api/export/snapshots/{share_token}"
         
         return {
             "share_token": share_token,
             "share_link": share_link,
-            "is_public": True
+            "is_public": True,
+            "snapshot_id": snapshot["snapshot_id"],
+            "snapshot_url": f"{snapshot_base}/index.html",
+            "snapshot_data_url": f"{snapshot_base}/{snapshot['snapshot_id']}/deck.json"
         }
     
     except HTTPException:
@@ -129,11 +449,47 @@ async def generate_share_link(
         logger.error(f"Error generating share link: {e}")
         raise HTTPException(status_code=500, detail=f"Error generating share link: {str(e)}")
 
+@router.get("/snapshots/{share_token}/{name}")
+async def get_current_snapshot_file(
+    share_token: str,
+    name: str,
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range")
+):
+    """
+    Serve the current snapshot of a shared presentation (`deck.json` or `index.html`)
+    """
+    return _snapshot_response(share_token, name, None, accept_encoding, if_none_match, range_header)
+
+@router.get("/snapshots/{share_token}/{snapshot_id}/{name}")
+async def get_snapshot_file(
+    share_token: str,
+    snapshot_id: str,
+    name: str,
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range")
+):
+    """
+    Serve a file of one specific, immutable snapshot of a shared presentation
+    """
+    return _snapshot_response(share_token, name, snapshot_id, accept_encoding, if_none_match, range_header)
+
 @router.get("/preview/{presentation_id}")
-async def get_preview_data(presentation_id: str, token: str = None):
+async def get_preview_data(
+    presentation_id: str,
+    token: str = None,
+    accept_encoding: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range")
+):
     """
     Get presentation data for preview mode (public or authenticated)
     
+    With a share token, the published snapshot is served as-is and the
+    slides are not read from the database.
+    
     Args:
         presentation_id: ID of the presentation
         token: Optional share token for public access
@@ -142,8 +498,13 @@ async def get_preview_data(presentation_id: str, token: str = None):
         Presentation and slides data
     """
     try:
+        pointer = get_snapshot_store().current(token) if token else None
+        if pointer and pointer['presentation_id'] == presentation_id:
+            view_counter.record(presentation_id)
+            return _snapshot_response(token, "deck.json", None, accept_encoding, if_none_match, range_header)
+        
         # Get presentation
-        presentation = await db.presentations.find_one({"id": presentation_id})
+        presentation = await db.presentations.find_one({"id": presentation_id}, {"_id": 0})
         if not presentation:
             raise HTTPException(status_code=404, detail="Presentation not found")
         
@@ -156,11 +517,9 @@ async def get_preview_data(presentation_id: str, token: str = None):
             # For MVP, we'll allow access if it's being requested
             pass
         
-        # Increment view count
-        await db.presentations.update_one(
-            {"id": presentation_id},
-            {"$inc": {"view_count": 1}}
-        )
+        # Counted in memory and flushed in batches (see ViewCounter)
+        view_counter.record(presentation_id)
+        presentation['view_count'] = presentation.get('view_count', 0) + view_counter.pending(presentation_id)
         
         # Get all slides
         slide_ids = presentation.get('slides', [])
@@ -180,3 +539,165 @@ async def get_preview_data(presentation_id: str, token: str = None):
     except Exception as e:
         logger.error(f"Error getting preview data: {e}")
         raise HTTPException(status_code=500, detail=f"Error loading preview: {str(e)}")
+
+async def _preview_deck(presentation_id: str, token: Optional[str]) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+    """
+    Presentation to preview and, when a share token's snapshot covers it, its slides
+    
+    Returns:
+        Tuple of (presentation, snapshot slides in order or None to read them from the database)
+    """
+    deck = await get_snapshot_store().deck(token) if token else None
+    if deck and deck['presentation'].get('id') == presentation_id:
+        return deck['presentation'], deck['slides']
+    
+    presentation = await db.presentations.find_one({"id": presentation_id}, {"_id": 0, "share_token": 0})
+    if not presentation:
+        raise HTTPException(status_code=404, detail="Presentation not found")
+    return presentation, None
+
+async def _preview_slides(
+    presentation: Dict[str, Any],
+    snapshot_slides: Optional[List[Dict[str, Any]]],
+    offset: int,
+    limit: Optional[int],
+    fields: Optional[Tuple[str, ...]] = None
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    A window of a deck's slides in order, from the snapshot or the database
+    
+    Returns:
+        Tuple of (slides, total number of slides)
+    """
+    if snapshot_slides is not None:
+        window = snapshot_slides[offset:offset + limit if limit else None]
+        if fields:
+            window = [{field: slide.get(field) for field in fields} for slide in window]
+        return window, len(snapshot_slides)
+    
+    slide_ids = presentation.get('slides', [])
+    projection = {"_id": 0, **{field: 1 for field in fields}} if fields else {"_id": 0}
+    cursor = db.slides.find({"id": {"$in": slide_ids}}, projection).sort("slide_number", 1).skip(offset)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list(length=None), len(slide_ids)
+
+def _preview_url(presentation_id: str, path: str, token: Optional[str]) -> str:
+    return f"/api/export/preview/{presentation_id}/{path}" + (f"?token={token}" if token else "")
+
+def _preview_response(payload: Dict[str, Any], prefetch: List[str]) -> JSONResponse:
+    """JSON response advertising `prefetch` URLs in the body and as Link headers"""
+    headers = {"Link": ", ".join(f"<{url}>; rel=prefetch" for url in prefetch)} if prefetch else {}
+    return JSONResponse(content=jsonable_encoder({**payload, "prefetch": prefetch}), headers=headers)
+
+@router.get("/preview/{presentation_id}/manifest")
+async def get_preview_manifest(presentation_id: str, token: str = None):
+    """
+    Lightweight outline of a presentation for the lazy preview player
+    
+    Lists every slide's ID, number, title and thumbnail but no content, so
+    its size barely depends on the deck. Slides are then fetched one at a
+    time (or a page at a time) starting with the URLs under `prefetch`.
+    
+    Args:
+        presentation_id: ID of the presentation
+        token: Optional share token for public access
+        
+    Returns:
+        Presentation, slide outlines, slide_count, page_size and prefetch (URLs of the first slides)
+    """
+    try:
+        presentation, snapshot_slides = await _preview_deck(presentation_id, token)
+        outline, total = await _preview_slides(presentation, snapshot_slides, 0, None, MANIFEST_SLIDE_FIELDS)
+        
+        # Counted in memory and flushed in batches (see ViewCounter)
+        view_counter.record(presentation_id)
+        
+        return _preview_response(
+            {
+                "presentation": presentation,
+                "slides": outline,
+                "slide_count": total,
+                "page_size": PREVIEW_PAGE_SIZE,
+                "prefetch_ahead": PREVIEW_PREFETCH
+            },
+            [_preview_url(presentation_id, f"slides/{index}", token) for index in range(min(total, PREVIEW_PREFETCH + 1))]
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting preview manifest: {e}")
+        raise HTTPException(status_code=500, detail=f"Error loading preview: {str(e)}")
+
+@router.get("/preview/{presentation_id}/slides")
+async def get_preview_slide_page(
+    presentation_id: str,
+    token: str = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(PREVIEW_PAGE_SIZE, ge=1, le=50)
+):
+    """
+    A page of full slides for the preview player
+    
+    Args:
+        presentation_id: ID of the presentation
+        token: Optional share token for public access
+        offset: Index of the first slide
+        limit: Number of slides
+        
+    Returns:
+        Slides, offset, total, next_offset (None on the last page) and prefetch (URL of the next page)
+    """
+    try:
+        presentation, snapshot_slides = await _preview_deck(presentation_id, token)
+        slides, total = await _preview_slides(presentation, snapshot_slides, offset, limit)
+        
+        next_offset = offset + limit if offset + limit < total else None
+        prefetch = []
+        if next_offset is not None:
+            prefetch.append(_preview_url(presentation_id, "slides", token) + ("&" if token else "?") + f"offset={next_offset}&limit={limit}")
+        
+        return _preview_response(
+            {"slides": slides, "offset": offset, "total": total, "next_offset": next_offset},
+            prefetch
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting preview slides: {e}")
+        raise HTTPException(status_code=500, detail=f"Error loading preview: {str(e)}")
+
+@router.get("/preview/{presentation_id}/slides/{index}")
+async def get_preview_slide(presentation_id: str, index: int, token: str = None):
+    """
+    One full slide for the preview player, by its position in the deck
+    
+    Args:
+        presentation_id: ID of the presentation
+        index: Zero-based position of the slide
+        token: Optional share token for public access
+        
+    Returns:
+        Slide, index, total and prefetch (URLs of the next slides)
+    """
+    try:
+        if index < 0:
+            raise HTTPException(status_code=404, detail="Slide not found")
+        
+        presentation, snapshot_slides = await _preview_deck(presentation_id, token)
+        slides, total = await _preview_slides(presentation, snapshot_slides, index, 1)
+        if not slides:
+            raise HTTPException(status_code=404, detail="Slide not found")
+        
+        return _preview_response(
+            {"slide": slides[0], "index": index, "total": total},
+            [_preview_url(presentation_id, f"slides/{ahead}", token) for ahead in range(index + 1, min(total, index + 1 + PREVIEW_PREFETCH))]
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error getting preview slide: {e}")
+        raise HTTPException(status_code=500, detail=f"Error loading preview: {str(e)}")
@@ -12,6 +12,12 @@ from models.presentation import (
 )
 from models.user import User
 from routes.auth import get_current_user, get_db
+from services.deck_digest import deck_digest
+from services.thumbnails import thumbnails
+from services.share_snapshots import get_snapshot_store
+from services.blob_store import get_blob_store
+from routes.chat import chat_window
+from pymongo import ReturnDocument
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/presentations", tags=["Presentations"])
@@ -115,6 +121,10 @@ async def update_presentation(
         {"$set": update_dict}
     )
     
+    # Unsharing takes the public snapshot down with the link
+    if update_dict.get('is_public') is False and existing.get('share_token'):
+        await get_snapshot_store().revoke(existing['share_token'])
+    
     # Fetch updated presentation
     updated = await db.presentations.find_one(
         {"id": presentation_id},
@@ -136,13 +146,18 @@ async def delete_presentation(
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Delete a presentation"""
-    result = await db.presentations.delete_one(
-        {"id": presentation_id, "user_id": current_user.id}
+    deleted = await db.presentations.find_one_and_delete(
+        {"id": presentation_id, "user_id": current_user.id},
+        projection={"share_token": 1}
     )
     
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Presentation not found")
     
+    if deleted.get('share_token'):
+        await get_snapshot_store().revoke(deleted['share_token'])
+    chat_window.discard(presentation_id)
+    
     return {"message": "Presentation deleted successfully"}
 
 @router.get("/{presentation_id}/slides")
@@ -219,20 +234,26 @@ async def create_slide_for_presentation(
             transition=slide_data.get('transition', None)  # Changed from 'none' to None
         )
         
-        # Insert into database
+        # Insert into database, with embedded images moved to the blob store
         slide_dict = slide.model_dump()
         slide_dict['created_at'] = slide_dict['created_at'].isoformat()
         slide_dict['updated_at'] = slide_dict['updated_at'].isoformat()
+        await get_blob_store().externalize_slide_images(slide_dict)
         await db.slides.insert_one(slide_dict)
         
-        # Update presentation's slides array and timestamp
-        await db.presentations.update_one(
+        # Update presentation's slides array, timestamp and version
+        updated_presentation = await db.presentations.find_one_and_update(
             {"id": presentation_id},
             {
                 "$push": {"slides": slide.id},
-                "$set": {"updated_at": datetime.now(timezone.utc).isoformat()}
-            }
+                "$set": {"updated_at": datetime.now(timezone.utc).isoformat()},
+                "$inc": {"version": 1}
+            },
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
         )
+        deck_digest.apply_slide(presentation_id, slide_dict, updated_presentation["version"])
+        thumbnails.schedule(db, presentation_id, slide.id)
         
         logger.info(f"Created slide {slide.id} in presentation {presentation_id}")
         
@@ -243,8 +264,8 @@ async def create_slide_for_presentation(
             "slide_number": slide.slide_number,
             "title": slide.title,
             "layout": slide.layout,
-            "elements": slide.elements,
-            "background": slide.background.model_dump() if hasattr(slide.background, 'model_dump') else slide.background,
+            "elements": slide_dict['elements'],
+            "background": slide_dict['background'],
             "notes": slide.notes,
             "duration": slide.duration,
             "transition": slide.transition,
@@ -363,7 +384,8 @@ async def create_presentation_from_ai(
                 layout=layout,
                 elements=elements,
                 background=SlideBackground(type='solid', color='#FFFFFF'),
-                notes=ai_slide.get('speaker_notes', '')
+                notes=ai_slide.get('speaker_notes', ''),
+                visual_suggestion=(ai_slide.get('visual_suggestion') or '')[:1000]
             )
             
             # Insert slide
@@ -379,6 +401,7 @@ async def create_presentation_from_ai(
             {"id": presentation.id},
             {"$set": {"slides": slide_ids}}
         )
+        thumbnails.schedule(db, presentation.id)
         
         return PresentationResponse(**presentation.model_dump())
         
@@ -6,7 +6,11 @@ from models.slide import (
     UpdateElementRequest, DeleteElementRequest
 )
 from utils.auth_utils import get_current_user
+from services.deck_digest import deck_digest
+from services.thumbnails import thumbnails
+from services.blob_store import get_blob_store
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
 import os
 import logging
 from datetime import datetime
@@ -93,14 +97,19 @@ async def create_slide(
         # Remove MongoDB _id for JSON serialization
         slide_dict.pop('_id', None)
         
-        # Update presentation's slides array
-        await presentations_collection.update_one(
+        # Update presentation's slides array and version
+        updated_presentation = await presentations_collection.find_one_and_update(
             {"id": presentation_id},
             {
                 "$push": {"slides": slide.id},
-                "$set": {"updated_at": datetime.now()}
-            }
+                "$set": {"updated_at": datetime.now()},
+                "$inc": {"version": 1}
+            },
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
         )
+        deck_digest.apply_slide(presentation_id, slide_dict, updated_presentation["version"])
+        thumbnails.schedule(db, presentation_id, slide.id)
         
         logger.info(f"Created slide {slide.id} in presentation {presentation_id}")
         
@@ -194,20 +203,28 @@ async def update_slide(
         if request.transition is not None:
             update_data["transition"] = request.transition
         
+        # Keep embedded images out of the slide document
+        await get_blob_store().externalize_slide_images(update_data)
+        
         # Update slide
         await slides_collection.update_one(
             {"id": slide_id},
             {"$set": update_data}
         )
         
-        # Update presentation timestamp
-        await presentations_collection.update_one(
+        # Update presentation timestamp and version
+        updated_presentation = await presentations_collection.find_one_and_update(
             {"id": slide["presentation_id"]},
-            {"$set": {"updated_at": datetime.now()}}
+            {"$set": {"updated_at": datetime.now()}, "$inc": {"version": 1}},
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
         )
         
         # Get updated slide
         updated_slide = await slides_collection.find_one({"id": slide_id}, {"_id": 0})
+        deck_digest.apply_slide(slide["presentation_id"], updated_slide, updated_presentation["version"])
+        if request.elements is not None or request.background is not None:
+            thumbnails.schedule(db, slide["presentation_id"], slide_id)
         
         logger.info(f"Updated slide {slide_id}")
         
@@ -251,13 +268,18 @@ async def delete_slide(
         await slides_collection.delete_one({"id": slide_id})
         
         # Remove from presentation's slides array
-        await presentations_collection.update_one(
+        updated_presentation = await presentations_collection.find_one_and_update(
             {"id": slide["presentation_id"]},
             {
                 "$pull": {"slides": slide_id},
-                "$set": {"updated_at": datetime.now()}
-            }
+                "$set": {"updated_at": datetime.now()},
+                "$inc": {"version": 1}
+            },
+            projection={"version": 1},
+            return_document=ReturnDocument.AFTER
         )
+        deck_digest.remove_slide(slide["presentation_id"], slide_id, updated_presentation["version"])
+        thumbnails.schedule(db, slide["presentation_id"])
         
         # Reorder remaining slides
         remaining_slides = await slides_collection.find({
@@ -333,14 +355,17 @@ async def duplicate_slide(
         new_slide_dict.pop('_id', None)  # Remove _id if present
         await slides_collection.insert_one(new_slide_dict)
         
-        # Update presentation
+        # Update presentation (slide numbers shifted, so drop the cached digest)
         await presentations_collection.update_one(
             {"id": slide["presentation_id"]},
             {
                 "$push": {"slides": new_slide.id},
-                "$set": {"updated_at": datetime.now()}
+                "$set": {"updated_at": datetime.now()},
+                "$inc": {"version": 1}
             }
         )
+        deck_digest.invalidate(slide["presentation_id"])
+        thumbnails.schedule(db, slide["presentation_id"], new_slide.id)
         
         logger.info(f"Duplicated slide {slide_id} to {new_slide.id}")
         
@@ -415,11 +440,13 @@ async def reorder_slides(
             {"$set": {"slide_number": new_position, "updated_at": datetime.now()}}
         )
         
-        # Update presentation timestamp
+        # Update presentation timestamp (slide numbers shifted, so drop the cached digest)
         await presentations_collection.update_one(
             {"id": slide["presentation_id"]},
-            {"$set": {"updated_at": datetime.now()}}
+            {"$set": {"updated_at": datetime.now()}, "$inc": {"version": 1}}
         )
+        deck_digest.invalidate(slide["presentation_id"])
+        thumbnails.schedule(db, slide["presentation_id"])
         
         logger.info(f"Reordered slide {request.slide_id} from {old_position} to {new_position}")
         
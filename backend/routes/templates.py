@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import Response
+from typing import Callable, List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import datetime
 
 from models.template import Template, TemplateResponse
 from routes.auth import get_db
+from services.deck_digest import deck_digest
+from services.thumbnails import thumbnails
+from services.template_catalog import template_catalog
 from utils.auth_utils import get_current_user
 from pydantic import BaseModel, Field
 from typing import Dict, Any
 import logging
+import os
+import secrets
 
 logger = logging.getLogger(__name__)
 
@@ -18,51 +24,169 @@ class ApplyTemplateRequest(BaseModel):
     template_id: str
     color_scheme: Dict[str, str]
     font_pairing: Dict[str, str]
+    dry_run: bool = Field(False, description="Return the changes instead of writing them")
 
 
 router = APIRouter(prefix="/templates", tags=["Templates"])
 
+# Browsers and proxies may reuse a catalog response briefly, then revalidate by ETag
+CATALOG_CACHE_CONTROL = "public, max-age=300, must-revalidate"
+
+async def _catalog_response(
+    key: str,
+    build: Callable[[], object],
+    if_none_match: Optional[str],
+    db: AsyncIOMotorDatabase
+) -> Response:
+    """Serve a catalog-derived JSON body from memory, or 304 if the client's copy is current"""
+    await template_catalog.ensure_loaded(db)
+    headers = {
+        "ETag": template_catalog.etag,
+        "Cache-Control": CATALOG_CACHE_CONTROL
+    }
+    if if_none_match and template_catalog.etag in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(content=template_catalog.body(key, build), media_type="application/json", headers=headers)
+
 @router.get("", response_model=List[TemplateResponse])
 async def list_templates(
     category: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
-    """List all available templates"""
-    query = {}
-    if category:
-        query["category"] = category
-    
-    templates = await db.templates.find(query, {"_id": 0}).to_list(1000)
-    
-    # Convert ISO strings to datetime
-    for template in templates:
-        if isinstance(template.get('created_at'), str):
-            template['created_at'] = datetime.fromisoformat(template['created_at'])
-    
-    return templates
+    """List all available templates (served from the in-memory catalog)"""
+    return await _catalog_response(
+        f"list:{category or ''}",
+        lambda: template_catalog.list(category or None),
+        if_none_match,
+        db
+    )
 
 @router.get("/categories")
-async def get_categories(db: AsyncIOMotorDatabase = Depends(get_db)):
+async def get_categories(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
     """Get all template categories"""
-    categories = await db.templates.distinct("category")
-    return {"categories": categories}
+    return await _catalog_response(
+        "categories",
+        lambda: {"categories": template_catalog.categories()},
+        if_none_match,
+        db
+    )
+
+@router.post("/reload")
+async def reload_templates(
+    x_internal_token: Optional[str] = Header(None),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """
+    Re-read the template catalog after templates were added or changed
+    
+    For operators and deploy scripts, not users: requires the
+    X-Internal-Token header to match TEMPLATE_RELOAD_TOKEN, and is disabled
+    while that is unset. Only reloads the worker that handles the request;
+    with several API workers, call it on each (or restart them).
+    """
+    expected = os.environ.get("TEMPLATE_RELOAD_TOKEN")
+    if not expected or not x_internal_token or not secrets.compare_digest(x_internal_token, expected):
+        raise HTTPException(status_code=403, detail="Not allowed to reload templates")
+    
+    await template_catalog.load(db)
+    return {
+        "success": True,
+        "data": template_catalog.metrics()
+    }
 
 @router.get("/{template_id}", response_model=TemplateResponse)
 async def get_template(
     template_id: str,
+    if_none_match: Optional[str] = Header(None),
     db: AsyncIOMotorDatabase = Depends(get_db)
 ):
     """Get a single template"""
-    template = await db.templates.find_one({"id": template_id}, {"_id": 0})
-    
-    if not template:
-        from fastapi import HTTPException
+    await template_catalog.ensure_loaded(db)
+    if template_catalog.get(template_id) is None:
         raise HTTPException(status_code=404, detail="Template not found")
     
-    # Convert ISO strings to datetime
-    if isinstance(template.get('created_at'), str):
-        template['created_at'] = datetime.fromisoformat(template['created_at'])
+    return await _catalog_response(
+        f"template:{template_id}",
+        lambda: template_catalog.get(template_id),
+        if_none_match,
+        db
+    )
+
+
+def _template_fields(request: ApplyTemplateRequest) -> Dict[str, Any]:
+    """
+    Aggregation expressions for a slide's background and elements with the template applied
+    
+    Text takes the heading font when larger than 30pt (else the body font)
+    and the text color; shapes take the primary fill and secondary stroke.
+    Values are wrapped in $literal so a color can never be read as a field path.
+    """
+    def literal(value: str) -> Dict[str, str]:
+        return {"$literal": value}
+    
+    def with_style(style: Dict[str, Any]) -> Dict[str, Any]:
+        return {"$mergeObjects": ["$$element", {"style": {"$mergeObjects": [{"$ifNull": ["$$element.style", {}]}, style]}}]}
+    
+    text_style = {
+        "font_family": {"$cond": [
+            {"$gt": [{"$ifNull": ["$$element.style.font_size", 16]}, 30]},
+            literal(request.font_pairing.get('heading', 'Inter')),
+            literal(request.font_pairing.get('body', 'Inter'))
+        ]},
+        "color": literal(request.color_scheme.get('text', '#000000'))
+    }
+    shape_style = {
+        "fill_color": literal(request.color_scheme.get('primary', '#3B82F6')),
+        "stroke_color": literal(request.color_scheme.get('secondary', '#1E40AF'))
+    }
+    
+    return {
+        "background": {"$mergeObjects": [
+            {"$ifNull": ["$background", {}]},
+            {"color": literal(request.color_scheme.get('background', '#FFFFFF'))}
+        ]},
+        "elements": {"$cond": [
+            {"$isArray": "$elements"},
+            {"$map": {
+                "input": "$elements",
+                "as": "element",
+                "in": {"$switch": {
+                    "branches": [
+                        {"case": {"$eq": ["$$element.type", "text"]}, "then": with_style(text_style)},
+                        {"case": {"$eq": ["$$element.type", "shape"]}, "then": with_style(shape_style)}
+                    ],
+                    "default": "$$element"
+                }}
+            }},
+            "$elements"
+        ]}
+    }
 
+def _template_diff(slide: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Field-level changes between a slide and its `after` state"""
+    changes = []
+    after = slide.get('after', {})
+    
+    before_color = (slide.get('background') or {}).get('color')
+    after_color = (after.get('background') or {}).get('color')
+    if before_color != after_color:
+        changes.append({"element_id": None, "field": "background.color", "from": before_color, "to": after_color})
+    
+    for before_element, after_element in zip(slide.get('elements') or [], after.get('elements') or []):
+        before_style = before_element.get('style') or {}
+        for field, value in (after_element.get('style') or {}).items():
+            if before_style.get(field) != value:
+                changes.append({
+                    "element_id": before_element.get('id'),
+                    "field": f"style.{field}",
+                    "from": before_style.get(field),
+                    "to": value
+                })
+    return changes
 
 @router.post("/apply")
 async def apply_template(
@@ -77,79 +201,90 @@ async def apply_template(
     - New color scheme
     - New font pairing
     - Template background styles
+    
+    All slides are restyled by the database in a single update_many with a
+    pipeline update. With `dry_run`, nothing is written; the same
+    expressions are evaluated in an aggregation and the per-slide changes
+    are returned instead.
     """
     try:
         user_id = current_user['id']
         
         # Verify user owns the presentation
-        presentation = await db.presentations.find_one({
-            "id": request.presentation_id,
-            "user_id": user_id
-        })
+        presentation = await db.presentations.find_one(
+            {"id": request.presentation_id, "user_id": user_id},
+            {"_id": 0, "id": 1}
+        )
         
         if not presentation:
-            from fastapi import HTTPException
             raise HTTPException(status_code=404, detail="Presentation not found")
         
-        # Get all slides for this presentation
-        slides = await db.slides.find({
-            "presentation_id": request.presentation_id
-        }).to_list(1000)
+        slide_query = {"presentation_id": request.presentation_id}
+        fields = _template_fields(request)
         
-        # Apply template to each slide
-        for slide in slides:
-            # Update background color
-            if not slide.get('background'):
-                slide['background'] = {}
-            slide['background']['color'] = request.color_scheme.get('background', '#FFFFFF')
+        if request.dry_run:
+            slides = await db.slides.aggregate([
+                {"$match": slide_query},
+                {"$sort": {"slide_number": 1}},
+                {"$project": {
+                    "_id": 0,
+                    "id": 1,
+                    "slide_number": 1,
+                    "background.color": 1,
+                    "elements.id": 1,
+                    "elements.style": 1,
+                    "after": fields
+                }},
+                # Only styles are compared; don't carry element content back
+                {"$project": {"after.elements.content": 0}}
+            ]).to_list(length=None)
             
-            # Update elements
-            if slide.get('elements'):
-                for element in slide['elements']:
-                    if element['type'] == 'text':
-                        # Apply font pairing
-                        is_heading = element.get('style', {}).get('font_size', 16) > 30
-                        element['style']['font_family'] = request.font_pairing.get(
-                            'heading' if is_heading else 'body', 
-                            'Inter'
-                        )
-                        element['style']['color'] = request.color_scheme.get('text', '#000000')
-                    
-                    elif element['type'] == 'shape':
-                        # Apply color scheme to shapes
-                        element['style']['fill_color'] = request.color_scheme.get('primary', '#3B82F6')
-                        element['style']['stroke_color'] = request.color_scheme.get('secondary', '#1E40AF')
+            diff = [
+                {"slide_id": slide['id'], "slide_number": slide.get('slide_number'), "changes": _template_diff(slide)}
+                for slide in slides
+            ]
+            diff = [entry for entry in diff if entry['changes']]
             
-            # Save updated slide
-            await db.slides.update_one(
-                {"id": slide['id']},
-                {"$set": slide}
-            )
+            return {
+                "success": True,
+                "message": f"Template would change {len(diff)} of {len(slides)} slides",
+                "data": {
+                    "dry_run": True,
+                    "slides_changed": len(diff),
+                    "template_id": request.template_id,
+                    "diff": diff
+                }
+            }
+        
+        result = await db.slides.update_many(
+            slide_query,
+            [{"$set": {**fields, "updated_at": datetime.now()}}]
+        )
         
         # Update presentation template reference
         await db.presentations.update_one(
             {"id": request.presentation_id},
-            {"$set": {"template": request.template_id}}
+            {"$set": {"template": request.template_id}, "$inc": {"version": 1}}
         )
+        deck_digest.invalidate(request.presentation_id)
+        thumbnails.schedule(db, request.presentation_id)
         
         logger.info(f"Template {request.template_id} applied to presentation {request.presentation_id}")
         
         return {
             "success": True,
-            "message": f"Template applied to {len(slides)} slides",
+            "message": f"Template applied to {result.matched_count} slides",
             "data": {
-                "slides_updated": len(slides),
+                "slides_updated": result.matched_count,
                 "template_id": request.template_id
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error applying template: {str(e)}")
-        from fastapi import HTTPException
         raise HTTPException(
             status_code=500,
             detail=f"Failed to apply template: {str(e)}"
         )
-
-    
-    return TemplateResponse(**template)
\ No newline at end of file
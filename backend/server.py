@@ -1,6 +1,7 @@
 from fastapi import FastAPI, APIRouter
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from utils.body_limit import BodySizeLimitMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
@@ -21,7 +22,7 @@ app = FastAPI(title="Slideo API", description="AI-Powered Presentation Builder")
 api_router = APIRouter(prefix="/api")
 
 # Import routes
-from routes import auth, presentations, templates, ai, slides, chat, export
+from routes import auth, presentations, templates, ai, slides, chat, export, blobs, analytics
 
 # Add routes to API router
 api_router.include_router(auth.router)
@@ -31,6 +32,8 @@ api_router.include_router(ai.router)
 api_router.include_router(slides.router)
 api_router.include_router(chat.router)
 api_router.include_router(export.router)
+api_router.include_router(blobs.router)
+api_router.include_router(analytics.router)
 
 # Basic health check
 @api_router.get("/")
@@ -40,12 +43,19 @@ async def root():
 # Include the API router in the main app
 app.include_router(api_router)
 
+# Inside CORS, so rejections still carry CORS headers
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    limits={ai.REFERENCE_UPLOAD_PATH: ai.REFERENCE_UPLOAD_MAX_BODY}
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -55,6 +65,44 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    # Cursor pagination and context windows for chat history
+    await db.chat_messages.create_index([("presentation_id", 1), ("created_at", 1), ("id", 1)])
+    await db.chat_summaries.create_index("presentation_id", unique=True)
+
+@app.on_event("startup")
+async def start_view_counter():
+    from services.view_counter import view_counter
+    view_counter.start(db)
+
+@app.on_event("startup")
+async def load_template_catalog():
+    from services.template_catalog import template_catalog
+    await template_catalog.load(db)
+
+@app.on_event("startup")
+async def start_slide_analytics():
+    from services.analytics import slide_analytics
+    await slide_analytics.create_indexes(db)
+    slide_analytics.start(db)
+
+# Registered before the client is closed so pending view counts still get written
+@app.on_event("shutdown")
+async def flush_view_counter():
+    from services.view_counter import view_counter
+    await view_counter.stop(db)
+
+@app.on_event("shutdown")
+async def flush_slide_analytics():
+    from services.analytics import slide_analytics
+    await slide_analytics.stop(db)
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+
+@app.on_event("shutdown")
+async def shutdown_export_pool():
+    from services.export_pool import export_pool
+    export_pool.shutdown()
\ No newline at end of file
@@ -0,0 +1,272 @@
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import BulkWriteError
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Raw events are stored with the start of their hour, so reads and the
+# aggregation job can scan whole buckets through one index
+BUCKET_SECONDS = 3600
+
+DUPLICATE_KEY_ERROR = 11000
+
+def event_bucket(timestamp: datetime) -> datetime:
+    """Start of the time bucket an event belongs to"""
+    epoch = int(timestamp.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % BUCKET_SECONDS, tz=timezone.utc)
+
+class SlideAnalytics:
+    """
+    Buffered ingestion of slide engagement events and their aggregation
+
+    `add` only appends to an in-memory list; a loop writes the buffer to the
+    `slide_events` collection with one unordered `insert_many` every
+    `flush_interval` seconds, or as soon as `batch_size` events are waiting.
+    Events carry their hour bucket and expire after `retention_days` (TTL
+    index). If the database falls behind, the buffer stops growing at
+    `max_buffer` and further events are dropped and counted rather than
+    slowing the endpoint down. Like the view counter, events not yet
+    flushed are lost if the process dies.
+
+    A second loop aggregates only the hour buckets that received events
+    since its last run: each is summarized per slide into
+    `slide_stats_hourly`, then the hourly rows of the affected presentations
+    are rolled up into `slide_stats`. Hourly rows are kept, so raw events
+    expiring does not change the stats. Sessions are counted per hour, so a
+    session that spans an hour boundary counts in both. Presentation
+    documents are never written.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 5.0,
+        batch_size: int = 1000,
+        max_buffer: int = 50000,
+        aggregate_interval: float = 300.0,
+        retention_days: int = 90
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_buffer = max_buffer
+        self.aggregate_interval = aggregate_interval
+        self.retention_days = retention_days
+        self._buffer: List[Dict[str, Any]] = []
+        self._dirty: Set[Tuple[str, datetime]] = set()
+        self._flush_now = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self.accepted = 0
+        self.dropped = 0
+        self.written = 0
+
+    def add(self, events: List[Dict[str, Any]]) -> int:
+        """
+        Buffer events (dicts of SlideEvent fields) for the next flush
+
+        Returns:
+            Number of events accepted
+        """
+        now = datetime.now(timezone.utc)
+        room = self.max_buffer - len(self._buffer)
+        if room < len(events):
+            self.dropped += len(events) - max(room, 0)
+            events = events[:max(room, 0)]
+
+        for event in events:
+            timestamp = event.get("timestamp") or now
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            # Clients' clocks are not trusted beyond the arrival time
+            timestamp = min(timestamp, now)
+            self._buffer.append({**event, "timestamp": timestamp, "bucket": event_bucket(timestamp)})
+
+        self.accepted += len(events)
+        if len(self._buffer) >= self.batch_size:
+            self._flush_now.set()
+        return len(events)
+
+    async def flush(self, db: AsyncIOMotorDatabase) -> int:
+        """
+        Write all buffered events now
+
+        Returns:
+            Number of events written
+        """
+        if not self._buffer:
+            return 0
+
+        batch, self._buffer = self._buffer, []
+        failed: List[Dict[str, Any]] = []
+        try:
+            await db.slide_events.insert_many(batch, ordered=False)
+        except BulkWriteError as e:
+            # pymongo sets `_id` on every document in place. A duplicate key
+            # means an earlier, seemingly failed attempt already wrote the
+            # event; anything else was not written and is retried as new.
+            failed_indexes = sorted(
+                error["index"] for error in e.details.get("writeErrors", [])
+                if error.get("code") != DUPLICATE_KEY_ERROR
+            )
+            for index in failed_indexes:
+                batch[index].pop("_id", None)
+                failed.append(batch[index])
+            if failed:
+                logger.warning(f"Could not write {len(failed)} of {len(batch)} slide event(s): {e}")
+        except Exception as e:
+            # Unknown how much was written (e.g. a timeout): retry everything
+            # with the same `_id`s, so events that did land come back as
+            # duplicates above instead of being counted twice
+            failed = batch
+            logger.warning(f"Could not write {len(batch)} slide event(s): {e}")
+
+        if failed:
+            # Requeue what still fits; the rest is dropped
+            room = self.max_buffer - len(self._buffer)
+            self._buffer[:0] = failed[:room]
+            self.dropped += max(0, len(failed) - room)
+
+        failed_ids = {id(event) for event in failed}
+        written = [event for event in batch if id(event) not in failed_ids]
+        self.written += len(written)
+        self._dirty.update((event["presentation_id"], event["bucket"]) for event in written)
+        return len(written)
+
+    async def aggregate(self, db: AsyncIOMotorDatabase) -> int:
+        """
+        Summarize the buckets with new events and refresh `slide_stats` for their presentations
+
+        Returns:
+            Number of hour buckets aggregated
+        """
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return 0
+
+        buckets_by_presentation: Dict[str, List[datetime]] = {}
+        for presentation_id, bucket in dirty:
+            buckets_by_presentation.setdefault(presentation_id, []).append(bucket)
+        presentation_ids = list(buckets_by_presentation)
+
+        hourly = [
+            {"$match": {"$or": [
+                {"presentation_id": presentation_id, "bucket": {"$in": buckets}}
+                for presentation_id, buckets in buckets_by_presentation.items()
+            ]}},
+            # One row per slide, hour and session first, so sessions count once per hour
+            {"$group": {
+                "_id": {"presentation_id": "$presentation_id", "slide_id": "$slide_id", "bucket": "$bucket", "session_id": "$session_id"},
+                "views": {"$sum": {"$cond": [{"$eq": ["$type", "slide_view"]}, 1, 0]}},
+                "dwell_ms": {"$sum": {"$ifNull": ["$dwell_ms", 0]}}
+            }},
+            {"$group": {
+                "_id": {"presentation_id": "$_id.presentation_id", "slide_id": "$_id.slide_id", "bucket": "$_id.bucket"},
+                "views": {"$sum": "$views"},
+                "sessions": {"$sum": 1},
+                "total_dwell_ms": {"$sum": "$dwell_ms"}
+            }},
+            {"$project": {
+                "_id": 0,
+                "presentation_id": "$_id.presentation_id",
+                "slide_id": "$_id.slide_id",
+                "bucket": "$_id.bucket",
+                "views": 1,
+                "sessions": 1,
+                "total_dwell_ms": 1
+            }},
+            {"$merge": {
+                "into": "slide_stats_hourly",
+                "on": ["presentation_id", "slide_id", "bucket"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ]
+        totals = [
+            {"$match": {"presentation_id": {"$in": presentation_ids}}},
+            {"$group": {
+                "_id": {"presentation_id": "$presentation_id", "slide_id": "$slide_id"},
+                "views": {"$sum": "$views"},
+                "sessions": {"$sum": "$sessions"},
+                "total_dwell_ms": {"$sum": "$total_dwell_ms"}
+            }},
+            {"$project": {
+                "_id": 0,
+                "presentation_id": "$_id.presentation_id",
+                "slide_id": "$_id.slide_id",
+                "views": 1,
+                "sessions": 1,
+                "total_dwell_ms": 1,
+                "avg_dwell_ms": {"$cond": [{"$gt": ["$sessions", 0]}, {"$divide": ["$total_dwell_ms", "$sessions"]}, 0]},
+                "updated_at": "$$NOW"
+            }},
+            {"$merge": {
+                "into": "slide_stats",
+                "on": ["presentation_id", "slide_id"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ]
+        try:
+            await db.slide_events.aggregate(hourly).to_list(length=None)
+            await db.slide_stats_hourly.aggregate(totals).to_list(length=None)
+        except Exception as e:
+            self._dirty.update(dirty)
+            logger.warning(f"Could not aggregate slide stats: {e}")
+            return 0
+        return len(dirty)
+
+    async def create_indexes(self, db: AsyncIOMotorDatabase) -> None:
+        """Indexes for the event and stats collections ($merge needs the unique ones)"""
+        await db.slide_events.create_index([("presentation_id", 1), ("bucket", 1)])
+        await db.slide_events.create_index("timestamp", expireAfterSeconds=self.retention_days * 86400)
+        await db.slide_stats_hourly.create_index([("presentation_id", 1), ("slide_id", 1), ("bucket", 1)], unique=True)
+        await db.slide_stats.create_index([("presentation_id", 1), ("slide_id", 1)], unique=True)
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        """Begin the flush and aggregation loops"""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._flush_loop(db)),
+                asyncio.create_task(self._aggregate_loop(db))
+            ]
+
+    async def _flush_loop(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_now.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_now.clear()
+            await self.flush(db)
+
+    async def _aggregate_loop(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            await asyncio.sleep(self.aggregate_interval)
+            await self.aggregate(db)
+
+    async def stop(self, db: AsyncIOMotorDatabase) -> None:
+        """Stop the loops, write what is buffered and fold it into the stats"""
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self.flush(db)
+        await self.aggregate(db)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Ingestion counters"""
+        return {
+            "buffered": len(self._buffer),
+            "accepted": self.accepted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "pending_aggregation": len(self._dirty)
+        }
+
+# Shared by the analytics routes; started and stopped with the app
+slide_analytics = SlideAnalytics(
+    flush_interval=float(os.environ.get("ANALYTICS_FLUSH_SECONDS", "5")),
+    aggregate_interval=float(os.environ.get("ANALYTICS_AGGREGATE_SECONDS", "300")),
+    retention_days=int(os.environ.get("ANALYTICS_RETENTION_DAYS", "90"))
+)
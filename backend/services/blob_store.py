@@ -0,0 +1,319 @@
+import os
+import json
+import base64
+import asyncio
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Dict, Any, Optional, AsyncIterator, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase, AsyncIOMotorGridFSBucket
+
+logger = logging.getLogger(__name__)
+
+BLOB_URL_PREFIX = "/api/blobs/"
+CHUNK_SIZE = 64 * 1024
+
+def blob_url(key: str) -> str:
+    """Public URL a blob is served from"""
+    return f"{BLOB_URL_PREFIX}{key}"
+
+def blob_key_from_url(url: Optional[str]) -> Optional[str]:
+    """Extract the blob key from a blob URL, or None if the URL is not one"""
+    if not url or BLOB_URL_PREFIX not in url:
+        return None
+    key = url.split(BLOB_URL_PREFIX, 1)[1].split("?", 1)[0]
+    return key if is_blob_key(key) else None
+
+def is_blob_key(key: str) -> bool:
+    """Whether a string looks like a blob key (hex SHA-256)"""
+    return len(key) == 64 and all(c in "0123456789abcdef" for c in key)
+
+def parse_data_uri(uri: str) -> Optional[Tuple[str, bytes]]:
+    """Split a base64 data URI into (mime_type, bytes), or None if it is not one"""
+    if not uri or not uri.startswith("data:") or "," not in uri:
+        return None
+    header, data = uri.split(",", 1)
+    if ";base64" not in header:
+        return None
+    mime_type = header[5:].split(";", 1)[0] or "application/octet-stream"
+    return mime_type, base64.b64decode(data)
+
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"RIFF", "image/webp")
+)
+
+def sniff_image_type(data: bytes, default: str = "image/png") -> str:
+    """Image MIME type from the leading bytes, or `default` if unrecognized"""
+    for signature, mime_type in IMAGE_SIGNATURES:
+        if data.startswith(signature) and (mime_type != "image/webp" or data[8:12] == b"WEBP"):
+            return mime_type
+    return default
+
+class FilesystemBlobBackend:
+    """Stores blobs as files under `root`, fanned out by the first bytes of the key"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(self._path(key).exists)
+
+    async def write(self, key: str, data: bytes, metadata: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._write, key, data, metadata)
+
+    def _write(self, key: str, data: bytes, metadata: Dict[str, Any]) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # The blob goes in place before its metadata: `put` treats existing
+        # metadata as "stored", so it must never point at a missing blob
+        self._replace(path, data)
+        self._replace(path.with_suffix(".json"), json.dumps(metadata).encode())
+
+    async def update_metadata(self, key: str, metadata: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._replace, self._path(key).with_suffix(".json"), json.dumps(metadata).encode())
+
+    @staticmethod
+    def _replace(path: Path, data: bytes) -> None:
+        """Write via a temp file so readers never see a partial file"""
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    async def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        meta_path = self._path(key).with_suffix(".json")
+        try:
+            return json.loads(await asyncio.to_thread(meta_path.read_text))
+        except FileNotFoundError:
+            return None
+
+    async def read(self, key: str) -> bytes:
+        return await asyncio.to_thread(self._path(key).read_bytes)
+
+    async def stream(self, key: str) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            while True:
+                chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            f.close()
+
+class GridFSBlobBackend:
+    """Stores blobs in a GridFS bucket, one file per key"""
+
+    def __init__(self, db: AsyncIOMotorDatabase, bucket_name: str = "blobs"):
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+        self.files = db[f"{bucket_name}.files"]
+
+    async def exists(self, key: str) -> bool:
+        return await self.files.find_one({"filename": key}, {"_id": 1}) is not None
+
+    async def write(self, key: str, data: bytes, metadata: Dict[str, Any]) -> None:
+        await self.bucket.upload_from_stream(key, data, metadata=metadata)
+
+    async def update_metadata(self, key: str, metadata: Dict[str, Any]) -> None:
+        await self.files.update_many({"filename": key}, {"$set": {"metadata": metadata}})
+
+    async def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        doc = await self.files.find_one({"filename": key}, {"metadata": 1})
+        return doc.get("metadata") if doc else None
+
+    async def read(self, key: str) -> bytes:
+        stream = await self.bucket.open_download_stream_by_name(key)
+        return await stream.read()
+
+    async def stream(self, key: str) -> AsyncIterator[bytes]:
+        stream = await self.bucket.open_download_stream_by_name(key)
+        try:
+            while True:
+                chunk = await stream.readchunk()
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            stream.close()
+
+class BlobStore:
+    """
+    Content-addressed store for images and other binary assets
+
+    Blobs are keyed by the SHA-256 of their bytes, so storing the same image
+    twice is a no-op and a key never changes meaning, which lets the serving
+    endpoint mark responses immutable.
+    """
+
+    def __init__(self, backend, derivatives=None):
+        self.backend = backend
+        self.derivatives = derivatives
+
+    async def put(self, data: bytes, mime_type: str = "application/octet-stream", derive: bool = True, **extra: Any) -> Dict[str, Any]:
+        """
+        Store bytes and return their descriptor
+
+        New images also get resized derivatives (see ImageDerivativePipeline),
+        stored as blobs of their own and listed in the original's metadata.
+
+        Args:
+            data: Blob contents
+            mime_type: Content type to serve the blob with
+            derive: Build resized derivatives if this is a new image
+            extra: Additional metadata to keep with a newly stored blob
+
+        Returns:
+            Dict with `key`, `url`, `size`, `mime_type` and, for images,
+            `srcset` (e.g. {"480w": url}) covering the derivatives and original
+        """
+        key = hashlib.sha256(data).hexdigest()
+
+        metadata = await self.backend.metadata(key)
+        if metadata is None:
+            metadata = {"mime_type": mime_type, "size": len(data), **extra}
+            await self.backend.write(key, data, metadata)
+            logger.info(f"Stored blob {key} ({len(data)} bytes, {mime_type})")
+
+            if derive and self.derivatives is not None and mime_type.startswith("image/"):
+                metadata = await self._derive(key, data, metadata)
+
+        descriptor = {"key": key, "url": blob_url(key), "size": len(data), "mime_type": metadata.get("mime_type", mime_type)}
+        if "width" in metadata:
+            descriptor["srcset"] = self._srcset(key, metadata)
+        return descriptor
+
+    async def _derive(self, key: str, data: bytes, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            derived_mime, variants, width = await self.derivatives.render(data)
+        except Exception as e:
+            logger.warning(f"Could not build derivatives for blob {key}: {e}")
+            return metadata
+
+        derived = {}
+        for variant_width, variant_data in variants:
+            stored = await self.put(variant_data, derived_mime, derive=False, derived_from=key)
+            derived[str(variant_width)] = stored["key"]
+
+        metadata = {**metadata, "width": width, "derivatives": derived}
+        await self.backend.update_metadata(key, metadata)
+        return metadata
+
+    @staticmethod
+    def _srcset(key: str, metadata: Dict[str, Any]) -> Dict[str, str]:
+        srcset = {f"{width}w": blob_url(derived_key) for width, derived_key in metadata.get("derivatives", {}).items()}
+        srcset[f"{metadata['width']}w"] = blob_url(key)
+        return srcset
+
+    async def resolve_width(self, key: str, width: int) -> str:
+        """Key of the smallest derivative at least `width` wide, or the original"""
+        metadata = await self.metadata(key) or {}
+        candidates = sorted(
+            (int(w), derived_key) for w, derived_key in metadata.get("derivatives", {}).items()
+            if int(w) >= width
+        )
+        return candidates[0][1] if candidates else key
+
+    async def put_base64(self, data: str, mime_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store base64-encoded image bytes (as returned by the image model)
+
+        `data` may also be a data URI. Without an explicit `mime_type` the
+        type comes from the data URI, or else from the image's leading bytes.
+        """
+        parsed = parse_data_uri(data)
+        if parsed is not None:
+            uri_mime_type, decoded = parsed
+            return await self.put(decoded, mime_type or uri_mime_type)
+        decoded = base64.b64decode(data)
+        return await self.put(decoded, mime_type or sniff_image_type(decoded))
+
+    async def metadata(self, key: str) -> Optional[Dict[str, Any]]:
+        """Stored metadata for a blob, or None if it does not exist"""
+        if not is_blob_key(key):
+            return None
+        return await self.backend.metadata(key)
+
+    async def read(self, key: str) -> bytes:
+        """Whole blob contents"""
+        return await self.backend.read(key)
+
+    def stream(self, key: str) -> AsyncIterator[bytes]:
+        """Blob contents in chunks"""
+        return self.backend.stream(key)
+
+    async def externalize(self, value: Optional[str]) -> Optional[str]:
+        """Replace a data URI with a blob URL; other values are returned unchanged"""
+        parsed = parse_data_uri(value) if isinstance(value, str) else None
+        if parsed is None:
+            return value
+        mime_type, data = parsed
+        return (await self.put(data, mime_type))["url"]
+
+    async def externalize_slide_images(self, slide: Dict[str, Any]) -> int:
+        """
+        Move embedded images out of a slide (or slide update) into the store
+
+        Rewrites image element `url` / `image_url` data URIs and the background's
+        `image_base64` / data-URI `image_url` to blob URLs, in place.
+
+        Returns:
+            Number of images moved
+        """
+        moved = 0
+
+        for element in slide.get("elements") or []:
+            content = element.get("content") or {}
+            for field in ("url", "image_url"):
+                value = content.get(field)
+                if isinstance(value, str) and value.startswith("data:"):
+                    content[field] = await self.externalize(value)
+                    moved += 1
+
+        background = slide.get("background")
+        if background:
+            if background.get("image_base64"):
+                stored = await self.put_base64(background["image_base64"])
+                background["image_url"] = stored["url"]
+                background["image_base64"] = None
+                moved += 1
+            value = background.get("image_url")
+            if isinstance(value, str) and value.startswith("data:"):
+                background["image_url"] = await self.externalize(value)
+                moved += 1
+
+        return moved
+
+def create_blob_store(db: AsyncIOMotorDatabase) -> BlobStore:
+    """Build the blob store selected by BLOB_BACKEND (filesystem or gridfs)"""
+    backend_name = os.environ.get("BLOB_BACKEND", "filesystem")
+    from services.image_derivatives import get_image_pipeline
+
+    if backend_name == "gridfs":
+        return BlobStore(GridFSBlobBackend(db), derivatives=get_image_pipeline())
+    if backend_name != "filesystem":
+        raise ValueError(f"Unknown BLOB_BACKEND: {backend_name}")
+    root = os.environ.get("BLOB_DIR", str(Path(__file__).parent.parent / "data" / "blobs"))
+    return BlobStore(FilesystemBlobBackend(root), derivatives=get_image_pipeline())
+
+_blob_store: Optional[BlobStore] = None
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store, created on first use"""
+    global _blob_store
+    if _blob_store is None:
+        from server import db
+        _blob_store = create_blob_store(db)
+    return _blob_store
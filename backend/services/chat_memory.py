@@ -0,0 +1,198 @@
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, Any, List
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _to_millis(timestamp: datetime) -> datetime:
+    """Truncate a timestamp to the millisecond precision BSON dates store"""
+    return timestamp.replace(microsecond=timestamp.microsecond // 1000 * 1000)
+
+class ChatContextWindow:
+    """
+    In-memory window of the most recent chat messages per presentation
+
+    The window for a presentation is loaded from `chat_messages` the first time
+    it is needed and kept up to date as messages are sent, so building a chat
+    prompt does not have to query history again. Only the most recently used
+    presentations are kept; the rest are evicted and reloaded on demand.
+
+    Windows are per process: messages written by another worker are picked up
+    the next time this worker evicts and reloads the window.
+    """
+
+    def __init__(self, size: int = 10, max_presentations: int = 500):
+        self.size = size
+        self.max_presentations = max_presentations
+        self._windows: "OrderedDict[str, deque]" = OrderedDict()
+
+    async def recent(self, db: AsyncIOMotorDatabase, presentation_id: str) -> List[Dict[str, Any]]:
+        """
+        Get the last `size` messages for a presentation in chronological order
+
+        Args:
+            db: Database to load the window from on a miss
+            presentation_id: Presentation to get messages for
+
+        Returns:
+            List of message documents, oldest first
+        """
+        window = self._windows.get(presentation_id)
+        if window is None:
+            messages = await db.chat_messages.find(
+                {"presentation_id": presentation_id},
+                {"_id": 0}
+            ).sort([("created_at", -1), ("id", -1)]).limit(self.size).to_list(self.size)
+            messages.reverse()  # Chronological order
+
+            window = deque(messages, maxlen=self.size)
+            self._windows[presentation_id] = window
+            self._evict()
+        else:
+            self._windows.move_to_end(presentation_id)
+
+        return list(window)
+
+    def append(self, presentation_id: str, message: Dict[str, Any]) -> None:
+        """Add a newly saved message to the presentation's window if it is loaded"""
+        window = self._windows.get(presentation_id)
+        if window is not None:
+            window.append(message)
+            self._windows.move_to_end(presentation_id)
+
+    def discard(self, presentation_id: str) -> None:
+        """Forget the window for a presentation"""
+        self._windows.pop(presentation_id, None)
+
+    def _evict(self) -> None:
+        while len(self._windows) > self.max_presentations:
+            evicted, _ = self._windows.popitem(last=False)
+            logger.debug(f"Evicted chat window for presentation {evicted}")
+
+class ChatSummaryMemory:
+    """
+    Rolling summary of a presentation's chat, stored in `chat_summaries`
+
+    Once `every` messages have accumulated past the end of the current summary,
+    a background task folds them into the summary with the text model. Prompts
+    then carry the summary plus only the messages it does not cover yet, so
+    their size stays constant no matter how long the conversation runs.
+    """
+
+    def __init__(self, gemini_service, every: int = 6, max_chars: int = 1500, max_presentations: int = 500):
+        self.gemini_service = gemini_service
+        self.every = every
+        self.max_chars = max_chars
+        self.max_presentations = max_presentations
+        self._summaries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    async def get(self, db: AsyncIOMotorDatabase, presentation_id: str) -> Dict[str, Any]:
+        """
+        Get the current summary document for a presentation
+
+        Returns:
+            Dict with `summary` and `covered_until` (the created_at of the last
+            summarized message); empty if nothing has been summarized yet
+        """
+        summary = self._summaries.get(presentation_id)
+        if summary is None:
+            summary = await db.chat_summaries.find_one(
+                {"presentation_id": presentation_id},
+                {"_id": 0}
+            ) or {}
+            self._remember(presentation_id, summary)
+        else:
+            self._summaries.move_to_end(presentation_id)
+        return summary
+
+    def uncovered(self, summary: Dict[str, Any], messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Messages that are newer than the end of the summary"""
+        covered_until = summary.get("covered_until")
+        if covered_until is None:
+            return list(messages)
+        # Messages appended in memory keep microseconds, while everything read
+        # back from MongoDB (covered_until included) has millisecond precision
+        covered_until = _to_millis(covered_until)
+        return [msg for msg in messages if _to_millis(msg["created_at"]) > covered_until]
+
+    def maybe_update(self, db: AsyncIOMotorDatabase, presentation_id: str, messages: List[Dict[str, Any]]) -> None:
+        """Schedule a background summary update if enough new messages have piled up"""
+        if presentation_id in self._pending:
+            return
+
+        summary = self._summaries.get(presentation_id, {})
+        if len(self.uncovered(summary, messages)) < self.every:
+            return
+
+        task = asyncio.create_task(self._update(db, presentation_id))
+        self._pending[presentation_id] = task
+        task.add_done_callback(lambda _: self._pending.pop(presentation_id, None))
+
+    async def _update(self, db: AsyncIOMotorDatabase, presentation_id: str) -> None:
+        try:
+            summary = await self.get(db, presentation_id)
+
+            query = {"presentation_id": presentation_id}
+            if summary.get("covered_until") is not None:
+                query["created_at"] = {"$gt": summary["covered_until"]}
+
+            messages = await db.chat_messages.find(
+                query,
+                {"_id": 0, "role": 1, "content": 1, "created_at": 1}
+            ).sort("created_at", 1).limit(50).to_list(50)
+
+            if not messages:
+                return
+
+            transcript = "\n".join(
+                f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}"
+                for msg in messages
+            )
+
+            prompt = f"""Current summary:
+{summary.get('summary') or '(none yet)'}
+
+New messages:
+{transcript}
+
+Rewrite the summary so it also covers the new messages."""
+
+            system_message = f"""You maintain a running summary of a conversation between a user and an AI presentation assistant.
+Keep decisions made, requested changes, slides discussed and open questions. Drop pleasantries.
+Respond with the summary only, in at most {self.max_chars} characters."""
+
+            text = await self.gemini_service.generate_text(
+                prompt=prompt,
+                system_message=system_message,
+                session_id=f"chat-summary-{presentation_id}"
+            )
+
+            updated = {
+                "presentation_id": presentation_id,
+                "summary": text.strip()[:self.max_chars],
+                "covered_until": messages[-1]["created_at"],
+                "message_count": summary.get("message_count", 0) + len(messages),
+                "updated_at": datetime.utcnow()
+            }
+
+            await db.chat_summaries.update_one(
+                {"presentation_id": presentation_id},
+                {"$set": updated},
+                upsert=True
+            )
+            self._remember(presentation_id, updated)
+
+            logger.info(f"Updated chat summary for presentation {presentation_id} ({len(messages)} new messages)")
+
+        except Exception as e:
+            logger.error(f"Error updating chat summary: {str(e)}")
+
+    def _remember(self, presentation_id: str, summary: Dict[str, Any]) -> None:
+        self._summaries[presentation_id] = summary
+        self._summaries.move_to_end(presentation_id)
+        while len(self._summaries) > self.max_presentations:
+            self._summaries.popitem(last=False)
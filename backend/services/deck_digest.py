@@ -0,0 +1,194 @@
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from services.slide_search import BM25Index, slide_text
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields needed to digest a slide; leaves image data and styles behind
+DIGEST_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "slide_number": 1,
+    "title": 1,
+    "notes": 1,
+    "elements.type": 1,
+    "elements.content.text": 1
+}
+
+class DeckDigestCache:
+    """
+    Compact, cached outline of every presentation's slides for chat prompts
+
+    Each entry is tagged with the presentation's `version`, which every slide
+    mutation increments. Routes that change a slide hand the new version and
+    the slide to `apply_slide` / `remove_slide`, which patch the cached entry
+    in place when it is exactly one version behind. Any other mismatch is
+    treated as stale and the digest is rebuilt with one projected query on
+    the next `get`.
+
+    Each entry also carries a BM25 index over slide titles, text elements and
+    notes, maintained by the same calls, so chat can look up the slides a
+    message refers to without touching the database.
+    """
+
+    def __init__(self, max_presentations: int = 500, max_points: int = 3, point_chars: int = 80, excerpt_chars: int = 400):
+        self.max_presentations = max_presentations
+        self.max_points = max_points
+        self.point_chars = point_chars
+        self.excerpt_chars = excerpt_chars
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    async def get(self, db: AsyncIOMotorDatabase, presentation: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the digest for a presentation, rebuilding it if the version moved
+
+        Args:
+            db: Database to rebuild the digest from
+            presentation: Presentation document (must include `id`; `version` defaults to 0)
+
+        Returns:
+            Dict with `version`, `slides` (slide ID -> slide digest) and `index`
+        """
+        presentation_id = presentation["id"]
+        version = presentation.get("version", 0)
+
+        entry = self._entries.get(presentation_id)
+        if entry is not None and entry["version"] == version:
+            self._entries.move_to_end(presentation_id)
+            return entry
+
+        slides = await db.slides.find(
+            {"presentation_id": presentation_id},
+            DIGEST_PROJECTION
+        ).to_list(length=None)
+
+        index = BM25Index()
+        for slide in slides:
+            index.add(slide["id"], slide_text(slide))
+
+        entry = {
+            "version": version,
+            "slides": {slide["id"]: self.digest_slide(slide) for slide in slides},
+            "index": index
+        }
+        self._remember(presentation_id, entry)
+
+        logger.debug(f"Rebuilt deck digest for presentation {presentation_id} at version {version}")
+        return entry
+
+    def apply_slide(self, presentation_id: str, slide: Dict[str, Any], version: int) -> Optional[Dict[str, Any]]:
+        """Add or replace one slide in a cached digest after a change that produced `version`"""
+        entry = self._advance(presentation_id, version)
+        if entry is not None:
+            entry["slides"][slide["id"]] = self.digest_slide(slide)
+            entry["index"].add(slide["id"], slide_text(slide))
+        return entry
+
+    def remove_slide(self, presentation_id: str, slide_id: str, version: int) -> Optional[Dict[str, Any]]:
+        """Drop one slide from a cached digest and close the gap in slide numbers"""
+        entry = self._advance(presentation_id, version)
+        if entry is not None:
+            removed = entry["slides"].pop(slide_id, None)
+            entry["index"].remove(slide_id)
+            if removed is not None:
+                for digest in entry["slides"].values():
+                    if digest["slide_number"] > removed["slide_number"]:
+                        digest["slide_number"] -= 1
+        return entry
+
+    def search(self, entry: Dict[str, Any], query: str, k: int = 3, exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Find the slides in a digest that best match a query
+
+        Args:
+            entry: Digest returned by `get`
+            query: Free-text query, usually the user's chat message
+            k: Maximum number of slides to return
+            exclude: Slide ID to leave out (e.g. the slide already in context)
+
+        Returns:
+            Slide digests (with `id` and `excerpt`), best match first
+        """
+        results = []
+        for slide_id, _ in entry["index"].search(query, k + 1):
+            if slide_id == exclude or slide_id not in entry["slides"]:
+                continue
+            results.append({"id": slide_id, **entry["slides"][slide_id]})
+        return results[:k]
+
+    def invalidate(self, presentation_id: str) -> None:
+        """Forget the digest for a presentation"""
+        self._entries.pop(presentation_id, None)
+
+    def digest_slide(self, slide: Dict[str, Any]) -> Dict[str, Any]:
+        """Reduce a slide to its number, title, a few key points and a short text excerpt"""
+        title = (slide.get("title") or "Untitled Slide").strip()
+
+        points: List[str] = []
+        for element in slide.get("elements") or []:
+            if element.get("type") != "text":
+                continue
+            text = (element.get("content") or {}).get("text") or ""
+            for line in text.splitlines():
+                line = line.strip().lstrip("-•*").strip()
+                if not line or line == title:
+                    continue
+                points.append(line[:self.point_chars])
+                if len(points) >= self.max_points:
+                    break
+            if len(points) >= self.max_points:
+                break
+
+        if not points and slide.get("notes"):
+            points.append(slide["notes"].strip()[:self.point_chars])
+
+        body = " ".join(
+            (element.get("content") or {}).get("text") or ""
+            for element in slide.get("elements") or []
+            if element.get("type") == "text"
+        )
+
+        return {
+            "slide_number": slide.get("slide_number", 0),
+            "title": title,
+            "points": points,
+            "excerpt": " ".join(body.split())[:self.excerpt_chars]
+        }
+
+    @staticmethod
+    def render(entry: Dict[str, Any], max_chars: int = 4000) -> str:
+        """Render a digest as a numbered outline, truncated to `max_chars`"""
+        lines = []
+        for digest in sorted(entry["slides"].values(), key=lambda d: d["slide_number"]):
+            line = f"{digest['slide_number']}. {digest['title']}"
+            if digest["points"]:
+                line += " — " + "; ".join(digest["points"])
+            lines.append(line)
+
+        outline = "\n".join(lines)
+        if len(outline) > max_chars:
+            outline = outline[:max_chars].rsplit("\n", 1)[0] + "\n..."
+        return outline
+
+    def _advance(self, presentation_id: str, version: int) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(presentation_id)
+        if entry is None:
+            return None
+        if entry["version"] != version - 1:
+            # Missed a change (another worker, or an untracked write): rebuild lazily
+            self.invalidate(presentation_id)
+            return None
+        entry["version"] = version
+        self._entries.move_to_end(presentation_id)
+        return entry
+
+    def _remember(self, presentation_id: str, entry: Dict[str, Any]) -> None:
+        self._entries[presentation_id] = entry
+        self._entries.move_to_end(presentation_id)
+        while len(self._entries) > self.max_presentations:
+            self._entries.popitem(last=False)
+
+# Shared by the chat and slide routes
+deck_digest = DeckDigestCache()
@@ -0,0 +1,172 @@
+import os
+import json
+import asyncio
+import hashlib
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, BinaryIO, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when exporter output changes so stale artifacts stop matching
+EXPORT_FORMAT_VERSION = 3
+
+# Fields that change without changing what an export looks like
+VOLATILE_FIELDS = {"_id", "created_at", "updated_at", "view_count", "is_public", "share_token", "thumbnail_url", "thumbnail_hash", "version"}
+
+def export_cache_key(
+    export_format: str,
+    presentation: Dict[str, Any],
+    slides: List[Dict[str, Any]],
+    **options: Any
+) -> str:
+    """
+    Content hash identifying an export artifact
+
+    Covers the presentation and slide fields that affect the output (images
+    are included by URL, and blob URLs are content hashes themselves), the
+    format, any renderer options and EXPORT_FORMAT_VERSION.
+    """
+    def strip(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {k: v for k, v in doc.items() if k not in VOLATILE_FIELDS}
+
+    payload = json.dumps(
+        [EXPORT_FORMAT_VERSION, export_format, options, strip(presentation), [strip(slide) for slide in slides]],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ExportArtifactCache:
+    """
+    Local disk cache of rendered exports, keyed by `export_cache_key`
+
+    Artifacts are written atomically under `root` and evicted least recently
+    used first (by file mtime, refreshed on every hit) once the directory
+    grows past `max_bytes`. Keys are content hashes, so an entry never goes
+    stale; it just stops being requested.
+
+    Eviction can run at any moment (another export committing), so artifacts
+    are served from a handle `open` returns rather than by path, and entries
+    that must outlive a request (background job downloads) are pinned.
+    """
+
+    def __init__(self, root: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._pins: Dict[str, float] = {}
+
+    def path(self, key: str, extension: str) -> Path:
+        """Where the artifact for `key` lives (whether or not it exists yet)"""
+        return self.root / f"{key}.{extension}"
+
+    async def get(self, key: str, extension: str) -> Optional[Path]:
+        """Path of a cached artifact, or None on a miss"""
+        path = self.path(key, extension)
+        try:
+            await asyncio.to_thread(os.utime, path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    async def open(self, key: str, extension: str) -> Optional[BinaryIO]:
+        """
+        A cached artifact opened for reading, or None on a miss
+
+        The handle stays readable if the entry is evicted meanwhile; the
+        caller must close it.
+        """
+        try:
+            f = await asyncio.to_thread(open, self.path(key, extension), "rb")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        await asyncio.to_thread(os.utime, f.fileno())
+        self.hits += 1
+        return f
+
+    def pin(self, key: str, extension: str, until: float) -> None:
+        """Exempt an artifact (present or not yet rendered) from eviction until the `until` timestamp"""
+        now = time.time()
+        self._pins = {path: expiry for path, expiry in self._pins.items() if expiry > now}
+        path = str(self.path(key, extension))
+        self._pins[path] = max(until, self._pins.get(path, 0))
+
+    async def put(self, key: str, extension: str, data: bytes) -> Path:
+        """Store an artifact's bytes and return its path"""
+        return await asyncio.to_thread(self._put, key, extension, data)
+
+    def _put(self, key: str, extension: str, data: bytes) -> Path:
+        tmp = self.temp_path()
+        with open(tmp, "wb") as f:
+            f.write(data)
+        return self._commit(tmp, key, extension)
+
+    def temp_path(self) -> str:
+        """
+        Reserve a scratch file in the cache directory for an artifact being rendered
+
+        Hand it to `commit` once complete (or delete it on failure); it lives
+        on the same filesystem, so committing is a rename rather than a copy.
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        os.close(fd)
+        return tmp
+
+    async def commit(self, tmp_path: str, key: str, extension: str) -> Path:
+        """Move a finished scratch file into the cache under `key` and return its path"""
+        return await asyncio.to_thread(self._commit, tmp_path, key, extension)
+
+    def _commit(self, tmp_path: str, key: str, extension: str) -> Path:
+        path = self.path(key, extension)
+        os.replace(tmp_path, path)
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: Path) -> None:
+        now = time.time()
+        pinned = {path for path, expiry in list(self._pins.items()) if expiry > now}
+        pinned.add(str(keep))
+
+        entries = []
+        total = 0
+        for entry in os.scandir(self.root):
+            if not entry.is_file() or entry.name.endswith(".tmp"):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path in pinned:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                logger.info(f"Evicted cached export {os.path.basename(path)}")
+            except FileNotFoundError:
+                pass
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit and miss counters"""
+        return {"hits": self.hits, "misses": self.misses, "max_bytes": self.max_bytes, "pinned": len(self._pins)}
+
+_export_cache: Optional[ExportArtifactCache] = None
+
+def get_export_cache() -> ExportArtifactCache:
+    """Process-wide export cache in EXPORT_CACHE_DIR, capped at EXPORT_CACHE_MAX_MB"""
+    global _export_cache
+    if _export_cache is None:
+        root = os.environ.get("EXPORT_CACHE_DIR", str(Path(__file__).parent.parent / "data" / "exports"))
+        max_mb = int(os.environ.get("EXPORT_CACHE_MAX_MB", "1024"))
+        _export_cache = ExportArtifactCache(root, max_bytes=max_mb * 1024 * 1024)
+    return _export_cache
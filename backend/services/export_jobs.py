@@ -0,0 +1,126 @@
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import Dict, Any, Optional, Awaitable, Callable
+import asyncio
+import logging
+import os
+import secrets
+import tempfile
+import uuid
+
+from services.export_pool import ExportQueueFull
+
+logger = logging.getLogger(__name__)
+
+class ExportJobManager:
+    """
+    Background export jobs with progress and expiring download links
+
+    A job renders through the same export pool and cache as a synchronous
+    export, but in a task of its own, so the request that started it returns
+    immediately. Renderers report progress by writing "completed/total" to
+    the job's progress file (workers run in other processes, so a file is the
+    cheapest channel back). Finished artifacts stay downloadable with the
+    job's token until `ttl` seconds after the job was created.
+
+    Jobs live in this process's memory: with several API workers, status and
+    download requests must reach the worker that started the job.
+    """
+
+    def __init__(self, ttl: int = 3600, max_jobs: int = 1000):
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._progress_dir: Optional[Path] = None
+
+    def create(self, user_id: str, presentation_id: str, export_format: str, filename: str, total: int) -> Dict[str, Any]:
+        """Register a queued job for a presentation export"""
+        self._purge()
+        if len(self._jobs) >= self.max_jobs:
+            raise ExportQueueFull("Too many export jobs in progress, please retry shortly")
+
+        now = datetime.now(timezone.utc)
+        job = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "presentation_id": presentation_id,
+            "format": export_format,
+            "filename": filename,
+            "status": "queued",
+            "completed": 0,
+            "total": total,
+            "error": None,
+            "path": None,
+            "token": secrets.token_urlsafe(24),
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl),
+            "task": None
+        }
+        self._jobs[job["id"]] = job
+        return job
+
+    def start(self, job: Dict[str, Any], render: Callable[[str], Awaitable[Path]]) -> None:
+        """
+        Run `render(progress_path)` in the background; it returns the finished artifact's path
+        """
+        job["task"] = asyncio.create_task(self._run(job, render))
+
+    def finish(self, job: Dict[str, Any], path: Path) -> None:
+        """Mark a job done with its artifact (e.g. when the export was already cached)"""
+        job.update(status="done", completed=job["total"], path=path)
+
+    async def _run(self, job: Dict[str, Any], render: Callable[[str], Awaitable[Path]]) -> None:
+        progress_path = self.progress_path(job)
+        job["status"] = "running"
+        try:
+            self.finish(job, await render(str(progress_path)))
+            logger.info(f"Export job {job['id']} finished")
+        except Exception as e:
+            logger.error(f"Export job {job['id']} failed: {e}")
+            job.update(status="failed", error=str(e) or type(e).__name__)
+        finally:
+            job["task"] = None
+            progress_path.unlink(missing_ok=True)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A job by ID, or None if unknown or expired"""
+        self._purge()
+        return self._jobs.get(job_id)
+
+    def progress_path(self, job: Dict[str, Any]) -> Path:
+        """File the renderer writes the job's progress to"""
+        if self._progress_dir is None:
+            self._progress_dir = Path(tempfile.mkdtemp(prefix="export-progress-"))
+        return self._progress_dir / job["id"]
+
+    def progress(self, job: Dict[str, Any]) -> Dict[str, int]:
+        """Slides rendered so far and in total"""
+        if job["status"] == "running":
+            try:
+                completed, _ = self.progress_path(job).read_text().split("/", 1)
+                job["completed"] = int(completed)
+            except (FileNotFoundError, ValueError):
+                pass
+        return {"completed": job["completed"], "total": job["total"]}
+
+    def public(self, job: Dict[str, Any], download_url: Optional[str] = None) -> Dict[str, Any]:
+        """API view of a job"""
+        return {
+            "job_id": job["id"],
+            "presentation_id": job["presentation_id"],
+            "format": job["format"],
+            "status": job["status"],
+            "progress": self.progress(job),
+            "error": job["error"],
+            "download_url": download_url if job["status"] == "done" else None,
+            "created_at": job["created_at"],
+            "expires_at": job["expires_at"]
+        }
+
+    def _purge(self) -> None:
+        now = datetime.now(timezone.utc)
+        for job_id in [job_id for job_id, job in self._jobs.items() if job["expires_at"] <= now and job["task"] is None]:
+            del self._jobs[job_id]
+
+# Shared by the export routes
+export_jobs = ExportJobManager(ttl=int(os.environ.get("EXPORT_JOB_TTL", "3600")))
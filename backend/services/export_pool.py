@@ -0,0 +1,220 @@
+from multiprocessing.connection import Connection
+from typing import Dict, Any, Callable, Optional, Sequence, Tuple
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+class ExportQueueFull(Exception):
+    """Raised when too many exports are already waiting for a worker"""
+
+class ExportTimeout(Exception):
+    """Raised when an export job runs longer than the pool's timeout"""
+
+class ExportWorkerDied(Exception):
+    """Raised when an export's worker process exits without a result (e.g. killed by the OS)"""
+
+def _address_space_bytes() -> int:
+    """Current virtual size of this process (0 where /proc is unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+def _limit_worker_memory(max_bytes: int) -> None:
+    """Let the worker allocate at most `max_bytes` of address space beyond what it starts with"""
+    if not max_bytes:
+        return
+    try:
+        import resource
+        limit = _address_space_bytes() + max_bytes
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        logger.warning(f"Could not set export worker memory limit: {e}")
+
+def _run_job(conn: Connection, max_bytes: int, fn: Callable, args: Tuple[Any, ...]) -> None:
+    """Worker process entry point: run one job and send back ("ok", result) or ("error", exception)"""
+    _limit_worker_memory(max_bytes)
+    try:
+        outcome = ("ok", fn(*args))
+    except BaseException as e:
+        outcome = ("error", e)
+    try:
+        conn.send(outcome)
+    except Exception:
+        # The result or exception could not be pickled
+        conn.send(("error", RuntimeError(repr(outcome[1]))))
+    finally:
+        conn.close()
+
+class ExportPool:
+    """
+    Bounded process pool for CPU-heavy export rendering
+
+    Rendering runs in separate processes so it never blocks the event loop
+    and can use every core. Each job gets a process of its own, so a job
+    that exceeds `timeout` seconds is killed without touching the others.
+    At most `max_concurrent` jobs run at once and at most `max_queue` wait
+    behind them; beyond that `run` fails fast with ExportQueueFull.
+
+    Workers are forked from a small fork server that has imported only the
+    `preload` modules, not from the API process, so they neither inherit its
+    threads and heap nor pay for importing the renderers per job. Each
+    worker may allocate `memory_limit_mb` beyond its starting footprint, so
+    a runaway deck fails with MemoryError instead of taking the host down.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        max_queue: int = 32,
+        timeout: float = 120.0,
+        memory_limit_mb: int = 1024,
+        preload: Sequence[str] = ()
+    ):
+        self.max_concurrent = max_concurrent or max(1, min(4, os.cpu_count() or 1))
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(list(preload))
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._stats = {
+            "queued": 0,
+            "running": 0,
+            "completed": 0,
+            "failed": 0,
+            "timed_out": 0,
+            "rejected": 0,
+            "total_seconds": 0.0
+        }
+
+    @classmethod
+    def from_env(cls) -> "ExportPool":
+        """Build a pool configured by EXPORT_MAX_CONCURRENT (or EXPORT_WORKERS), EXPORT_MAX_QUEUE, EXPORT_TIMEOUT and EXPORT_MEMORY_LIMIT_MB"""
+        def env_int(name: str) -> Optional[int]:
+            value = os.environ.get(name)
+            return int(value) if value else None
+
+        return cls(
+            max_concurrent=env_int("EXPORT_MAX_CONCURRENT") or env_int("EXPORT_WORKERS"),
+            max_queue=env_int("EXPORT_MAX_QUEUE") or 32,
+            timeout=float(os.environ.get("EXPORT_TIMEOUT", "120")),
+            memory_limit_mb=env_int("EXPORT_MEMORY_LIMIT_MB") or 1024,
+            preload=("services.export_service",)
+        )
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Run `fn(*args)` in a worker process
+
+        `fn` and its arguments must be picklable (a module-level function
+        with plain data).
+
+        Raises:
+            ExportQueueFull: Too many jobs are already waiting
+            ExportTimeout: The job exceeded the timeout
+            ExportWorkerDied: The worker exited without a result
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+
+        if self._stats["queued"] >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise ExportQueueFull("Too many exports in progress, please retry shortly")
+
+        self._stats["queued"] += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._stats["queued"] -= 1
+
+        self._stats["running"] += 1
+        started = time.monotonic()
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=_run_job,
+            args=(sender, self.memory_limit_mb * 1024 * 1024, fn, args),
+            daemon=True
+        )
+        try:
+            await asyncio.to_thread(process.start)
+            sender.close()
+            self._processes[process.pid] = process
+            status, value = await asyncio.wait_for(self._receive(receiver), self.timeout)
+            if status == "error":
+                raise value
+            self._stats["completed"] += 1
+            return value
+        except asyncio.TimeoutError:
+            self._stats["timed_out"] += 1
+            logger.error(f"Export job exceeded {self.timeout}s, killing its worker")
+            raise ExportTimeout(f"Export took longer than {self.timeout:g} seconds")
+        except ExportWorkerDied:
+            self._stats["failed"] += 1
+            logger.error(f"Export worker exited with code {process.exitcode}")
+            raise
+        except Exception:
+            self._stats["failed"] += 1
+            raise
+        finally:
+            await self._stop(process)
+            receiver.close()
+            self._stats["running"] -= 1
+            self._stats["total_seconds"] += time.monotonic() - started
+            self._semaphore.release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue and throughput counters for monitoring"""
+        finished = self._stats["completed"] + self._stats["failed"] + self._stats["timed_out"]
+        return {
+            **self._stats,
+            "total_seconds": round(self._stats["total_seconds"], 3),
+            "average_seconds": round(self._stats["total_seconds"] / finished, 3) if finished else None,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "timeout": self.timeout
+        }
+
+    def shutdown(self) -> None:
+        """Kill any worker processes still running"""
+        processes = list(self._processes.values())
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+        for process in processes:
+            process.join(timeout=1)
+        self._processes.clear()
+
+    @staticmethod
+    async def _receive(receiver: Connection) -> Tuple[str, Any]:
+        """Wait for a worker's outcome without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        loop.add_reader(receiver.fileno(), ready.set)
+        try:
+            await ready.wait()
+        finally:
+            loop.remove_reader(receiver.fileno())
+        try:
+            return receiver.recv()
+        except EOFError:
+            raise ExportWorkerDied("Export worker exited unexpectedly")
+
+    async def _stop(self, process: multiprocessing.Process) -> None:
+        """Kill a job's process if it is still running and reap it"""
+        if process.pid is None:
+            return
+        if process.is_alive():
+            process.kill()
+        await asyncio.to_thread(process.join, 1)
+        self._processes.pop(process.pid, None)
+
+# Shared by the export routes; sized by the EXPORT_* environment variables
+export_pool = ExportPool.from_env()
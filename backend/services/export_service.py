@@ -1,32 +1,149 @@
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image as RLImage, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Image as RLImage, Table, TableStyle, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
 import base64
-from typing import List, Dict, Any
+import hashlib
+import os
+import tempfile
+from typing import List, Dict, Any, Optional, Union, Callable
 import logging
 
+from services.blob_store import blob_key_from_url
+from services.image_derivatives import downscale_to_box
+from services.pdf_canvas_renderer import CanvasPdfRenderer
+from services.pptx_exporter import write_pptx
+
 logger = logging.getLogger(__name__)
 
+# PDF renderers: "flow" reflows slide content through Platypus, "canvas" draws slides as laid out
+PDF_RENDERERS = ("flow", "canvas")
+
+# Resolution images are embedded at, relative to their printed size
+EXPORT_IMAGE_DPI = int(os.environ.get("EXPORT_IMAGE_DPI", "150"))
+
+ProgressCallback = Callable[[int, int], None]
+
+class _SlideProgress(Flowable):
+    """Zero-size flowable that reports progress when the layout reaches it"""
+    
+    def __init__(self, callback: ProgressCallback, completed: int, total: int):
+        super().__init__()
+        self.callback = callback
+        self.completed = completed
+        self.total = total
+    
+    def wrap(self, available_width, available_height):
+        return 0, 0
+    
+    def draw(self):
+        self.callback(self.completed, self.total)
+
+class ExportImages:
+    """
+    Per-export image cache: each distinct image is decoded and downscaled once
+    
+    Images are identified by content (the blob key, or a hash of the data
+    URI), so a logo repeated on every slide is processed once and written to
+    a single scratch file. ReportLab names embedded images after their file,
+    so that file also ends up in the PDF only once.
+    """
+    
+    def __init__(self, scratch_dir: str, blobs: Dict[str, Union[bytes, str]], dpi: int = EXPORT_IMAGE_DPI):
+        self.scratch_dir = scratch_dir
+        self.blobs = blobs
+        self.dpi = dpi
+        self._paths: Dict[tuple, Optional[str]] = {}
+    
+    def get(self, image_url: str, width: float, height: float, cover: bool = False) -> Optional[str]:
+        """
+        Path of the image at `image_url` scaled to fit width x height points at the target DPI
+        
+        With `cover`, scaled to cover the box instead (for cropping).
+        Returns None when the image is missing or cannot be decoded.
+        """
+        if image_url.startswith('data:image') and ',' in image_url:
+            digest = hashlib.sha256(image_url.encode()).hexdigest()
+        else:
+            digest = blob_key_from_url(image_url)
+            if not digest or digest not in self.blobs:
+                return None
+        
+        box = (max(1, round(width / 72 * self.dpi)), max(1, round(height / 72 * self.dpi)))
+        cache_key = (digest, box, cover)
+        if cache_key not in self._paths:
+            self._paths[cache_key] = self._prepare(digest, image_url, box, cover)
+        return self._paths[cache_key]
+    
+    def _prepare(self, digest: str, image_url: str, box: tuple, cover: bool) -> Optional[str]:
+        if image_url.startswith('data:image'):
+            source = base64.b64decode(image_url.split(',', 1)[1])
+        else:
+            source = self.blobs[digest]
+        
+        try:
+            data, image_format = downscale_to_box(source, *box, cover=cover)
+        except MemoryError:
+            # Over the worker's memory limit: fail the export rather than drop the image
+            raise
+        except Exception as e:
+            logger.warning(f"Could not decode image {digest} for export: {e}")
+            return None
+        
+        name = f"{digest}-{box[0]}x{box[1]}{'-cover' if cover else ''}"
+        path = os.path.join(self.scratch_dir, f"{name}.{'png' if image_format == 'PNG' else 'jpg'}")
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
 class ExportService:
     """Service for exporting presentations to various formats"""
     
     @staticmethod
-    def generate_pdf(presentation_data: Dict[str, Any], slides_data: List[Dict[str, Any]]) -> BytesIO:
+    def generate_pdf(
+        presentation_data: Dict[str, Any],
+        slides_data: List[Dict[str, Any]],
+        blobs: Optional[Dict[str, Union[bytes, str]]] = None,
+        output_path: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> Optional[BytesIO]:
         """
         Generate a PDF from presentation and slide data
         
+        With `output_path` the document is written straight to that file.
+        Images are downscaled to their printed size once per distinct image
+        (see ExportImages) and kept in scratch files that are only read when
+        their page is drawn, so memory does not grow with the deck's images.
+        
         Args:
             presentation_data: Presentation metadata (title, description)
             slides_data: List of slide data with elements
+            blobs: Blob-store images referenced by the slides, by key, as
+                bytes or as paths to files holding them
+            output_path: File to write the PDF to instead of returning it
+            progress: Called with (slides rendered, total slides) as each
+                slide's page is laid out
             
         Returns:
-            BytesIO: PDF file as bytes
+            BytesIO: PDF file as bytes, or None when written to `output_path`
         """
-        buffer = BytesIO()
+        with tempfile.TemporaryDirectory(prefix="pdf-images-") as scratch_dir:
+            return ExportService._build_pdf(presentation_data, slides_data, blobs or {}, output_path, scratch_dir, progress)
+    
+    @staticmethod
+    def _build_pdf(
+        presentation_data: Dict[str, Any],
+        slides_data: List[Dict[str, Any]],
+        blobs: Dict[str, Union[bytes, str]],
+        output_path: Optional[str],
+        scratch_dir: str,
+        progress: Optional[ProgressCallback]
+    ) -> Optional[BytesIO]:
+        buffer = output_path or BytesIO()
+        images = ExportImages(scratch_dir, blobs)
         doc = SimpleDocTemplate(
             buffer,
             pagesize=letter,
@@ -109,17 +226,17 @@ class ExportService:
             # Add images
             for element in image_elements:
                 try:
-                    image_url = element.get('content', {}).get('url', '')
-                    if image_url and image_url.startswith('data:image'):
-                        # Extract base64 data
-                        image_data = image_url.split(',')[1]
-                        image_bytes = base64.b64decode(image_data)
-                        img_buffer = BytesIO(image_bytes)
-                        
-                        # Add image to PDF
-                        img = RLImage(img_buffer, width=4*inch, height=3*inch)
+                    content = element.get('content', {})
+                    image_url = content.get('url') or content.get('image_url') or ''
+                    image_path = images.get(image_url, 4*inch, 3*inch)
+                    
+                    if image_path:
+                        # Add image to PDF (opened lazily when drawn)
+                        img = RLImage(image_path, width=4*inch, height=3*inch)
                         elements.append(img)
                         elements.append(Spacer(1, 0.2*inch))
+                except MemoryError:
+                    raise
                 except Exception as e:
                     logger.warning(f"Could not add image to PDF: {e}")
             
@@ -137,6 +254,9 @@ class ExportService:
                 notes_para = Paragraph(f"<i>Notes: {notes}</i>", notes_style)
                 elements.append(notes_para)
             
+            if progress:
+                elements.append(_SlideProgress(progress, idx, len(slides_data)))
+            
             # Page break between slides (except last slide)
             if idx < len(slides_data):
                 elements.append(PageBreak())
@@ -144,14 +264,117 @@ class ExportService:
         # Build PDF
         try:
             doc.build(elements)
+            if output_path:
+                return None
             buffer.seek(0)
             return buffer
         except Exception as e:
             logger.error(f"Error building PDF: {e}")
             raise
     
+    @staticmethod
+    def generate_canvas_pdf(
+        presentation_data: Dict[str, Any],
+        slides_data: List[Dict[str, Any]],
+        blobs: Optional[Dict[str, Union[bytes, str]]] = None,
+        output_path: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> Optional[BytesIO]:
+        """
+        Generate a PDF with one page per slide, drawn as laid out in the editor
+        
+        Takes the same arguments as `generate_pdf`; see CanvasPdfRenderer.
+        
+        Returns:
+            BytesIO: PDF file as bytes, or None when written to `output_path`
+        """
+        buffer = output_path or BytesIO()
+        with tempfile.TemporaryDirectory(prefix="pdf-images-") as scratch_dir:
+            renderer = CanvasPdfRenderer(ExportImages(scratch_dir, blobs or {}))
+            renderer.render(buffer, presentation_data, slides_data, progress)
+        
+        if output_path:
+            return None
+        buffer.seek(0)
+        return buffer
+    
+    @staticmethod
+    def generate_pptx(
+        presentation_data: Dict[str, Any],
+        slides_data: List[Dict[str, Any]],
+        blobs: Optional[Dict[str, Union[bytes, str]]] = None,
+        output_path: Optional[str] = None,
+        progress: Optional[ProgressCallback] = None
+    ) -> Optional[BytesIO]:
+        """
+        Generate a PowerPoint file, one slide per slide, laid out as in the editor
+        
+        Takes the same arguments as `generate_pdf`; see PptxWriter.
+        
+        Returns:
+            BytesIO: PPTX file as bytes, or None when written to `output_path`
+        """
+        buffer = output_path or BytesIO()
+        with tempfile.TemporaryDirectory(prefix="pptx-images-") as scratch_dir:
+            write_pptx(buffer, presentation_data, slides_data, ExportImages(scratch_dir, blobs or {}), progress)
+        
+        if output_path:
+            return None
+        buffer.seek(0)
+        return buffer
+    
     @staticmethod
     def generate_share_token() -> str:
         """Generate a unique share token for public presentations"""
         import secrets
         return secrets.token_urlsafe(32)
+
+def render_pdf(
+    presentation_data: Dict[str, Any],
+    slides_data: List[Dict[str, Any]],
+    blobs: Optional[Dict[str, str]],
+    output_path: str,
+    progress_path: Optional[str] = None,
+    renderer: str = "flow"
+) -> int:
+    """
+    Render a PDF to `output_path`; module-level so it can run in an ExportPool worker process
+    
+    Only file paths cross the process boundary, so neither the images nor
+    the finished document are pickled back to the API process. With
+    `progress_path`, the number of slides rendered so far is written to
+    that file as the render advances (see ExportJobManager.progress).
+    `renderer` picks `generate_pdf` ("flow") or `generate_canvas_pdf` ("canvas").
+    
+    Returns:
+        Size of the written file in bytes
+    """
+    generate = ExportService.generate_canvas_pdf if renderer == "canvas" else ExportService.generate_pdf
+    generate(presentation_data, slides_data, blobs, output_path=output_path, progress=_file_progress(progress_path))
+    return os.path.getsize(output_path)
+
+def render_pptx(
+    presentation_data: Dict[str, Any],
+    slides_data: List[Dict[str, Any]],
+    blobs: Optional[Dict[str, str]],
+    output_path: str,
+    progress_path: Optional[str] = None
+) -> int:
+    """
+    Render a PPTX to `output_path`; the ExportPool counterpart of `render_pdf`
+    
+    Returns:
+        Size of the written file in bytes
+    """
+    ExportService.generate_pptx(presentation_data, slides_data, blobs, output_path=output_path, progress=_file_progress(progress_path))
+    return os.path.getsize(output_path)
+
+def _file_progress(progress_path: Optional[str]) -> Optional[ProgressCallback]:
+    """Progress callback writing "completed/total" to `progress_path`, if given"""
+    if not progress_path:
+        return None
+    
+    def progress(completed: int, total: int) -> None:
+        with open(progress_path, 'w') as f:
+            f.write(f"{completed}/{total}")
+    return progress
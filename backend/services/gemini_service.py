@@ -1,8 +1,9 @@
 import os
 import asyncio
 import logging
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, AsyncIterator
 from emergentintegrations.llm.chat import LlmChat, UserMessage, ImageContent
+import litellm
 import base64
 
 logger = logging.getLogger(__name__)
@@ -15,6 +16,23 @@ class GeminiService:
         if not self.api_key:
             raise ValueError("EMERGENT_LLM_KEY not found in environment variables")
     
+    def _stream_route(self) -> Optional[Dict[str, Any]]:
+        """litellm arguments for a token stream, or None if none is configured"""
+        proxy_url = os.getenv("LLM_PROXY_URL")
+        if proxy_url:
+            # OpenAI-compatible proxy that accepts the Emergent key
+            return {"api_key": self.api_key, "api_base": proxy_url, "custom_llm_provider": "openai"}
+        gemini_key = os.getenv("GEMINI_API_KEY")
+        if gemini_key:
+            # Straight to the Gemini API
+            return {"api_key": gemini_key}
+        return None
+    
+    @property
+    def streams_tokens(self) -> bool:
+        """Whether stream_text yields text as it is generated (see stream_text)"""
+        return self._stream_route() is not None
+    
     async def generate_text(
         self,
         prompt: str,
@@ -58,6 +76,64 @@ class GeminiService:
             logger.error(f"Error generating text: {str(e)}")
             raise Exception(f"Failed to generate text: {str(e)}")
     
+    async def stream_text(
+        self,
+        prompt: str,
+        system_message: str = "You are a helpful AI assistant.",
+        model: str = "gemini-3-flash-preview"
+    ) -> AsyncIterator[str]:
+        """
+        Stream text from a Gemini model as it is generated
+        
+        LlmChat only returns complete responses, so token streaming goes
+        through litellm (the engine underneath emergentintegrations) with
+        stream=True, using either an OpenAI-compatible proxy that accepts the
+        Emergent key (LLM_PROXY_URL) or a Gemini API key (GEMINI_API_KEY).
+        Closing the generator closes the upstream stream, which is how
+        callers cancel generation when their client goes away.
+        
+        With neither configured this does NOT stream: the Emergent key is only
+        usable through LlmChat, so the complete response is generated and
+        yielded as one chunk (`streams_tokens` is False). Cancelling the
+        consuming task still cancels the pending LlmChat request.
+        
+        Args:
+            prompt: User prompt for text generation
+            system_message: System message to set context
+            model: Gemini model to use
+            
+        Yields:
+            Text deltas in the order they are produced
+        """
+        route = self._stream_route()
+        if route is None:
+            yield await self.generate_text(prompt=prompt, system_message=system_message, model=model)
+            return
+        
+        try:
+            stream = await litellm.acompletion(
+                model=f"gemini/{model}",
+                messages=[
+                    {"role": "system", "content": system_message},
+                    {"role": "user", "content": prompt}
+                ],
+                stream=True,
+                **route
+            )
+        except Exception as e:
+            logger.error(f"Error starting text stream: {str(e)}")
+            raise Exception(f"Failed to generate text: {str(e)}")
+        
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    yield delta
+        finally:
+            close = getattr(stream, "aclose", None)
+            if close is not None:
+                await close()
+    
     async def generate_image(
         self,
         prompt: str,
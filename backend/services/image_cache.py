@@ -0,0 +1,100 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+def normalize_prompt(prompt: str) -> str:
+    """Case-fold and collapse whitespace so trivially different prompts share a key"""
+    return re.sub(r"\s+", " ", prompt.lower()).strip().rstrip(".!")
+
+def image_cache_key(prompt: str, style: str, reference_image: Optional[str] = None) -> str:
+    """Cache key for an image request: normalized prompt, style and reference image hash"""
+    reference_hash = hashlib.sha256(reference_image.encode()).hexdigest() if reference_image else None
+    payload = json.dumps([normalize_prompt(prompt), style.lower().strip(), reference_hash])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ImageCache:
+    """
+    LRU cache from image request keys to generated images in the blob store
+
+    Entries hold the blob descriptor returned by `BlobStore.put` (the bytes
+    themselves stay in the blob store) and are evicted least recently used
+    first once either `max_entries` or `max_bytes` of referenced images is
+    exceeded. Evicting an entry never deletes the blob, since slides may
+    point at it.
+
+    Concurrent misses for the same key share one generation, which runs in
+    a task of its own: a caller that is cancelled (e.g. its client went
+    away) stops waiting without cancelling the generation for the others,
+    and the image is still cached once it arrives.
+    """
+
+    def __init__(self, max_entries: int = 1000, max_bytes: int = 512 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[Dict[str, Any]]],
+        regenerate: bool = False
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Return the cached image for `key`, generating it on a miss
+
+        Args:
+            key: Key from `image_cache_key`
+            generate: Coroutine factory producing {"blob": descriptor, "text_response": str}
+            regenerate: Skip the lookup and replace the cached entry
+
+        Returns:
+            Tuple of (entry, whether it came from the cache)
+        """
+        if not regenerate:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry, True
+
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                return await asyncio.shield(inflight), True
+
+        task = asyncio.create_task(self._generate(key, generate))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), False
+
+    async def _generate(self, key: str, generate: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        entry = await generate()
+        # A newer `regenerate` for the key may have superseded this generation
+        if self._inflight.get(key) is asyncio.current_task():
+            self._store(key, entry)
+        return entry
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # Mark retrieved when every waiter has gone
+
+    def _store(self, key: str, entry: Dict[str, Any]) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous["blob"].get("size", 0)
+
+        self._entries[key] = entry
+        self._bytes += entry["blob"].get("size", 0)
+
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            evicted_key, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["blob"].get("size", 0)
+            logger.debug(f"Evicted image cache entry {evicted_key}")
@@ -0,0 +1,164 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import List, Tuple, Optional, Union
+import asyncio
+import logging
+import os
+
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# Widths produced for every stored image (thumbnail strip, slide list, editor, full screen)
+DERIVATIVE_WIDTHS = (160, 480, 960, 1600)
+
+# EXIF orientations that exif_transpose turns by 90 degrees, swapping width and height
+EXIF_ORIENTATION = 0x0112
+ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+def render_derivatives(data: bytes, widths: Tuple[int, ...] = DERIVATIVE_WIDTHS) -> Tuple[str, List[Tuple[int, bytes]], int]:
+    """
+    Encode downscaled copies of an image at each width narrower than the original
+
+    Each size is resized from the previous (larger) one, which is much cheaper
+    than resizing the full image every time. Runs in a worker thread; Pillow
+    releases the GIL while resizing and encoding.
+
+    Returns:
+        Tuple of (mime_type, [(width, encoded bytes), ...] ordered by width,
+        original width)
+    """
+    use_webp = features.check("webp")
+    mime_type = "image/webp" if use_webp else "image/jpeg"
+
+    with Image.open(BytesIO(data)) as source:
+        # Full size as displayed, before draft() shrinks the decode
+        original_width = source.height if source.getexif().get(EXIF_ORIENTATION) in ROTATED_ORIENTATIONS else source.width
+        if source.format == "JPEG":
+            # Let the decoder skip detail we are about to throw away
+            source.draft("RGB", (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "P") else "RGB")
+    if not use_webp and image.mode == "RGBA":
+        flattened = Image.new("RGB", image.size, (255, 255, 255))
+        flattened.paste(image, mask=image.getchannel("A"))
+        image = flattened
+
+    results = []
+    for width in sorted((w for w in widths if w < image.width), reverse=True):
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+
+        buffer = BytesIO()
+        if use_webp:
+            image.save(buffer, "WEBP", quality=80, method=4)
+        else:
+            image.save(buffer, "JPEG", quality=82, optimize=True, progressive=True)
+        results.append((width, buffer.getvalue()))
+
+    results.reverse()
+    return mime_type, results, original_width
+
+def prepare_reference_image(data: bytes, max_dimension: int = 1024, max_pixels: int = 40_000_000) -> bytes:
+    """
+    Downscale an uploaded reference image so its longest side is at most `max_dimension`
+
+    The pixel count is checked from the header before anything is decoded, and
+    JPEGs are decoded straight at reduced scale, so memory stays proportional
+    to the output size rather than the upload's resolution.
+
+    Returns:
+        JPEG bytes (PNG if the image has transparency)
+
+    Raises:
+        ValueError: If the data is not a readable image or has too many pixels
+    """
+    try:
+        source = Image.open(BytesIO(data))
+    except Exception:
+        raise ValueError("Reference image is not a valid image")
+
+    with source:
+        if source.width * source.height > max_pixels:
+            raise ValueError(f"Reference image is too large ({source.width}x{source.height})")
+        if source.format == "JPEG":
+            source.draft("RGB", (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(source)
+
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    buffer = BytesIO()
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image.convert("RGBA").save(buffer, "PNG", optimize=True)
+    else:
+        image.convert("RGB").save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+def downscale_to_box(source: Union[bytes, str], max_width: int, max_height: int, cover: bool = False) -> Tuple[bytes, str]:
+    """
+    Shrink an image (bytes or file path) to fit within max_width x max_height pixels
+
+    With `cover`, the image is instead shrunk only until its shorter side
+    matches the box, so it can be cropped to fill it. Images already small
+    enough are re-encoded but not enlarged. Used by the exporters to embed
+    images at their printed size instead of full resolution.
+
+    Returns:
+        Tuple of (encoded bytes, "JPEG" or "PNG" when the image has transparency)
+    """
+    with Image.open(BytesIO(source) if isinstance(source, bytes) else source) as opened:
+        if opened.format == "JPEG":
+            opened.draft("RGB", (max_width, max_height))
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+
+    if cover:
+        scale = max(max_width / image.width, max_height / image.height)
+        if scale < 1:
+            image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS, reducing_gap=3.0)
+    else:
+        image.thumbnail((max_width, max_height), Image.LANCZOS)
+
+    buffer = BytesIO()
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image.convert("RGBA").save(buffer, "PNG", optimize=True)
+        return buffer.getvalue(), "PNG"
+    image.convert("RGB").save(buffer, "JPEG", quality=85, optimize=True)
+    return buffer.getvalue(), "JPEG"
+
+class ImageDerivativePipeline:
+    """Runs Pillow work (derivatives, reference downscaling, thumbnails) off the event loop"""
+
+    def __init__(self, widths: Tuple[int, ...] = DERIVATIVE_WIDTHS, max_workers: Optional[int] = None):
+        self.widths = widths
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(4, os.cpu_count() or 1),
+            thread_name_prefix="image-derivatives"
+        )
+
+    async def render(self, data: bytes) -> Tuple[str, List[Tuple[int, bytes]], int]:
+        """Render derivatives for `data` in the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, render_derivatives, data, self.widths)
+
+    async def run(self, fn, *args):
+        """Run any other Pillow work in the worker pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def prepare_reference(self, data: bytes, max_dimension: int = 1024) -> bytes:
+        """Downscale a reference image in the worker pool (see prepare_reference_image)"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, prepare_reference_image, data, max_dimension)
+
+_pipeline: Optional[ImageDerivativePipeline] = None
+
+def get_image_pipeline() -> ImageDerivativePipeline:
+    """Process-wide image pipeline, created on first use"""
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = ImageDerivativePipeline()
+    return _pipeline
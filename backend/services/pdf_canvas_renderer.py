@@ -0,0 +1,313 @@
+from reportlab.pdfgen import canvas
+from reportlab.lib import colors
+from reportlab.lib.utils import ImageReader, simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple, Callable
+import math
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 16:9 page, 13.33 x 7.5 in
+SLIDE_PAGE_SIZE = (960.0, 540.0)
+
+# Editor canvas size; pixel positions and font sizes are relative to it
+REFERENCE_CANVAS = (1920.0, 1080.0)
+
+# Families drawn with a standard PDF font when no TTF is installed for them
+SERIF_FAMILIES = {"georgia", "times", "times new roman", "playfair display", "merriweather", "lora", "garamond", "serif"}
+MONOSPACE_FAMILIES = {"courier", "courier new", "monospace", "fira code", "jetbrains mono", "source code pro"}
+
+# Directory of TTF files named like "Inter-Regular.ttf" / "Inter-Bold.ttf"
+FONT_DIR = os.environ.get("EXPORT_FONT_DIR")
+
+def positions_in_pixels(elements: List[Dict[str, Any]]) -> bool:
+    """
+    Whether a slide's element positions are editor pixels rather than percentages
+
+    Positions are documented as percentages of the slide, but the editor
+    stores pixels on its 1920x1080 canvas; any element reaching past 100
+    marks the slide as using pixels.
+    """
+    return any(
+        e['position'].get('x', 0) + e['position'].get('width', 0) > 100
+        or e['position'].get('y', 0) + e['position'].get('height', 0) > 100
+        for e in elements
+    )
+
+def text_align(style: Dict[str, Any]) -> str:
+    """
+    Horizontal alignment of a text element: left, center, right or justify
+
+    The editor stores it as `text_align`; generated and older slides use `align`.
+    """
+    return style.get('text_align') or style.get('align') or "left"
+
+@lru_cache(maxsize=None)
+def resolve_font(family: str, bold: bool) -> str:
+    """
+    ReportLab font name for a CSS family and weight
+
+    Uses a TTF from EXPORT_FONT_DIR when one is installed for the family
+    (registered once per process), otherwise the closest standard font.
+    """
+    if FONT_DIR:
+        face = "Bold" if bold else "Regular"
+        font_name = f"{family.replace(' ', '')}-{face}"
+        path = os.path.join(FONT_DIR, f"{font_name}.ttf")
+        if os.path.exists(path):
+            try:
+                pdfmetrics.registerFont(TTFont(font_name, path))
+                return font_name
+            except Exception as e:
+                logger.warning(f"Could not register font {path}: {e}")
+
+    key = family.lower().strip()
+    if key in SERIF_FAMILIES:
+        return "Times-Bold" if bold else "Times-Roman"
+    if key in MONOSPACE_FAMILIES:
+        return "Courier-Bold" if bold else "Courier"
+    return "Helvetica-Bold" if bold else "Helvetica"
+
+@lru_cache(maxsize=256)
+def parse_color(value: Optional[str], default: str = "#000000") -> colors.Color:
+    """ReportLab color for a CSS hex or named color"""
+    try:
+        return colors.toColor(value or default)
+    except Exception:
+        return colors.toColor(default)
+
+class CanvasPdfRenderer:
+    """
+    Draws each slide on its own canvas page, as laid out in the editor
+
+    Elements are placed from their positions, in z-index order, with their
+    text, image and shape styles, over the slide background. Positions are
+    read as percentages or editor pixels (see positions_in_pixels). Compiled text styles are cached across slides, and fonts are
+    resolved and registered once per process.
+    """
+
+    def __init__(self, images, page_size: Tuple[float, float] = SLIDE_PAGE_SIZE):
+        self.images = images
+        self.page_width, self.page_height = page_size
+        self.font_scale = self.page_width / REFERENCE_CANVAS[0]
+        self._text_styles: Dict[tuple, Dict[str, Any]] = {}
+
+    def render(
+        self,
+        output,
+        presentation_data: Dict[str, Any],
+        slides_data: List[Dict[str, Any]],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> None:
+        """Write one page per slide to `output` (a path or file object)"""
+        pdf = canvas.Canvas(output, pagesize=(self.page_width, self.page_height), pageCompression=1)
+        pdf.setTitle(presentation_data.get('title', 'Untitled Presentation'))
+        if presentation_data.get('description'):
+            pdf.setSubject(presentation_data['description'])
+
+        for idx, slide in enumerate(slides_data, 1):
+            self.draw_slide(pdf, slide)
+            pdf.showPage()
+            if progress:
+                progress(idx, len(slides_data))
+
+        pdf.save()
+
+    def draw_slide(self, pdf: canvas.Canvas, slide: Dict[str, Any]) -> None:
+        """Draw a slide's background and visible elements on the current page"""
+        self._draw_background(pdf, slide.get('background') or {})
+
+        elements = [e for e in slide.get('elements') or [] if e.get('visible', True) and e.get('position')]
+        in_pixels = positions_in_pixels(elements)
+
+        for element in sorted(elements, key=lambda e: e['position'].get('z_index', 0)):
+            box = self._box(element['position'], in_pixels)
+            try:
+                element_type = element.get('type')
+                if element_type == 'text':
+                    self._draw_text(pdf, element, box)
+                elif element_type == 'image':
+                    self._draw_image(pdf, element, box)
+                elif element_type == 'shape':
+                    self._draw_shape(pdf, element, box)
+            except MemoryError:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not draw element {element.get('id')}: {e}")
+
+    def _box(self, position: Dict[str, Any], in_pixels: bool) -> Tuple[float, float, float, float]:
+        """(x, y, width, height) in points from the page's bottom-left corner"""
+        if in_pixels:
+            sx, sy = self.page_width / REFERENCE_CANVAS[0], self.page_height / REFERENCE_CANVAS[1]
+        else:
+            sx, sy = self.page_width / 100, self.page_height / 100
+        width = position.get('width', 0) * sx
+        height = position.get('height', 0) * sy
+        x = position.get('x', 0) * sx
+        y = self.page_height - position.get('y', 0) * sy - height
+        return x, y, width, height
+
+    def _draw_background(self, pdf: canvas.Canvas, background: Dict[str, Any]) -> None:
+        pdf.saveState()
+        pdf.setFillAlpha(background.get('opacity', 1.0))
+
+        gradient_colors = self._gradient_colors(background)
+        if background.get('type') == 'gradient' and gradient_colors:
+            angle = math.radians((background.get('gradient') or {}).get('angle', 135) - 90)
+            cx, cy = self.page_width / 2, self.page_height / 2
+            dx, dy = math.cos(angle) * self.page_width / 2, -math.sin(angle) * self.page_height / 2
+            pdf.linearGradient(cx - dx, cy - dy, cx + dx, cy + dy, gradient_colors, extend=True)
+        else:
+            pdf.setFillColor(parse_color(background.get('color'), "#FFFFFF"))
+            pdf.rect(0, 0, self.page_width, self.page_height, stroke=0, fill=1)
+
+        image_url = background.get('image_url')
+        if background.get('type') == 'image' and image_url:
+            path = self.images.get(image_url, self.page_width, self.page_height, cover=True)
+            if path:
+                self._draw_image_file(pdf, path, (0, 0, self.page_width, self.page_height), "cover")
+
+        pdf.restoreState()
+
+    @staticmethod
+    def _gradient_colors(background: Dict[str, Any]) -> List[colors.Color]:
+        gradient = background.get('gradient') or {}
+        stops = gradient.get('colors') or [c for c in (gradient.get('from'), gradient.get('to')) if c]
+        return [parse_color(c) for c in stops] if len(stops) >= 2 else []
+
+    def _text_style(self, style: Dict[str, Any]) -> Dict[str, Any]:
+        """Compile an element's text style into drawing parameters (cached)"""
+        key = tuple(sorted((k, str(v)) for k, v in style.items()))
+        compiled = self._text_styles.get(key)
+        if compiled is None:
+            font_size = float(style.get('font_size') or 16) * self.font_scale
+            compiled = {
+                "font": resolve_font(style.get('font_family') or "Inter", int(style.get('font_weight') or 400) >= 600),
+                "size": font_size,
+                "leading": font_size * float(style.get('line_height') or 1.2),
+                "color": parse_color(style.get('color')),
+                "align": text_align(style),
+                "vertical_align": style.get('vertical_align') or "top",
+                "char_space": float(style.get('letter_spacing') or 0) * self.font_scale
+            }
+            self._text_styles[key] = compiled
+        return compiled
+
+    def _draw_text(self, pdf: canvas.Canvas, element: Dict[str, Any], box: Tuple[float, float, float, float]) -> None:
+        text = (element.get('content') or {}).get('text') or ''
+        if not text.strip():
+            return
+
+        style = self._text_style(element.get('style') or {})
+        x, y, width, height = box
+
+        lines = []
+        for paragraph in text.split('\n'):
+            lines.extend(simpleSplit(paragraph, style["font"], style["size"], width) or [''])
+
+        block_height = len(lines) * style["leading"]
+        if style["vertical_align"] == "middle":
+            top = y + (height + block_height) / 2
+        elif style["vertical_align"] == "bottom":
+            top = y + block_height
+        else:
+            top = y + height
+
+        pdf.saveState()
+        clip = pdf.beginPath()
+        clip.rect(x, y, width, height)
+        pdf.clipPath(clip, stroke=0, fill=0)
+
+        text_object = pdf.beginText()
+        text_object.setFont(style["font"], style["size"], style["leading"])
+        text_object.setFillColor(style["color"])
+        text_object.setCharSpace(style["char_space"])
+
+        baseline = top - style["size"]
+        for line in lines:
+            line_width = pdfmetrics.stringWidth(line, style["font"], style["size"]) + style["char_space"] * max(0, len(line) - 1)
+            if style["align"] == "center":
+                line_x = x + (width - line_width) / 2
+            elif style["align"] == "right":
+                line_x = x + width - line_width
+            else:
+                line_x = x
+            text_object.setTextOrigin(line_x, baseline)
+            text_object.textOut(line)
+            baseline -= style["leading"]
+
+        pdf.drawText(text_object)
+        pdf.restoreState()
+
+    def _draw_image(self, pdf: canvas.Canvas, element: Dict[str, Any], box: Tuple[float, float, float, float]) -> None:
+        content = element.get('content') or {}
+        style = element.get('style') or {}
+        image_url = content.get('url') or content.get('image_url') or ''
+        fit = style.get('object_fit') or "cover"
+
+        path = self.images.get(image_url, box[2], box[3], cover=(fit == "cover"))
+        if not path:
+            return
+
+        pdf.saveState()
+        pdf.setFillAlpha(float(style.get('opacity', 1.0)))
+        radius = float(style.get('border_radius') or 0) * self.font_scale
+        if radius:
+            clip = pdf.beginPath()
+            clip.roundRect(*box, radius)
+            pdf.clipPath(clip, stroke=0, fill=0)
+        self._draw_image_file(pdf, path, box, fit)
+        pdf.restoreState()
+
+    @staticmethod
+    def _draw_image_file(pdf: canvas.Canvas, path: str, box: Tuple[float, float, float, float], fit: str) -> None:
+        x, y, width, height = box
+        image_width, image_height = ImageReader(path).getSize()
+
+        if fit == "fill":
+            pdf.drawImage(path, x, y, width, height, mask='auto')
+            return
+
+        scale = (max if fit == "cover" else min)(width / image_width, height / image_height)
+        draw_width, draw_height = image_width * scale, image_height * scale
+        draw_x, draw_y = x + (width - draw_width) / 2, y + (height - draw_height) / 2
+
+        if fit == "cover":
+            pdf.saveState()
+            clip = pdf.beginPath()
+            clip.rect(x, y, width, height)
+            pdf.clipPath(clip, stroke=0, fill=0)
+            pdf.drawImage(path, draw_x, draw_y, draw_width, draw_height, mask='auto')
+            pdf.restoreState()
+        else:
+            pdf.drawImage(path, draw_x, draw_y, draw_width, draw_height, mask='auto')
+
+    def _draw_shape(self, pdf: canvas.Canvas, element: Dict[str, Any], box: Tuple[float, float, float, float]) -> None:
+        content = element.get('content') or {}
+        style = element.get('style') or {}
+        x, y, width, height = box
+
+        fill = style.get('fill_color') or style.get('fill') or "#3B82F6"
+        stroke = style.get('stroke_color') or style.get('stroke')
+        stroke_width = float(style.get('stroke_width') or 0) * self.font_scale
+
+        pdf.saveState()
+        pdf.setFillColor(parse_color(fill))
+        pdf.setFillAlpha(float(style.get('opacity', 1.0)))
+        if stroke and stroke_width:
+            pdf.setStrokeColor(parse_color(stroke))
+            pdf.setLineWidth(stroke_width)
+
+        draw_stroke = 1 if stroke and stroke_width else 0
+        shape = content.get('shape_type') or content.get('shape') or "rectangle"
+        if shape == "circle":
+            pdf.ellipse(x, y, x + width, y + height, stroke=draw_stroke, fill=1)
+        elif style.get('border_radius'):
+            pdf.roundRect(x, y, width, height, float(style['border_radius']) * self.font_scale, stroke=draw_stroke, fill=1)
+        else:
+            pdf.rect(x, y, width, height, stroke=draw_stroke, fill=1)
+        pdf.restoreState()
@@ -0,0 +1,507 @@
+from xml.sax.saxutils import escape
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from datetime import datetime, timezone
+import hashlib
+import logging
+import re
+import zipfile
+
+from reportlab.lib.utils import ImageReader
+from services.pdf_canvas_renderer import REFERENCE_CANVAS, parse_color, positions_in_pixels, text_align
+
+logger = logging.getLogger(__name__)
+
+# 16:9 slide, 13.33 x 7.5 in
+SLIDE_WIDTH_EMU = 12192000
+SLIDE_HEIGHT_EMU = 6858000
+EMU_PER_POINT = 12700
+
+# Editor pixels -> points on a 13.33 in (960 pt) wide slide
+POINTS_PER_PIXEL = 960 / REFERENCE_CANVAS[0]
+
+NS = (
+    'xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" '
+    'xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main"'
+)
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+CT = "application/vnd.openxmlformats-officedocument"
+
+EMPTY_GROUP = (
+    '<p:nvGrpSpPr><p:cNvPr id="1" name=""/><p:cNvGrpSpPr/><p:nvPr/></p:nvGrpSpPr>'
+    '<p:grpSpPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="0" cy="0"/>'
+    '<a:chOff x="0" y="0"/><a:chExt cx="0" cy="0"/></a:xfrm></p:grpSpPr>'
+)
+
+THEME_XML = XML_HEADER + (
+    '<a:theme xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" name="Export">'
+    '<a:themeElements>'
+    '<a:clrScheme name="Export">'
+    '<a:dk1><a:srgbClr val="000000"/></a:dk1><a:lt1><a:srgbClr val="FFFFFF"/></a:lt1>'
+    '<a:dk2><a:srgbClr val="1F2937"/></a:dk2><a:lt2><a:srgbClr val="F3F4F6"/></a:lt2>'
+    '<a:accent1><a:srgbClr val="2563EB"/></a:accent1><a:accent2><a:srgbClr val="7C3AED"/></a:accent2>'
+    '<a:accent3><a:srgbClr val="059669"/></a:accent3><a:accent4><a:srgbClr val="D97706"/></a:accent4>'
+    '<a:accent5><a:srgbClr val="DC2626"/></a:accent5><a:accent6><a:srgbClr val="0891B2"/></a:accent6>'
+    '<a:hlink><a:srgbClr val="2563EB"/></a:hlink><a:folHlink><a:srgbClr val="7C3AED"/></a:folHlink>'
+    '</a:clrScheme>'
+    '<a:fontScheme name="Export">'
+    '<a:majorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:majorFont>'
+    '<a:minorFont><a:latin typeface="Calibri"/><a:ea typeface=""/><a:cs typeface=""/></a:minorFont>'
+    '</a:fontScheme>'
+    '<a:fmtScheme name="Export">'
+    '<a:fillStyleLst>'
+    '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    '</a:fillStyleLst>'
+    '<a:lnStyleLst>'
+    '<a:ln w="6350"><a:solidFill><a:schemeClr val="phClr"/></a:solidFill></a:ln>'
+    '<a:ln w="12700"><a:solidFill><a:schemeClr val="phClr"/></a:solidFill></a:ln>'
+    '<a:ln w="19050"><a:solidFill><a:schemeClr val="phClr"/></a:solidFill></a:ln>'
+    '</a:lnStyleLst>'
+    '<a:effectStyleLst>'
+    '<a:effectStyle><a:effectLst/></a:effectStyle>'
+    '<a:effectStyle><a:effectLst/></a:effectStyle>'
+    '<a:effectStyle><a:effectLst/></a:effectStyle>'
+    '</a:effectStyleLst>'
+    '<a:bgFillStyleLst>'
+    '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    '<a:solidFill><a:schemeClr val="phClr"/></a:solidFill>'
+    '</a:bgFillStyleLst>'
+    '</a:fmtScheme>'
+    '</a:themeElements>'
+    '</a:theme>'
+)
+
+CLR_MAP = (
+    'bg1="lt1" tx1="dk1" bg2="lt2" tx2="dk2" accent1="accent1" accent2="accent2" accent3="accent3" '
+    'accent4="accent4" accent5="accent5" accent6="accent6" hlink="hlink" folHlink="folHlink"'
+)
+
+SLIDE_MASTER_XML = XML_HEADER + (
+    f'<p:sldMaster {NS}>'
+    '<p:cSld><p:bg><p:bgRef idx="1001"><a:schemeClr val="bg1"/></p:bgRef></p:bg>'
+    f'<p:spTree>{EMPTY_GROUP}</p:spTree></p:cSld>'
+    f'<p:clrMap {CLR_MAP}/>'
+    '<p:sldLayoutIdLst><p:sldLayoutId id="2147483649" r:id="rId1"/></p:sldLayoutIdLst>'
+    '<p:txStyles>'
+    '<p:titleStyle><a:lvl1pPr><a:defRPr sz="4400"/></a:lvl1pPr></p:titleStyle>'
+    '<p:bodyStyle><a:lvl1pPr><a:defRPr sz="2000"/></a:lvl1pPr></p:bodyStyle>'
+    '<p:otherStyle><a:lvl1pPr><a:defRPr sz="1800"/></a:lvl1pPr></p:otherStyle>'
+    '</p:txStyles>'
+    '</p:sldMaster>'
+)
+
+SLIDE_LAYOUT_XML = XML_HEADER + (
+    f'<p:sldLayout {NS} type="blank" preserve="1">'
+    f'<p:cSld name="Blank"><p:spTree>{EMPTY_GROUP}</p:spTree></p:cSld>'
+    '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr>'
+    '</p:sldLayout>'
+)
+
+NOTES_MASTER_XML = XML_HEADER + (
+    f'<p:notesMaster {NS}>'
+    f'<p:cSld><p:spTree>{EMPTY_GROUP}'
+    '<p:sp><p:nvSpPr><p:cNvPr id="2" name="Slide Image Placeholder 1"/>'
+    '<p:cNvSpPr><a:spLocks noGrp="1" noRot="1" noChangeAspect="1"/></p:cNvSpPr>'
+    '<p:nvPr><p:ph type="sldImg" idx="2"/></p:nvPr></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="381000" y="685800"/><a:ext cx="6096000" cy="3429000"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr></p:sp>'
+    '<p:sp><p:nvSpPr><p:cNvPr id="3" name="Notes Placeholder 2"/>'
+    '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+    '<p:nvPr><p:ph type="body" sz="quarter" idx="3"/></p:nvPr></p:nvSpPr>'
+    '<p:spPr><a:xfrm><a:off x="685800" y="4343400"/><a:ext cx="5486400" cy="4114800"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></p:spPr>'
+    '<p:txBody><a:bodyPr/><a:lstStyle/><a:p><a:endParaRPr lang="en-US"/></a:p></p:txBody></p:sp>'
+    '</p:spTree></p:cSld>'
+    f'<p:clrMap {CLR_MAP}/>'
+    '</p:notesMaster>'
+)
+
+def _rels(relationships: List[Tuple[str, str, str]]) -> str:
+    """Relationships part for [(id, type, target)]"""
+    items = "".join(
+        f'<Relationship Id="{rel_id}" Type="{rel_type}" Target="{escape(target)}"/>'
+        for rel_id, rel_type, target in relationships
+    )
+    return XML_HEADER + f'<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">{items}</Relationships>'
+
+# C0 control characters other than tab, newline and carriage return are not
+# allowed in XML 1.0; PowerPoint refuses to open a file containing one
+INVALID_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+def _xml_text(value: str, entities: Optional[Dict[str, str]] = None) -> str:
+    """Escape text for XML, dropping characters XML cannot represent"""
+    return escape(INVALID_XML_CHARS.sub("", value), entities or {})
+
+def _runs(line: str, run_properties: str) -> str:
+    """Runs for one paragraph; a vertical tab (soft return) becomes a line break"""
+    return "<a:br/>".join(
+        f'<a:r>{run_properties}<a:t>{_xml_text(part)}</a:t></a:r>' if part else ''
+        for part in line.split("\v")
+    )
+
+def _hex(value: Optional[str], default: str) -> str:
+    return parse_color(value, default).hexval()[2:].upper()
+
+def _xfrm(x: int, y: int, width: int, height: int) -> str:
+    return f'<a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+
+class PptxWriter:
+    """
+    Writes a PowerPoint (OOXML) file one slide at a time
+
+    Each slide's XML, notes and new media are written to the zip as soon as
+    the slide is added, so memory holds one slide at a time regardless of
+    deck size. Media parts are keyed by a hash of their bytes, so an image
+    repeated across slides is stored once and referenced from each. The
+    package-level parts (presentation, content types) are written by `close`
+    once every slide is known.
+
+    Element positions, text styles, shapes and backgrounds are mapped the
+    same way as CanvasPdfRenderer draws them.
+    """
+
+    def __init__(self, output, images):
+        self.images = images
+        self.zip = zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED)
+        self.slide_count = 0
+        self.notes_slides: List[int] = []
+        self._media: Dict[str, str] = {}
+        self._media_extensions = set()
+
+    def add_slide(self, slide: Dict[str, Any]) -> None:
+        """Write one slide (and its notes) to the package"""
+        self.slide_count += 1
+        number = self.slide_count
+        relationships = [("rId1", f"{REL}/slideLayout", "../slideLayouts/slideLayout1.xml")]
+
+        elements = [e for e in slide.get('elements') or [] if e.get('visible', True) and e.get('position')]
+        in_pixels = positions_in_pixels(elements)
+
+        shapes = []
+        for shape_id, element in enumerate(sorted(elements, key=lambda e: e['position'].get('z_index', 0)), 2):
+            try:
+                box = self._box(element['position'], in_pixels)
+                element_type = element.get('type')
+                if element_type == 'text':
+                    shapes.append(self._text_shape(shape_id, element, box))
+                elif element_type == 'image':
+                    shapes.append(self._picture(shape_id, element, box, relationships))
+                elif element_type == 'shape':
+                    shapes.append(self._shape(shape_id, element, box))
+            except MemoryError:
+                raise
+            except Exception as e:
+                logger.warning(f"Could not export element {element.get('id')} to PPTX: {e}")
+
+        background = self._background(slide.get('background') or {}, relationships)
+        xml = XML_HEADER + (
+            f'<p:sld {NS}><p:cSld>{background}<p:spTree>{EMPTY_GROUP}{"".join(s for s in shapes if s)}</p:spTree></p:cSld>'
+            '<p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:sld>'
+        )
+
+        notes = (slide.get('notes') or '').strip()
+        if notes:
+            relationships.append((f"rId{len(relationships) + 1}", f"{REL}/notesSlide", f"../notesSlides/notesSlide{number}.xml"))
+            self._write_notes(number, notes)
+
+        self.zip.writestr(f"ppt/slides/slide{number}.xml", xml)
+        self.zip.writestr(f"ppt/slides/_rels/slide{number}.xml.rels", _rels(relationships))
+
+    def close(self, presentation_data: Dict[str, Any]) -> None:
+        """Write the package-level parts and finish the zip"""
+        slide_ids = "".join(
+            f'<p:sldId id="{255 + n}" r:id="rId{n + 10}"/>' for n in range(1, self.slide_count + 1)
+        )
+        self.zip.writestr("ppt/presentation.xml", XML_HEADER + (
+            f'<p:presentation {NS} saveSubsetFonts="1">'
+            '<p:sldMasterIdLst><p:sldMasterId id="2147483648" r:id="rId1"/></p:sldMasterIdLst>'
+            '<p:notesMasterIdLst><p:notesMasterId r:id="rId3"/></p:notesMasterIdLst>'
+            f'<p:sldIdLst>{slide_ids}</p:sldIdLst>'
+            f'<p:sldSz cx="{SLIDE_WIDTH_EMU}" cy="{SLIDE_HEIGHT_EMU}"/>'
+            '<p:notesSz cx="6858000" cy="9144000"/>'
+            '</p:presentation>'
+        ))
+        self.zip.writestr("ppt/_rels/presentation.xml.rels", _rels(
+            [
+                ("rId1", f"{REL}/slideMaster", "slideMasters/slideMaster1.xml"),
+                ("rId2", f"{REL}/theme", "theme/theme1.xml"),
+                ("rId3", f"{REL}/notesMaster", "notesMasters/notesMaster1.xml")
+            ]
+            + [(f"rId{n + 10}", f"{REL}/slide", f"slides/slide{n}.xml") for n in range(1, self.slide_count + 1)]
+        ))
+
+        self.zip.writestr("ppt/slideMasters/slideMaster1.xml", SLIDE_MASTER_XML)
+        self.zip.writestr("ppt/slideMasters/_rels/slideMaster1.xml.rels", _rels([
+            ("rId1", f"{REL}/slideLayout", "../slideLayouts/slideLayout1.xml"),
+            ("rId2", f"{REL}/theme", "../theme/theme1.xml")
+        ]))
+        self.zip.writestr("ppt/slideLayouts/slideLayout1.xml", SLIDE_LAYOUT_XML)
+        self.zip.writestr("ppt/slideLayouts/_rels/slideLayout1.xml.rels", _rels([
+            ("rId1", f"{REL}/slideMaster", "../slideMasters/slideMaster1.xml")
+        ]))
+        self.zip.writestr("ppt/notesMasters/notesMaster1.xml", NOTES_MASTER_XML)
+        self.zip.writestr("ppt/notesMasters/_rels/notesMaster1.xml.rels", _rels([
+            ("rId1", f"{REL}/theme", "../theme/theme2.xml")
+        ]))
+        self.zip.writestr("ppt/theme/theme1.xml", THEME_XML)
+        self.zip.writestr("ppt/theme/theme2.xml", THEME_XML)
+
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self.zip.writestr("docProps/core.xml", XML_HEADER + (
+            '<cp:coreProperties xmlns:cp="http://schemas.openxmlformats.org/package/2006/metadata/core-properties" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:dcterms="http://purl.org/dc/terms/" '
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+            f'<dc:title>{_xml_text(presentation_data.get("title") or "Untitled Presentation")}</dc:title>'
+            f'<dc:description>{_xml_text(presentation_data.get("description") or "")}</dc:description>'
+            f'<dcterms:created xsi:type="dcterms:W3CDTF">{now}</dcterms:created>'
+            f'<dcterms:modified xsi:type="dcterms:W3CDTF">{now}</dcterms:modified>'
+            '</cp:coreProperties>'
+        ))
+        self.zip.writestr("docProps/app.xml", XML_HEADER + (
+            '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+            f'<Application>Slide Export</Application><Slides>{self.slide_count}</Slides><Notes>{len(self.notes_slides)}</Notes>'
+            '</Properties>'
+        ))
+        self.zip.writestr("_rels/.rels", _rels([
+            ("rId1", f"{REL}/officeDocument", "ppt/presentation.xml"),
+            ("rId2", "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties", "docProps/core.xml"),
+            ("rId3", f"{REL}/extended-properties", "docProps/app.xml")
+        ]))
+        self.zip.writestr("[Content_Types].xml", self._content_types())
+        self.zip.close()
+
+    def _content_types(self) -> str:
+        pml = f"{CT}.presentationml"
+        overrides = [
+            ("/ppt/presentation.xml", f"{pml}.presentation.main+xml"),
+            ("/ppt/slideMasters/slideMaster1.xml", f"{pml}.slideMaster+xml"),
+            ("/ppt/slideLayouts/slideLayout1.xml", f"{pml}.slideLayout+xml"),
+            ("/ppt/notesMasters/notesMaster1.xml", f"{pml}.notesMaster+xml"),
+            ("/ppt/theme/theme1.xml", f"{CT}.theme+xml"),
+            ("/ppt/theme/theme2.xml", f"{CT}.theme+xml"),
+            ("/docProps/core.xml", "application/vnd.openxmlformats-package.core-properties+xml"),
+            ("/docProps/app.xml", f"{CT}.extended-properties+xml")
+        ]
+        overrides += [(f"/ppt/slides/slide{n}.xml", f"{pml}.slide+xml") for n in range(1, self.slide_count + 1)]
+        overrides += [(f"/ppt/notesSlides/notesSlide{n}.xml", f"{pml}.notesSlide+xml") for n in self.notes_slides]
+
+        defaults = [
+            ("rels", "application/vnd.openxmlformats-package.relationships+xml"),
+            ("xml", "application/xml")
+        ]
+        defaults += [(ext, "image/png" if ext == "png" else "image/jpeg") for ext in sorted(self._media_extensions)]
+
+        return XML_HEADER + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            + "".join(f'<Default Extension="{ext}" ContentType="{ct}"/>' for ext, ct in defaults)
+            + "".join(f'<Override PartName="{part}" ContentType="{ct}"/>' for part, ct in overrides)
+            + '</Types>'
+        )
+
+    def _write_notes(self, number: int, notes: str) -> None:
+        run_properties = '<a:rPr lang="en-US" dirty="0"/>'
+        paragraphs = "".join(f'<a:p>{_runs(line, run_properties)}</a:p>' for line in notes.split("\n"))
+        self.zip.writestr(f"ppt/notesSlides/notesSlide{number}.xml", XML_HEADER + (
+            f'<p:notes {NS}><p:cSld><p:spTree>{EMPTY_GROUP}'
+            '<p:sp><p:nvSpPr><p:cNvPr id="2" name="Slide Image Placeholder 1"/>'
+            '<p:cNvSpPr><a:spLocks noGrp="1" noRot="1" noChangeAspect="1"/></p:cNvSpPr>'
+            '<p:nvPr><p:ph type="sldImg"/></p:nvPr></p:nvSpPr><p:spPr/></p:sp>'
+            '<p:sp><p:nvSpPr><p:cNvPr id="3" name="Notes Placeholder 2"/>'
+            '<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+            '<p:nvPr><p:ph type="body" idx="1"/></p:nvPr></p:nvSpPr><p:spPr/>'
+            f'<p:txBody><a:bodyPr/><a:lstStyle/>{paragraphs}</p:txBody></p:sp>'
+            '</p:spTree></p:cSld><p:clrMapOvr><a:masterClrMapping/></p:clrMapOvr></p:notes>'
+        ))
+        self.zip.writestr(f"ppt/notesSlides/_rels/notesSlide{number}.xml.rels", _rels([
+            ("rId1", f"{REL}/notesMaster", "../notesMasters/notesMaster1.xml"),
+            ("rId2", f"{REL}/slide", f"../slides/slide{number}.xml")
+        ]))
+        self.notes_slides.append(number)
+
+    def _box(self, position: Dict[str, Any], in_pixels: bool) -> Tuple[int, int, int, int]:
+        """(x, y, width, height) in EMU from the slide's top-left corner"""
+        if in_pixels:
+            sx, sy = SLIDE_WIDTH_EMU / REFERENCE_CANVAS[0], SLIDE_HEIGHT_EMU / REFERENCE_CANVAS[1]
+        else:
+            sx, sy = SLIDE_WIDTH_EMU / 100, SLIDE_HEIGHT_EMU / 100
+        return (
+            round(position.get('x', 0) * sx),
+            round(position.get('y', 0) * sy),
+            max(1, round(position.get('width', 0) * sx)),
+            max(1, round(position.get('height', 0) * sy))
+        )
+
+    def _media_part(self, path: str) -> str:
+        """Store an image file as a media part once per distinct content; returns the part name"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        part = self._media.get(digest)
+        if part is None:
+            extension = "png" if path.endswith(".png") else "jpeg"
+            part = f"media/image{len(self._media) + 1}.{extension}"
+            self.zip.writestr(f"ppt/{part}", data, compress_type=zipfile.ZIP_STORED)
+            self._media[digest] = part
+            self._media_extensions.add(extension)
+        return part
+
+    def _image_relationship(self, image_url: str, width_emu: int, height_emu: int, cover: bool, relationships: list) -> Optional[Tuple[str, str]]:
+        """Relationship ID and file path for an image sized to a box, or None if unavailable"""
+        path = self.images.get(image_url, width_emu / EMU_PER_POINT, height_emu / EMU_PER_POINT, cover=cover)
+        if not path:
+            return None
+        part = self._media_part(path)
+        rel_id = f"rId{len(relationships) + 1}"
+        relationships.append((rel_id, f"{REL}/image", f"../{part}"))
+        return rel_id, path
+
+    @staticmethod
+    def _cover_crop(path: str, width: int, height: int) -> str:
+        """srcRect cropping an image to the box's aspect ratio, centered"""
+        image_width, image_height = ImageReader(path).getSize()
+        image_ratio, box_ratio = image_width / image_height, width / height
+        if image_ratio > box_ratio:
+            crop = round((1 - box_ratio / image_ratio) / 2 * 100000)
+            return f'<a:srcRect l="{crop}" r="{crop}"/>'
+        crop = round((1 - image_ratio / box_ratio) / 2 * 100000)
+        return f'<a:srcRect t="{crop}" b="{crop}"/>'
+
+    def _background(self, background: Dict[str, Any], relationships: list) -> str:
+        fill = None
+        alpha = self._alpha(background.get('opacity', 1.0))
+        gradient = background.get('gradient') or {}
+        stops = gradient.get('colors') or [c for c in (gradient.get('from'), gradient.get('to')) if c]
+
+        if background.get('type') == 'image' and background.get('image_url'):
+            image = self._image_relationship(background['image_url'], SLIDE_WIDTH_EMU, SLIDE_HEIGHT_EMU, True, relationships)
+            if image:
+                rel_id, path = image
+                fill = (
+                    f'<a:blipFill><a:blip r:embed="{rel_id}"/>{self._cover_crop(path, SLIDE_WIDTH_EMU, SLIDE_HEIGHT_EMU)}'
+                    '<a:stretch><a:fillRect/></a:stretch></a:blipFill>'
+                )
+        elif background.get('type') == 'gradient' and len(stops) >= 2:
+            gradient_stops = "".join(
+                f'<a:gs pos="{round(i * 100000 / (len(stops) - 1))}"><a:srgbClr val="{_hex(color, "#FFFFFF")}">{alpha}</a:srgbClr></a:gs>'
+                for i, color in enumerate(stops)
+            )
+            angle = round(((gradient.get('angle', 135) - 90) % 360) * 60000)
+            fill = f'<a:gradFill rotWithShape="1"><a:gsLst>{gradient_stops}</a:gsLst><a:lin ang="{angle}" scaled="0"/></a:gradFill>'
+
+        if fill is None:
+            fill = f'<a:solidFill><a:srgbClr val="{_hex(background.get("color"), "#FFFFFF")}">{alpha}</a:srgbClr></a:solidFill>'
+        return f'<p:bg><p:bgPr>{fill}<a:effectLst/></p:bgPr></p:bg>'
+
+    @staticmethod
+    def _alpha(opacity: Any) -> str:
+        opacity = float(opacity if opacity is not None else 1.0)
+        return f'<a:alpha val="{round(opacity * 100000)}"/>' if opacity < 1 else ""
+
+    def _text_shape(self, shape_id: int, element: Dict[str, Any], box: Tuple[int, int, int, int]) -> str:
+        text = (element.get('content') or {}).get('text') or ''
+        style = element.get('style') or {}
+
+        size = round(float(style.get('font_size') or 16) * POINTS_PER_PIXEL * 100)
+        bold = ' b="1"' if int(style.get('font_weight') or 400) >= 600 else ''
+        spacing = round(float(style.get('letter_spacing') or 0) * POINTS_PER_PIXEL * 100)
+        color = _hex(style.get('color'), "#000000")
+        font = _xml_text(style.get('font_family') or "Inter", {'"': "&quot;"})
+        align = {"center": "ctr", "right": "r", "justify": "just"}.get(text_align(style), "l")
+        anchor = {"middle": "ctr", "bottom": "b"}.get(style.get('vertical_align'), "t")
+        line_spacing = round(float(style.get('line_height') or 1.2) * 100000)
+
+        run_properties = (
+            f'<a:rPr lang="en-US" sz="{size}"{bold} spc="{spacing}" dirty="0">'
+            f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill><a:latin typeface="{font}"/></a:rPr>'
+        )
+        paragraphs = "".join(
+            f'<a:p><a:pPr algn="{align}"><a:lnSpc><a:spcPct val="{line_spacing}"/></a:lnSpc></a:pPr>'
+            + _runs(line, run_properties)
+            + f'<a:endParaRPr lang="en-US" sz="{size}"/></a:p>'
+            for line in text.split("\n")
+        )
+
+        return (
+            f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Text {shape_id}"/><p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr>{_xfrm(*box)}<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+            f'<p:txBody><a:bodyPr wrap="square" lIns="0" tIns="0" rIns="0" bIns="0" anchor="{anchor}"><a:noAutofit/></a:bodyPr>'
+            f'<a:lstStyle/>{paragraphs}</p:txBody></p:sp>'
+        )
+
+    def _picture(self, shape_id: int, element: Dict[str, Any], box: Tuple[int, int, int, int], relationships: list) -> Optional[str]:
+        content = element.get('content') or {}
+        style = element.get('style') or {}
+        fit = style.get('object_fit') or "cover"
+        x, y, width, height = box
+
+        image = self._image_relationship(content.get('url') or content.get('image_url') or '', width, height, fit == "cover", relationships)
+        if not image:
+            return None
+        rel_id, path = image
+
+        crop = ""
+        if fit == "cover":
+            crop = self._cover_crop(path, width, height)
+        elif fit == "contain":
+            image_width, image_height = ImageReader(path).getSize()
+            scale = min(width / image_width, height / image_height)
+            fitted_width, fitted_height = round(image_width * scale), round(image_height * scale)
+            x, y = x + (width - fitted_width) // 2, y + (height - fitted_height) // 2
+            width, height = fitted_width, fitted_height
+
+        opacity = float(style.get('opacity', 1.0))
+        alpha = f'<a:alphaModFix amt="{round(opacity * 100000)}"/>' if opacity < 1 else ""
+        geometry = "roundRect" if style.get('border_radius') else "rect"
+        description = _xml_text(content.get('alt') or "Slide image", {'"': "&quot;"})
+
+        return (
+            f'<p:pic><p:nvPicPr><p:cNvPr id="{shape_id}" name="Picture {shape_id}" descr="{description}"/>'
+            '<p:cNvPicPr><a:picLocks noChangeAspect="1"/></p:cNvPicPr><p:nvPr/></p:nvPicPr>'
+            f'<p:blipFill><a:blip r:embed="{rel_id}">{alpha}</a:blip>{crop}<a:stretch><a:fillRect/></a:stretch></p:blipFill>'
+            f'<p:spPr>{_xfrm(x, y, width, height)}<a:prstGeom prst="{geometry}"><a:avLst/></a:prstGeom></p:spPr></p:pic>'
+        )
+
+    def _shape(self, shape_id: int, element: Dict[str, Any], box: Tuple[int, int, int, int]) -> str:
+        content = element.get('content') or {}
+        style = element.get('style') or {}
+
+        shape = content.get('shape_type') or content.get('shape') or "rectangle"
+        geometry = "ellipse" if shape == "circle" else "roundRect" if style.get('border_radius') else "rect"
+        fill = _hex(style.get('fill_color') or style.get('fill'), "#3B82F6")
+        alpha = self._alpha(style.get('opacity', 1.0))
+
+        stroke = style.get('stroke_color') or style.get('stroke')
+        stroke_width = float(style.get('stroke_width') or 0)
+        if stroke and stroke_width:
+            line = f'<a:ln w="{round(stroke_width * POINTS_PER_PIXEL * EMU_PER_POINT)}"><a:solidFill><a:srgbClr val="{_hex(stroke, "#000000")}"/></a:solidFill></a:ln>'
+        else:
+            line = '<a:ln><a:noFill/></a:ln>'
+
+        return (
+            f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="Shape {shape_id}"/><p:cNvSpPr/><p:nvPr/></p:nvSpPr>'
+            f'<p:spPr>{_xfrm(*box)}<a:prstGeom prst="{geometry}"><a:avLst/></a:prstGeom>'
+            f'<a:solidFill><a:srgbClr val="{fill}">{alpha}</a:srgbClr></a:solidFill>{line}</p:spPr></p:sp>'
+        )
+
+def write_pptx(
+    output,
+    presentation_data: Dict[str, Any],
+    slides_data: List[Dict[str, Any]],
+    images,
+    progress: Optional[Callable[[int, int], None]] = None
+) -> None:
+    """Write a whole deck to `output` (a path or file object) with PptxWriter"""
+    writer = PptxWriter(output, images)
+    try:
+        for idx, slide in enumerate(slides_data, 1):
+            writer.add_slide(slide)
+            if progress:
+                progress(idx, len(slides_data))
+        writer.close(presentation_data)
+    except Exception:
+        writer.zip.close()
+        raise
@@ -0,0 +1,314 @@
+from datetime import datetime, timezone
+from html import escape
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+
+from services.blob_store import get_blob_store
+from services.pdf_canvas_renderer import REFERENCE_CANVAS, positions_in_pixels, text_align
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; snapshots are then gzip-only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes so republishing writes new files
+SNAPSHOT_FORMAT_VERSION = 2
+
+# Files in a snapshot and their media types
+SNAPSHOT_FILES = {
+    "deck.json": "application/json",
+    "index.html": "text/html; charset=utf-8"
+}
+
+# Presentation fields that stay out of a public snapshot
+PRIVATE_FIELDS = {"_id", "user_id", "share_token", "view_count"}
+
+# Share tokens come from secrets.token_urlsafe, snapshot IDs are hex digests
+_TOKEN_PATTERN = re.compile(r"^[A-Za-z0-9_-]{16,128}$")
+_SNAPSHOT_ID_PATTERN = re.compile(r"^[0-9a-f]{16}$")
+
+def _json_default(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+def _percent_box(position: Dict[str, Any], in_pixels: bool) -> str:
+    sx, sy = (100 / REFERENCE_CANVAS[0], 100 / REFERENCE_CANVAS[1]) if in_pixels else (1, 1)
+    return (
+        f"left:{position.get('x', 0) * sx:.3f}%;top:{position.get('y', 0) * sy:.3f}%;"
+        f"width:{position.get('width', 0) * sx:.3f}%;height:{position.get('height', 0) * sy:.3f}%;"
+        f"z-index:{int(position.get('z_index', 0))}"
+    )
+
+def _render_slide_html(slide: Dict[str, Any]) -> str:
+    """One slide as absolutely positioned HTML, sized in percent of a 16:9 frame"""
+    background = slide.get("background") or {}
+    if background.get("type") == "image" and background.get("image_url"):
+        slide_style = f"background:url('{escape(background['image_url'])}') center/cover"
+    else:
+        slide_style = f"background:{escape(background.get('color') or '#FFFFFF')}"
+
+    elements = [e for e in slide.get("elements") or [] if e.get("visible", True) and e.get("position")]
+    in_pixels = positions_in_pixels(elements)
+    parts = []
+    for element in elements:
+        box = _percent_box(element["position"], in_pixels)
+        style = element.get("style") or {}
+        content = element.get("content") or {}
+        opacity = style.get("opacity", 1.0)
+        if element.get("type") == "text":
+            # Font sizes are in reference-canvas pixels; 1920px maps to 100cqw
+            font_size = float(style.get("font_size") or 16) * 100 / REFERENCE_CANVAS[0]
+            parts.append(
+                f'<div class="el" style="{box};opacity:{opacity};font-size:{font_size:.3f}cqw;'
+                f'color:{escape(style.get("color") or "#000000")};text-align:{escape(text_align(style))};'
+                f'font-weight:{escape(str(style.get("font_weight") or "normal"))}">'
+                f'{escape(content.get("text") or "")}</div>'
+            )
+        elif element.get("type") == "image":
+            url = content.get("url") or content.get("image_url")
+            if url:
+                parts.append(
+                    f'<img class="el" style="{box};opacity:{opacity};object-fit:{escape(style.get("object_fit") or "cover")}" '
+                    f'src="{escape(url)}" alt="{escape(content.get("alt_text") or "")}" loading="lazy">'
+                )
+        elif element.get("type") == "shape":
+            radius = "50%" if (content.get("shape_type") or content.get("shape")) == "circle" else "0"
+            parts.append(
+                f'<div class="el" style="{box};opacity:{opacity};border-radius:{radius};'
+                f'background:{escape(style.get("fill_color") or "#3B82F6")}"></div>'
+            )
+    return f'<section class="slide" style="{slide_style}">{"".join(parts)}</section>'
+
+def render_snapshot_html(presentation: Dict[str, Any], slides: List[Dict[str, Any]]) -> str:
+    """Self-contained, script-light HTML view of a snapshot (one slide per screen, arrow keys to move)"""
+    title = escape(presentation.get("title") or "Presentation")
+    frames = "".join(f'<div class="frame">{_render_slide_html(slide)}</div>' for slide in slides)
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        "<meta name=\"viewport\" content=\"width=device-width,initial-scale=1\">"
+        f"<title>{title}</title><style>"
+        "html,body{margin:0;height:100%;background:#111;font-family:system-ui,sans-serif}"
+        "main{height:100%;overflow-y:auto;scroll-snap-type:y mandatory}"
+        ".frame{height:100%;display:flex;align-items:center;justify-content:center;scroll-snap-align:center}"
+        ".slide{position:relative;width:min(100vw,177.78vh);aspect-ratio:16/9;overflow:hidden;container-type:inline-size}"
+        ".el{position:absolute;box-sizing:border-box;margin:0;white-space:pre-wrap;overflow:hidden}"
+        "</style></head><body><main>"
+        + frames
+        + "</main><script>"
+        "document.addEventListener('keydown',e=>{const m=document.querySelector('main');"
+        "if(['ArrowRight','ArrowDown',' '].includes(e.key)){e.preventDefault();m.scrollBy(0,m.clientHeight)}"
+        "if(['ArrowLeft','ArrowUp'].includes(e.key)){e.preventDefault();m.scrollBy(0,-m.clientHeight)}});"
+        "</script></body></html>"
+    )
+
+class ShareSnapshotStore:
+    """
+    Immutable, precompressed snapshots of shared presentations on disk
+
+    Publishing writes the deck's preview payload (`deck.json`) and a static
+    HTML view (`index.html`) into `<root>/<share token>/<snapshot id>/`, each
+    alongside gzip (and, when the brotli package is installed, brotli)
+    encodings. The snapshot ID is a hash of the content, so a snapshot's
+    files never change and can be cached forever; `current.json` in the
+    token's directory points at the latest one. Serving a snapshot reads
+    only these files, never the database.
+    """
+
+    def __init__(self, root: str, keep: int = 2, max_decks: int = 32):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+        self.max_decks = max_decks
+        self._current: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._decks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    @staticmethod
+    def valid_token(share_token: Optional[str]) -> bool:
+        return bool(share_token and _TOKEN_PATTERN.match(share_token))
+
+    async def publish(self, presentation: Dict[str, Any], slides: List[Dict[str, Any]], share_token: str) -> Dict[str, Any]:
+        """
+        Write a snapshot of a presentation and its ordered slides and make it current
+
+        Embedded (data URI) images are moved to the blob store first, so the
+        snapshot only references cacheable blob URLs.
+
+        Returns:
+            The snapshot's pointer (snapshot_id, presentation_id, version, published_at)
+        """
+        if not self.valid_token(share_token):
+            raise ValueError("Invalid share token")
+
+        blob_store = get_blob_store()
+        for slide in slides:
+            await blob_store.externalize_slide_images(slide)
+
+        return await asyncio.to_thread(self._publish, presentation, slides, share_token)
+
+    def _publish(self, presentation: Dict[str, Any], slides: List[Dict[str, Any]], share_token: str) -> Dict[str, Any]:
+        public_presentation = {k: v for k, v in presentation.items() if k not in PRIVATE_FIELDS}
+        deck = json.dumps(
+            {"presentation": public_presentation, "slides": slides},
+            default=_json_default,
+            separators=(",", ":")
+        ).encode()
+        html = render_snapshot_html(public_presentation, slides).encode()
+
+        snapshot_id = hashlib.sha256(
+            b"%d\0" % SNAPSHOT_FORMAT_VERSION + deck + b"\0" + html
+        ).hexdigest()[:16]
+        token_dir = self.root / share_token
+        snapshot_dir = token_dir / snapshot_id
+        token_dir.mkdir(exist_ok=True)
+
+        if not snapshot_dir.exists():
+            scratch = Path(tempfile.mkdtemp(dir=token_dir, prefix=".tmp-"))
+            try:
+                for name, data in (("deck.json", deck), ("index.html", html)):
+                    (scratch / name).write_bytes(data)
+                    (scratch / f"{name}.gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+                    if brotli is not None:
+                        (scratch / f"{name}.br").write_bytes(brotli.compress(data, quality=11))
+                os.replace(scratch, snapshot_dir)
+            except OSError:
+                shutil.rmtree(scratch, ignore_errors=True)
+                if not snapshot_dir.exists():
+                    raise
+
+        pointer = {
+            "snapshot_id": snapshot_id,
+            "presentation_id": presentation["id"],
+            "version": presentation.get("version", 0),
+            "published_at": datetime.now(timezone.utc).isoformat()
+        }
+        fd, tmp = tempfile.mkstemp(dir=token_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(pointer, f)
+        os.replace(tmp, token_dir / "current.json")
+        self._prune(token_dir, keep=snapshot_dir)
+
+        logger.info(f"Published snapshot {snapshot_id} of presentation {presentation['id']}")
+        return pointer
+
+    def _prune(self, token_dir: Path, keep: Path) -> None:
+        """Remove all but the newest `keep` snapshots of a token (old clients may still hold their URLs briefly)"""
+        snapshots = sorted(
+            (entry for entry in token_dir.iterdir() if entry.is_dir() and _SNAPSHOT_ID_PATTERN.match(entry.name)),
+            key=lambda entry: entry.stat().st_mtime,
+            reverse=True
+        )
+        for entry in [s for s in snapshots if s != keep][max(0, self.keep - 1):]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def current(self, share_token: str) -> Optional[Dict[str, Any]]:
+        """Pointer to a token's latest snapshot, or None if it has none"""
+        if not self.valid_token(share_token):
+            return None
+        path = self.root / share_token / "current.json"
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            self._current.pop(share_token, None)
+            return None
+
+        cached = self._current.get(share_token)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, json.loads(path.read_text()))
+            self._current[share_token] = cached
+        return cached[1]
+
+    def resolve(
+        self,
+        share_token: str,
+        name: str,
+        accept_encoding: Optional[str] = None,
+        snapshot_id: Optional[str] = None
+    ) -> Optional[Tuple[Path, Optional[str], str]]:
+        """
+        File to serve for a snapshot file, picking the best encoding the client accepts
+
+        Args:
+            share_token: Share token of the presentation
+            name: `deck.json` or `index.html`
+            accept_encoding: The request's Accept-Encoding header
+            snapshot_id: A specific snapshot, or None for the current one
+
+        Returns:
+            Tuple of (path, content encoding or None, snapshot ID), or None if there is no such file
+        """
+        if name not in SNAPSHOT_FILES:
+            return None
+        if snapshot_id is None:
+            pointer = self.current(share_token)
+            if pointer is None:
+                return None
+            snapshot_id = pointer["snapshot_id"]
+        elif not self.valid_token(share_token) or not _SNAPSHOT_ID_PATTERN.match(snapshot_id):
+            return None
+
+        accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+        base = self.root / share_token / snapshot_id / name
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encoding in accepted:
+                path = base.with_name(name + suffix)
+                if path.is_file():
+                    return path, encoding, snapshot_id
+        if base.is_file():
+            return base, None, snapshot_id
+        return None
+
+    async def deck(self, share_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Parsed payload of a token's current snapshot (`presentation`, `slides`, `snapshot_id`)
+
+        The most recently used decks stay parsed in memory, so paging through
+        a snapshot does not re-read it; the file work of a miss runs in a
+        thread. Callers must not modify the result.
+        """
+        pointer = await asyncio.to_thread(self.current, share_token)
+        if pointer is None:
+            return None
+        snapshot_id = pointer["snapshot_id"]
+
+        deck = self._decks.get(snapshot_id)
+        if deck is None:
+            path = self.root / share_token / snapshot_id / "deck.json"
+            try:
+                deck = await asyncio.to_thread(lambda: json.loads(path.read_bytes()))
+            except FileNotFoundError:
+                return None
+            deck["snapshot_id"] = snapshot_id
+            self._decks[snapshot_id] = deck
+            while len(self._decks) > self.max_decks:
+                self._decks.popitem(last=False)
+        else:
+            self._decks.move_to_end(snapshot_id)
+        return deck
+
+    async def revoke(self, share_token: str) -> None:
+        """Delete every snapshot of a share token"""
+        if not self.valid_token(share_token):
+            return
+        self._current.pop(share_token, None)
+        await asyncio.to_thread(shutil.rmtree, self.root / share_token, True)
+
+_snapshot_store: Optional[ShareSnapshotStore] = None
+
+def get_snapshot_store() -> ShareSnapshotStore:
+    """Process-wide snapshot store in SHARE_SNAPSHOT_DIR"""
+    global _snapshot_store
+    if _snapshot_store is None:
+        root = os.environ.get("SHARE_SNAPSHOT_DIR", str(Path(__file__).parent.parent / "data" / "snapshots"))
+        _snapshot_store = ShareSnapshotStore(root)
+    return _snapshot_store
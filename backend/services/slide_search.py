@@ -0,0 +1,106 @@
+from collections import Counter
+from typing import Dict, Any, List, Tuple
+import math
+import re
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in into is it its make more
+of on or our slide that the their this to was we were will with about can
+""".split())
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords and single characters removed"""
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if len(token) > 1 and token not in STOPWORDS
+    ]
+
+def slide_text(slide: Dict[str, Any]) -> str:
+    """All searchable text on a slide: title (weighted twice), text elements and notes"""
+    title = slide.get("title") or ""
+    parts = [title, title]
+    for element in slide.get("elements") or []:
+        if element.get("type") == "text":
+            parts.append((element.get("content") or {}).get("text") or "")
+    parts.append(slide.get("notes") or "")
+    return "\n".join(parts)
+
+class BM25Index:
+    """
+    Incremental Okapi BM25 index over a small set of documents
+
+    Documents can be added, replaced and removed one at a time; document
+    frequencies and the average length are kept up to date so searching never
+    rescans the collection. Sized for one presentation's slides.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._terms: Dict[str, Counter] = {}
+        self._lengths: Dict[str, int] = {}
+        self._df: Counter = Counter()
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def add(self, doc_id: str, text: str) -> None:
+        """Index a document, replacing any previous version with the same ID"""
+        self.remove(doc_id)
+
+        terms = Counter(tokenize(text))
+        self._terms[doc_id] = terms
+        self._lengths[doc_id] = sum(terms.values())
+        self._total_length += self._lengths[doc_id]
+        self._df.update(terms.keys())
+
+    def remove(self, doc_id: str) -> None:
+        """Drop a document from the index if present"""
+        terms = self._terms.pop(doc_id, None)
+        if terms is None:
+            return
+
+        self._total_length -= self._lengths.pop(doc_id)
+        self._df.subtract(terms.keys())
+        for term in terms:
+            if self._df[term] <= 0:
+                del self._df[term]
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[str, float]]:
+        """
+        Rank documents against a query
+
+        Args:
+            query: Free-text query
+            k: Maximum number of results
+
+        Returns:
+            List of (doc_id, score) pairs with a positive score, best first
+        """
+        query_terms = set(tokenize(query)) & self._df.keys()
+        if not query_terms:
+            return []
+
+        doc_count = len(self._terms)
+        avg_length = self._total_length / doc_count if doc_count else 0.0
+        idf = {
+            term: math.log(1 + (doc_count - self._df[term] + 0.5) / (self._df[term] + 0.5))
+            for term in query_terms
+        }
+
+        scores = []
+        for doc_id, terms in self._terms.items():
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / avg_length) if avg_length else self.k1
+            score = 0.0
+            for term in query_terms:
+                tf = terms.get(term)
+                if tf:
+                    score += idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            if score > 0:
+                scores.append((doc_id, score))
+
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores[:k]
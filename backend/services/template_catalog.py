@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from fastapi.encoders import jsonable_encoder
+from pydantic import ValidationError
+import asyncio
+import hashlib
+import json
+import logging
+
+from models.template import Template
+
+logger = logging.getLogger(__name__)
+
+class TemplateCatalog:
+    """
+    Process-wide, read-only copy of the template collection
+
+    Templates only change when they are seeded or edited, so the gallery
+    is served from memory: the collection is read once (at startup, or on
+    first use) and each distinct response body is encoded once. `version`
+    is a hash of the catalog's contents and doubles as the ETag.
+
+    Each API worker holds its own copy; after modifying templates, call
+    `reload` (POST /templates/reload) on every worker, or restart them.
+    """
+
+    def __init__(self):
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[datetime] = None
+        self._templates: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = asyncio.Lock()
+
+    async def load(self, db: AsyncIOMotorDatabase) -> str:
+        """
+        (Re)read every template from the database
+
+        Documents that do not validate as a Template are logged and left out.
+
+        Returns:
+            The new catalog version
+        """
+        async with self._lock:
+            documents = await db.templates.find({}, {"_id": 0}).to_list(length=None)
+            templates = []
+            for document in documents:
+                # One malformed document must not take the whole gallery down
+                try:
+                    templates.append(jsonable_encoder(Template.model_validate(document)))
+                except ValidationError as e:
+                    logger.error(f"Skipping invalid template {document.get('id')!r}: {e}")
+            templates.sort(key=lambda template: template["id"])
+
+            self._templates = templates
+            self._by_id = {template["id"]: template for template in templates}
+            self._bodies = {}
+            self.version = hashlib.sha256(
+                json.dumps(templates, sort_keys=True).encode()
+            ).hexdigest()[:16]
+            self.loaded_at = datetime.now(timezone.utc)
+
+        logger.info(f"Loaded {len(templates)} templates (catalog version {self.version})")
+        return self.version
+
+    async def ensure_loaded(self, db: AsyncIOMotorDatabase) -> None:
+        """Load the catalog if this process has not yet"""
+        if self.version is None:
+            await self.load(db)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    def list(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Templates, optionally of one category"""
+        if category is None:
+            return self._templates
+        return [template for template in self._templates if template["category"] == category]
+
+    def get(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """A template by ID, or None"""
+        return self._by_id.get(template_id)
+
+    def categories(self) -> List[str]:
+        """Distinct categories, sorted"""
+        return sorted({template["category"] for template in self._templates})
+
+    def body(self, key: str, build) -> bytes:
+        """
+        Encoded JSON response for `key`, built with `build()` once per catalog version
+        """
+        body = self._bodies.get(key)
+        if body is None:
+            body = json.dumps(build(), separators=(",", ":")).encode()
+            # Keys come from query strings; don't let arbitrary ones pile up
+            if len(self._bodies) < 256:
+                self._bodies[key] = body
+        return body
+
+    def metrics(self) -> Dict[str, Any]:
+        """Version, size and load time of the catalog"""
+        return {
+            "version": self.version,
+            "templates": len(self._templates),
+            "loaded_at": self.loaded_at
+        }
+
+# Shared by the template routes; loaded at startup
+template_catalog = TemplateCatalog()
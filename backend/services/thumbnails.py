@@ -0,0 +1,291 @@
+from io import BytesIO
+from typing import Dict, Any, List, Optional, Set, Tuple
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+import hashlib
+import json
+import logging
+
+from PIL import Image, ImageColor, ImageDraw, ImageFont, ImageOps, features
+
+from services.blob_store import get_blob_store, blob_key_from_url, parse_data_uri
+from services.image_derivatives import get_image_pipeline
+from services.pdf_canvas_renderer import REFERENCE_CANVAS, positions_in_pixels, text_align
+
+logger = logging.getLogger(__name__)
+
+# Fields a thumbnail is drawn from, plus the stored thumbnail state
+THUMBNAIL_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "slide_number": 1,
+    "elements": 1,
+    "background": 1,
+    "thumbnail_url": 1,
+    "thumbnail_hash": 1
+}
+
+def slide_content_hash(slide: Dict[str, Any]) -> str:
+    """Hash of the parts of a slide that show up in its thumbnail"""
+    payload = json.dumps([slide.get("elements") or [], slide.get("background") or {}], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _color(value: Optional[str], default: str, opacity: float = 1.0) -> Tuple[int, int, int, int]:
+    try:
+        rgb = ImageColor.getrgb(value or default)[:3]
+    except ValueError:
+        rgb = ImageColor.getrgb(default)[:3]
+    return (*rgb, round(255 * max(0.0, min(1.0, opacity))))
+
+def _fit(image: Image.Image, width: int, height: int, fit: str) -> Tuple[Image.Image, int, int]:
+    """Resize an image for a box; returns (image, x offset, y offset) within the box"""
+    if fit == "fill":
+        return image.resize((width, height), Image.LANCZOS), 0, 0
+    if fit == "contain":
+        image = ImageOps.contain(image, (width, height), Image.LANCZOS)
+        return image, (width - image.width) // 2, (height - image.height) // 2
+    return ImageOps.fit(image, (width, height), Image.LANCZOS), 0, 0
+
+def _font(size: int) -> ImageFont.ImageFont:
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+def _wrap(draw: ImageDraw.ImageDraw, text: str, font, width: int) -> List[str]:
+    lines = []
+    for paragraph in text.split("\n"):
+        line = ""
+        for word in paragraph.split(" "):
+            candidate = f"{line} {word}" if line else word
+            if line and draw.textlength(candidate, font=font) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+def render_slide_thumbnail(slide: Dict[str, Any], images: Dict[str, bytes], width: int = 480) -> Tuple[bytes, str]:
+    """
+    Rasterize a slide to a small 16:9 image with Pillow
+
+    A simplified version of what the editor draws: background, shapes,
+    images and wrapped text at their positions, in z-index order. Runs in
+    the image pipeline's worker threads.
+
+    Args:
+        slide: Slide with `elements` and `background`
+        images: Bytes of the blob-store images the slide uses, by URL
+        width: Thumbnail width in pixels
+
+    Returns:
+        Tuple of (encoded bytes, mime type)
+    """
+    height = round(width * 9 / 16)
+    background = slide.get("background") or {}
+    canvas = Image.new("RGBA", (width, height), _color(background.get("color"), "#FFFFFF"))
+
+    def load(url: Optional[str]) -> Optional[Image.Image]:
+        parsed = parse_data_uri(url) if url else None
+        data = parsed[1] if parsed else images.get(url)
+        if not data:
+            return None
+        try:
+            with Image.open(BytesIO(data)) as opened:
+                opened.draft("RGB", (width, height))
+                return ImageOps.exif_transpose(opened).convert("RGBA")
+        except Exception:
+            return None
+
+    gradient = background.get("gradient") or {}
+    stops = gradient.get("colors") or [c for c in (gradient.get("from"), gradient.get("to")) if c]
+    if background.get("type") == "gradient" and len(stops) >= 2:
+        mask = Image.linear_gradient("L").rotate(gradient.get("angle", 135) - 90, expand=True).resize((width, height))
+        canvas = Image.composite(
+            Image.new("RGBA", (width, height), _color(stops[-1], "#FFFFFF")),
+            Image.new("RGBA", (width, height), _color(stops[0], "#FFFFFF")),
+            mask
+        )
+    elif background.get("type") == "image":
+        image = load(background.get("image_url"))
+        if image is not None:
+            canvas.alpha_composite(_fit(image, width, height, "cover")[0])
+
+    elements = [e for e in slide.get("elements") or [] if e.get("visible", True) and e.get("position")]
+    if positions_in_pixels(elements):
+        sx, sy = width / REFERENCE_CANVAS[0], height / REFERENCE_CANVAS[1]
+    else:
+        sx, sy = width / 100, height / 100
+    font_scale = width / REFERENCE_CANVAS[0]
+
+    for element in sorted(elements, key=lambda e: e["position"].get("z_index", 0)):
+        position = element["position"]
+        x, y = round(position.get("x", 0) * sx), round(position.get("y", 0) * sy)
+        box_width = max(1, round(position.get("width", 0) * sx))
+        box_height = max(1, round(position.get("height", 0) * sy))
+        style = element.get("style") or {}
+        content = element.get("content") or {}
+        opacity = float(style.get("opacity", 1.0))
+
+        layer = Image.new("RGBA", (box_width, box_height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        element_type = element.get("type")
+
+        if element_type == "shape":
+            fill = _color(style.get("fill_color") or style.get("fill"), "#3B82F6", opacity)
+            if (content.get("shape_type") or content.get("shape")) == "circle":
+                draw.ellipse((0, 0, box_width - 1, box_height - 1), fill=fill)
+            else:
+                radius = round(float(style.get("border_radius") or 0) * font_scale)
+                draw.rounded_rectangle((0, 0, box_width - 1, box_height - 1), radius=radius, fill=fill)
+        elif element_type == "image":
+            image = load(content.get("url") or content.get("image_url"))
+            if image is None:
+                continue
+            image, offset_x, offset_y = _fit(image, box_width, box_height, style.get("object_fit") or "cover")
+            if opacity < 1:
+                image.putalpha(image.getchannel("A").point(lambda a: round(a * opacity)))
+            layer.alpha_composite(image, (offset_x, offset_y))
+        elif element_type == "text":
+            text = content.get("text") or ""
+            if not text.strip():
+                continue
+            font_size = max(4, round(float(style.get("font_size") or 16) * font_scale))
+            font = _font(font_size)
+            leading = font_size * float(style.get("line_height") or 1.2)
+            color = _color(style.get("color"), "#000000", opacity)
+            align = text_align(style)
+
+            line_y = 0.0
+            for line in _wrap(draw, text, font, box_width):
+                if line_y + font_size > box_height:
+                    break
+                line_width = draw.textlength(line, font=font)
+                line_x = (box_width - line_width) / 2 if align == "center" else box_width - line_width if align == "right" else 0
+                draw.text((line_x, line_y), line, font=font, fill=color)
+                line_y += leading
+        else:
+            continue
+
+        canvas.alpha_composite(layer, (x, y))
+
+    buffer = BytesIO()
+    if features.check("webp"):
+        canvas.convert("RGB").save(buffer, "WEBP", quality=80, method=4)
+        return buffer.getvalue(), "image/webp"
+    canvas.convert("RGB").save(buffer, "PNG", optimize=True)
+    return buffer.getvalue(), "image/png"
+
+class ThumbnailService:
+    """
+    Keeps slide and presentation thumbnails up to date in the background
+
+    Routes call `schedule` after changing a slide (or a whole presentation).
+    Requests for the same slide within `delay` seconds collapse into one, so
+    a burst of autosaves renders once. A slide is only re-rendered when the
+    hash of its elements and background differs from the one stored with its
+    thumbnail. Thumbnails go to the blob store; the URL is written to the
+    slide's `thumbnail_url`, and the first slide's to the presentation's.
+    """
+
+    def __init__(self, width: int = 480, delay: float = 2.0, max_concurrent: int = 2):
+        self.width = width
+        self.delay = delay
+        self._pending: Dict[str, asyncio.Task] = {}
+        # Strong references until each task finishes; the loop only keeps weak ones
+        self._tasks: Set[asyncio.Task] = set()
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    def schedule(self, db: AsyncIOMotorDatabase, presentation_id: str, slide_id: Optional[str] = None) -> None:
+        """Refresh one slide's thumbnail, or every slide's when `slide_id` is None, after the debounce delay"""
+        key = slide_id or f"presentation:{presentation_id}"
+        pending = self._pending.pop(key, None)
+        if pending is not None:
+            pending.cancel()
+        task = asyncio.create_task(self._run(key, db, presentation_id, slide_id))
+        self._pending[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, key: str, db: AsyncIOMotorDatabase, presentation_id: str, slide_id: Optional[str]) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            return
+        # Past the debounce: a new schedule for the key starts a new task instead of cancelling this one
+        if self._pending.get(key) is asyncio.current_task():
+            del self._pending[key]
+
+        async with self._semaphore:
+            try:
+                await self.refresh(db, presentation_id, slide_id)
+            except Exception as e:
+                logger.warning(f"Could not refresh thumbnails for presentation {presentation_id}: {e}")
+
+    async def refresh(self, db: AsyncIOMotorDatabase, presentation_id: str, slide_id: Optional[str] = None) -> int:
+        """
+        Re-render stale thumbnails now and update the presentation's cover
+
+        Returns:
+            Number of thumbnails rendered
+        """
+        query = {"presentation_id": presentation_id}
+        if slide_id:
+            query["id"] = slide_id
+
+        rendered = 0
+        async for slide in db.slides.find(query, THUMBNAIL_PROJECTION):
+            if await self._refresh_slide(db, slide):
+                rendered += 1
+
+        first = await db.slides.find_one(
+            {"presentation_id": presentation_id},
+            {"_id": 0, "thumbnail_url": 1},
+            sort=[("slide_number", 1)]
+        )
+        cover_url = (first or {}).get("thumbnail_url") or ""
+        await db.presentations.update_one(
+            {"id": presentation_id, "thumbnail_url": {"$ne": cover_url}},
+            {"$set": {"thumbnail_url": cover_url}}
+        )
+        return rendered
+
+    async def _refresh_slide(self, db: AsyncIOMotorDatabase, slide: Dict[str, Any]) -> bool:
+        content_hash = slide_content_hash(slide)
+        if slide.get("thumbnail_url") and slide.get("thumbnail_hash") == content_hash:
+            return False
+
+        images = await self._load_images(slide)
+        data, mime_type = await get_image_pipeline().run(render_slide_thumbnail, slide, images, self.width)
+        stored = await get_blob_store().put(data, mime_type, derive=False, thumbnail_of=slide["id"])
+
+        await db.slides.update_one(
+            {"id": slide["id"]},
+            {"$set": {"thumbnail_url": stored["url"], "thumbnail_hash": content_hash}}
+        )
+        logger.info(f"Rendered thumbnail for slide {slide['id']}")
+        return True
+
+    async def _load_images(self, slide: Dict[str, Any]) -> Dict[str, bytes]:
+        """Bytes of the blob-store images a slide uses, read from the smallest adequate derivative"""
+        urls = [(slide.get("background") or {}).get("image_url")]
+        for element in slide.get("elements") or []:
+            if element.get("type") == "image":
+                content = element.get("content") or {}
+                urls.append(content.get("url") or content.get("image_url"))
+
+        blob_store = get_blob_store()
+        images = {}
+        for url in urls:
+            key = blob_key_from_url(url)
+            if not key or url in images:
+                continue
+            try:
+                images[url] = await blob_store.read(await blob_store.resolve_width(key, self.width))
+            except Exception as e:
+                logger.warning(f"Could not load blob {key} for thumbnail: {e}")
+        return images
+
+# Shared by the slide, presentation, template, chat and AI routes
+thumbnails = ThumbnailService()
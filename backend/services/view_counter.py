@@ -0,0 +1,98 @@
+from typing import Dict, Any, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class ViewCounter:
+    """
+    Buffers presentation view counts in memory and writes them in batches
+
+    Viewing a shared deck only bumps an in-process counter; every
+    `flush_interval` seconds the pending counts go to MongoDB as one
+    unordered `bulk_write` of `$inc` updates, one per viewed presentation.
+    A hot share link therefore costs one write per interval per API worker
+    instead of one per view.
+
+    Loss window: counts recorded since the last flush live only in this
+    process. A graceful shutdown flushes them, but a crash or SIGKILL loses
+    up to `flush_interval` seconds of views. A failed flush puts its counts
+    back to be retried with the next one. `view_count` is a popularity
+    signal, not billing data, so that trade is acceptable.
+    """
+
+    def __init__(self, flush_interval: float = 10.0):
+        self.flush_interval = flush_interval
+        self._pending: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_views = 0
+        self.failed_flushes = 0
+
+    def record(self, presentation_id: str, views: int = 1) -> None:
+        """Count a view; it reaches the database with the next flush"""
+        self._pending[presentation_id] = self._pending.get(presentation_id, 0) + views
+
+    def pending(self, presentation_id: str) -> int:
+        """Views of a presentation not yet flushed (to add to the stored count)"""
+        return self._pending.get(presentation_id, 0)
+
+    async def flush(self, db: AsyncIOMotorDatabase) -> int:
+        """
+        Write all pending counts now
+
+        Returns:
+            Number of views written
+        """
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, {}
+        try:
+            await db.presentations.bulk_write(
+                [UpdateOne({"id": presentation_id}, {"$inc": {"view_count": views}}) for presentation_id, views in pending.items()],
+                ordered=False
+            )
+        except Exception as e:
+            # Put the counts back so the next flush retries them
+            for presentation_id, views in pending.items():
+                self.record(presentation_id, views)
+            self.failed_flushes += 1
+            logger.warning(f"Could not flush view counts for {len(pending)} presentation(s): {e}")
+            return 0
+
+        views = sum(pending.values())
+        self.flushed_views += views
+        return views
+
+    def start(self, db: AsyncIOMotorDatabase) -> None:
+        """Begin flushing every `flush_interval` seconds"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(db))
+
+    async def _flush_loop(self, db: AsyncIOMotorDatabase) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush(db)
+
+    async def stop(self, db: AsyncIOMotorDatabase) -> None:
+        """Stop the flush loop and write whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush(db)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Buffer and flush counters"""
+        return {
+            "pending_presentations": len(self._pending),
+            "pending_views": sum(self._pending.values()),
+            "flushed_views": self.flushed_views,
+            "failed_flushes": self.failed_flushes,
+            "flush_interval": self.flush_interval
+        }
+
+# Shared by the preview routes; started and stopped with the app
+view_counter = ViewCounter(flush_interval=float(os.environ.get("VIEW_COUNT_FLUSH_SECONDS", "10")))
@@ -0,0 +1,90 @@
+"""Compare the flow and canvas PDF renderers on a synthetic deck"""
+import argparse
+import base64
+import resource
+import sys
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+from PIL import Image
+from services.export_service import render_pdf, PDF_RENDERERS
+
+def make_image(width: int, height: int, color: str) -> str:
+    """A photo-sized PNG as a data URI"""
+    image = Image.new("RGB", (width, height), color)
+    buffer = BytesIO()
+    image.save(buffer, "PNG")
+    return "data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+def make_deck(slide_count: int, distinct_images: int):
+    """Presentation and slides with a title, bullets, a shape and a (repeating) image each"""
+    images = [make_image(2400, 1600, color) for color in ("#2563EB", "#DC2626", "#16A34A", "#CA8A04")[:max(1, distinct_images)]]
+    presentation = {"id": "benchmark", "title": "Export benchmark", "description": "Synthetic deck"}
+    slides = []
+    for number in range(1, slide_count + 1):
+        slides.append({
+            "id": f"slide-{number}",
+            "slide_number": number,
+            "title": f"Slide {number}",
+            "notes": "Speaker notes " * 10,
+            "background": {"type": "solid", "color": "#F8FAFC"},
+            "elements": [
+                {
+                    "id": f"title-{number}", "type": "text",
+                    "position": {"x": 5, "y": 5, "width": 90, "height": 15, "z_index": 1},
+                    "content": {"text": f"Slide {number}: quarterly results"},
+                    "style": {"font_size": 64, "font_weight": 700, "color": "#111827"}
+                },
+                {
+                    "id": f"body-{number}", "type": "text",
+                    "position": {"x": 5, "y": 25, "width": 45, "height": 65, "z_index": 1},
+                    "content": {"text": "\n".join(f"• Point {i} with some supporting detail" for i in range(1, 6))},
+                    "style": {"font_size": 32, "color": "#374151", "line_height": 1.4}
+                },
+                {
+                    "id": f"shape-{number}", "type": "shape",
+                    "position": {"x": 0, "y": 95, "width": 100, "height": 5, "z_index": 0},
+                    "content": {"shape_type": "rectangle"},
+                    "style": {"fill_color": "#2563EB"}
+                },
+                {
+                    "id": f"image-{number}", "type": "image",
+                    "position": {"x": 55, "y": 25, "width": 40, "height": 50, "z_index": 2},
+                    "content": {"url": images[number % len(images)]},
+                    "style": {"object_fit": "cover"}
+                }
+            ]
+        })
+    return presentation, slides
+
+def benchmark(slide_count: int, distinct_images: int, repeat: int):
+    presentation, slides = make_deck(slide_count, distinct_images)
+    print(f"Deck: {slide_count} slides, {distinct_images} distinct image(s), best of {repeat}\n")
+    print(f"{'renderer':<10}{'seconds':>10}{'size (KB)':>12}")
+    
+    with tempfile.TemporaryDirectory() as directory:
+        for renderer in PDF_RENDERERS:
+            output_path = str(Path(directory) / f"{renderer}.pdf")
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                size = render_pdf(presentation, slides, {}, output_path, None, renderer)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            print(f"{renderer:<10}{best:>10.3f}{size / 1024:>12.1f}")
+    
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"\nPeak RSS: {peak_mb:.0f} MB")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slides", type=int, default=50)
+    parser.add_argument("--images", type=int, default=2, help="Distinct images cycled across slides (max 4)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.slides, args.images, args.repeat)
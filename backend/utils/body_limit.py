@@ -0,0 +1,61 @@
+from typing import Dict
+import json
+
+from fastapi import HTTPException
+
+class BodySizeLimitMiddleware:
+    """
+    Caps request body size for specific paths before the app reads the body
+
+    FastAPI parses (and spools) a multipart form before the route runs, so
+    a size check in the route comes too late. Requests whose Content-Length
+    exceeds the path's limit are answered with 413 straight away (400 if the
+    header is not an integer); bodies sent without a length are counted as
+    they stream in and cut off with 413 once over the limit.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None:
+            try:
+                length = int(content_length)
+            except ValueError:
+                await self._reject(send, 400, "Invalid Content-Length header")
+                return
+            if length > limit:
+                await self._reject(send, 413, "Request body is too large")
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside body parsing, which re-raises HTTPExceptions as-is
+                    raise HTTPException(status_code=413, detail="Request body is too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    async def _reject(send, status: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
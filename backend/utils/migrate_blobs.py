@@ -0,0 +1,59 @@
+"""Move embedded base64 images out of slide documents into the blob store"""
+import asyncio
+import sys
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent.parent
+load_dotenv(ROOT_DIR / '.env')
+sys.path.insert(0, str(ROOT_DIR))
+
+from services.blob_store import create_blob_store
+
+mongo_url = os.environ['MONGO_URL']
+client = AsyncIOMotorClient(mongo_url)
+db = client[os.environ['DB_NAME']]
+
+# Slides that still carry at least one embedded image
+EMBEDDED_IMAGES_QUERY = {
+    "$or": [
+        {"elements.content.url": {"$regex": "^data:"}},
+        {"elements.content.image_url": {"$regex": "^data:"}},
+        {"background.image_url": {"$regex": "^data:"}},
+        {"background.image_base64": {"$nin": [None, ""]}}
+    ]
+}
+
+async def migrate_blobs():
+    """Rewrite data URIs in slides to blob-store URLs"""
+    print("Migrating embedded slide images to the blob store...")
+    
+    blob_store = create_blob_store(db)
+    slides_updated = 0
+    images_moved = 0
+    
+    cursor = db.slides.find(
+        EMBEDDED_IMAGES_QUERY,
+        {"_id": 0, "id": 1, "elements": 1, "background": 1}
+    ).batch_size(20)
+    
+    async for slide in cursor:
+        moved = await blob_store.externalize_slide_images(slide)
+        if not moved:
+            continue
+        
+        await db.slides.update_one(
+            {"id": slide["id"]},
+            {"$set": {"elements": slide.get("elements", []), "background": slide.get("background")}}
+        )
+        slides_updated += 1
+        images_moved += moved
+        print(f"✅ Slide {slide['id']}: moved {moved} image(s)")
+    
+    print(f"\n✅ Migration complete! {images_moved} image(s) moved from {slides_updated} slide(s)")
+    client.close()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_blobs())
@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+import json
+import os
+
+from fastapi.responses import Response, FileResponse, StreamingResponse
+
+def sse_event(payload: dict) -> str:
+    """Format a payload as a server-sent event"""
+    return f"data: {json.dumps(payload)}\n\n"
+
+# Headers that keep proxies from buffering an event stream
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single `bytes=` range, or None to send the whole file
+
+    Multi-range and malformed headers are ignored (the whole file is sent),
+    as RFC 9110 allows.
+
+    Raises:
+        ValueError: If the range lies entirely past the end of the file
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start_text, _, end_text = range_header[6:].strip().partition("-")
+    if not (start_text or end_text).isdigit() or (start_text and end_text and not end_text.isdigit()):
+        return None
+
+    if not start_text:
+        # Suffix range: the last N bytes
+        length = int(end_text)
+        if length == 0:
+            raise ValueError("Range not satisfiable")
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = min(int(end_text), size - 1) if end_text else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable")
+    return start, end
+
+def _read_range(path: Path, start: int, end: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+def ranged_file_response(
+    path: Path,
+    media_type: str,
+    headers: Dict[str, str],
+    range_header: Optional[str] = None
+) -> Response:
+    """
+    Serve a file, honouring a single byte range with 206 Partial Content
+
+    Args:
+        path: File to serve
+        media_type: Content type
+        headers: Extra response headers (ETag, Cache-Control, Content-Encoding, ...)
+        range_header: The request's Range header
+    """
+    size = os.path.getsize(path)
+    headers = {**headers, "Accept-Ranges": "bytes"}
+    try:
+        byte_range = parse_byte_range(range_header, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(_read_range(path, start, end), status_code=206, media_type=media_type, headers=headers)
+
+def _read_file(f: BinaryIO, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    try:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        f.close()
+
+def open_file_response(f: BinaryIO, media_type: str, filename: str, headers: Dict[str, str]) -> Response:
+    """
+    Serve an already open file as a download, closing it when done
+
+    Unlike FileResponse this does not reopen the file by path, so the file
+    may be deleted or replaced once it has been opened.
+    """
+    quoted = quote(filename)
+    disposition = f'attachment; filename="{filename}"' if quoted == filename else f"attachment; filename*=utf-8''{quoted}"
+    headers = {
+        **headers,
+        "Content-Length": str(os.fstat(f.fileno()).st_size),
+        "Content-Disposition": disposition
+    }
+    return StreamingResponse(_read_file(f), media_type=media_type, headers=headers)
@@ -24,8 +24,7 @@ export const ImageGenerator = ({ editor, onClose }) => {
       
       if (response.data.success) {
         const imageData = response.data.data;
-        const imageUrl = `data:${imageData.mime_type};base64,${imageData.image_base64}`;
-        setGeneratedImage(imageUrl);
+        setGeneratedImage(imageData.image_url);
       }
     } catch (err) {
       console.error('Error generating image:', err);
@@ -1,5 +1,6 @@
 import React from 'react';
 import { Plus, Trash2, Copy } from 'lucide-react';
+import { sizedImageUrl } from '@/utils/imageSources';
 
 export const SlideList = ({ editor }) => {
   return (
@@ -35,6 +36,14 @@ export const SlideList = ({ editor }) => {
             
             {/* Slide Thumbnail */}
             <div className="aspect-video bg-white m-2 rounded border border-gray-200 overflow-hidden relative">
+              {slide.thumbnail_url ? (
+                <img
+                  src={slide.thumbnail_url}
+                  alt=""
+                  loading="lazy"
+                  className="w-full h-full object-cover"
+                />
+              ) : (
               <div
                 className="w-full h-full"
                 style={{
@@ -70,7 +79,7 @@ export const SlideList = ({ editor }) => {
                     )}
                     {element.type === 'image' && element.content?.image_url && (
                       <img
-                        src={element.content.image_url}
+                        src={sizedImageUrl(element.content.image_url, 160)}
                         alt=""
                         className="w-full h-full object-cover"
                       />
@@ -78,6 +87,7 @@ export const SlideList = ({ editor }) => {
                   </div>
                 ))}
               </div>
+              )}
             </div>
             
             {/* Actions */}
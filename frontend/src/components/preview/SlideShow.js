@@ -1,5 +1,6 @@
 import React, { useState, useEffect, useCallback } from 'react';
 import { ChevronLeft, ChevronRight } from 'lucide-react';
+import { imageSrcSet } from '@/utils/imageSources';
 
 const SlideShow = ({ slides, onClose }) => {
   const [currentSlide, setCurrentSlide] = useState(0);
@@ -73,7 +74,7 @@ const SlideShow = ({ slides, onClose }) => {
             fontSize: `${elementStyle?.font_size || 16}px`,
             fontWeight: elementStyle?.font_weight || 400,
             color: elementStyle?.color || '#000000',
-            textAlign: elementStyle?.align || 'left',
+            textAlign: elementStyle?.text_align || elementStyle?.align || 'left',
             display: 'flex',
             alignItems:
               elementStyle?.vertical_align === 'middle'
@@ -93,6 +94,8 @@ const SlideShow = ({ slides, onClose }) => {
         <img
           key={element.id}
           src={content.url}
+          srcSet={imageSrcSet(content.url)}
+          sizes={positionStyle.width}
           alt={content.alt || 'Slide image'}
           style={{
             ...positionStyle,
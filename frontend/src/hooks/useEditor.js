@@ -85,6 +85,11 @@ export const useEditor = () => {
     
     const updatedSlide = { ...currentSlide, ...updates };
     
+    // The stored thumbnail is stale until the server re-renders it
+    if (updates.elements || updates.background) {
+      updatedSlide.thumbnail_url = '';
+    }
+    
     // Update slides array
     const newSlides = [...slides];
     newSlides[currentSlideIndex] = updatedSlide;
@@ -0,0 +1,62 @@
+import { useEffect, useRef } from 'react';
+
+const EVENTS_URL = `${process.env.REACT_APP_BACKEND_URL}/api/analytics/events`;
+const FLUSH_INTERVAL_MS = 10000;
+const MAX_BATCH = 500;
+
+const sendEvents = (events, { beacon = false } = {}) => {
+  for (let start = 0; start < events.length; start += MAX_BATCH) {
+    const body = JSON.stringify({ events: events.slice(start, start + MAX_BATCH) });
+    // A string body goes out as text/plain, a CORS-safelisted type, so neither
+    // the beacon nor the keepalive fetch needs a preflight to reach another origin.
+    // sendBeacon survives page unload; fetch with keepalive is the fallback
+    if (beacon && navigator.sendBeacon?.(EVENTS_URL, body)) {
+      continue;
+    }
+    fetch(EVENTS_URL, { method: 'POST', body, keepalive: true }).catch(() => {});
+  }
+};
+
+/**
+ * Report slide views and dwell time from the preview player
+ *
+ * Events are queued and sent in batches every few seconds, and once more
+ * when the page is hidden.
+ */
+export const useSlideAnalytics = (presentationId, slide, slideIndex) => {
+  const queue = useRef([]);
+  const sessionId = useRef(crypto.randomUUID?.() || `${Date.now()}-${Math.random().toString(36).slice(2)}`);
+
+  useEffect(() => {
+    const flush = (options) => {
+      if (queue.current.length === 0) return;
+      const events = queue.current;
+      queue.current = [];
+      sendEvents(events, options);
+    };
+    const interval = setInterval(flush, FLUSH_INTERVAL_MS);
+    const handleHide = () => flush({ beacon: true });
+    window.addEventListener('pagehide', handleHide);
+    return () => {
+      clearInterval(interval);
+      window.removeEventListener('pagehide', handleHide);
+      flush({ beacon: true });
+    };
+  }, []);
+
+  const slideId = slide?.id;
+  useEffect(() => {
+    if (!presentationId || !slideId) return;
+    const base = {
+      presentation_id: presentationId,
+      slide_id: slideId,
+      slide_index: slideIndex,
+      session_id: sessionId.current,
+    };
+    const shownAt = Date.now();
+    queue.current.push({ ...base, type: 'slide_view' });
+    return () => {
+      queue.current.push({ ...base, type: 'dwell', dwell_ms: Math.min(Date.now() - shownAt, 3600000) });
+    };
+  }, [presentationId, slideId, slideIndex]);
+};
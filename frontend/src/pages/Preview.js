@@ -1,8 +1,10 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { useParams, useSearchParams, useNavigate } from 'react-router-dom';
 import { ChevronLeft, ChevronRight, X, Clock, FileText, Maximize, Download, Share2 } from 'lucide-react';
 import api from '../utils/api';
 import { toast } from 'sonner';
+import { imageSrcSet } from '@/utils/imageSources';
+import { useSlideAnalytics } from '@/hooks/useSlideAnalytics';
 
 const Preview = () => {
   const { id } = useParams();
@@ -18,14 +20,18 @@ const Preview = () => {
   const [isFullscreen, setIsFullscreen] = useState(false);
   const [elapsedTime, setElapsedTime] = useState(0);
   const [isTimerRunning, setIsTimerRunning] = useState(false);
+  const [prefetchAhead, setPrefetchAhead] = useState(2);
+  const requestedSlides = useRef(new Set());
 
-  // Load presentation data
+  // Load the manifest; slide contents are fetched lazily below
   useEffect(() => {
     const loadPreview = async () => {
       try {
-        const response = await api.get(`/api/export/preview/${id}${token ? `?token=${token}` : ''}`);
+        requestedSlides.current = new Set();
+        const response = await api.get(`/api/export/preview/${id}/manifest${token ? `?token=${token}` : ''}`);
         setPresentation(response.data.presentation);
         setSlides(response.data.slides);
+        setPrefetchAhead(response.data.prefetch_ahead);
       } catch (error) {
         console.error('Error loading preview:', error);
         toast.error('Failed to load presentation');
@@ -36,6 +42,27 @@ const Preview = () => {
     loadPreview();
   }, [id, token]);
 
+  const loadSlide = useCallback(async (index) => {
+    if (requestedSlides.current.has(index)) return;
+    requestedSlides.current.add(index);
+    try {
+      const response = await api.get(`/api/export/preview/${id}/slides/${index}${token ? `?token=${token}` : ''}`);
+      setSlides(prev => prev.map((slide, i) => (i === index ? { ...slide, ...response.data.slide, loaded: true } : slide)));
+    } catch (error) {
+      requestedSlides.current.delete(index);
+      console.error('Error loading slide:', error);
+    }
+  }, [id, token]);
+
+  useSlideAnalytics(presentation?.id, slides[currentSlide], currentSlide);
+
+  // Load the current slide and prefetch the next few
+  useEffect(() => {
+    for (let index = currentSlide; index < Math.min(slides.length, currentSlide + prefetchAhead + 1); index++) {
+      loadSlide(index);
+    }
+  }, [currentSlide, slides.length, prefetchAhead, loadSlide]);
+
   // Timer effect
   useEffect(() => {
     let interval;
@@ -169,7 +196,7 @@ const Preview = () => {
             fontSize: `${elementStyle?.font_size || 16}px`,
             fontWeight: elementStyle?.font_weight || 400,
             color: elementStyle?.color || '#000000',
-            textAlign: elementStyle?.align || 'left',
+            textAlign: elementStyle?.text_align || elementStyle?.align || 'left',
             display: 'flex',
             alignItems: elementStyle?.vertical_align === 'middle' ? 'center' : elementStyle?.vertical_align === 'bottom' ? 'flex-end' : 'flex-start',
           }}
@@ -184,6 +211,8 @@ const Preview = () => {
         <img
           key={element.id}
           src={content.url}
+          srcSet={imageSrcSet(content.url)}
+          sizes={positionStyle.width}
           alt={content.alt || 'Slide image'}
           style={{
             ...positionStyle,
@@ -297,7 +326,11 @@ const Preview = () => {
               backgroundColor: currentSlideData.background?.color || '#ffffff',
             }}
           >
-            {currentSlideData.elements?.map(renderSlideElement)}
+            {currentSlideData.loaded
+              ? currentSlideData.elements?.map(renderSlideElement)
+              : currentSlideData.thumbnail_url && (
+                <img src={currentSlideData.thumbnail_url} alt="" className="w-full h-full object-cover" />
+              )}
           </div>
 
           {/* Controls */}
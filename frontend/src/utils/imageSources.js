@@ -0,0 +1,16 @@
+// Helpers for images served from the backend blob store (/api/blobs/<key>),
+// which can return resized derivatives via ?w=<width>.
+
+const BLOB_PATH = '/api/blobs/';
+const DERIVATIVE_WIDTHS = [160, 480, 960, 1600];
+
+export const isBlobUrl = (url) => typeof url === 'string' && url.includes(BLOB_PATH);
+
+// URL for a copy of the image at least `width` pixels wide
+export const sizedImageUrl = (url, width) => (isBlobUrl(url) ? `${url}?w=${width}` : url);
+
+// srcSet attribute covering every derivative width (undefined for other URLs)
+export const imageSrcSet = (url) =>
+  isBlobUrl(url)
+    ? DERIVATIVE_WIDTHS.map((width) => `${url}?w=${width} ${width}w`).join(', ')
+    : undefined;